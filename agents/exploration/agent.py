@@ -6,8 +6,11 @@ from typing import Any, Dict, List, Optional
 
 from agents.exploration.embeddings import get_embedding_provider
 from agents.exploration.llm_provider import get_llm_provider
+from agents.exploration.query_cache import QueryEmbeddingCache
 from apps.api.config import CONFIG
+from domain.filter_index import MetadataFilter
 from domain.index_store import IndexStore
+from domain.lexical_index import is_identifier_query
 from infra.observability.logger import log_event
 
 
@@ -16,6 +19,7 @@ class ExplorationAgent:
 
     def __init__(self, index_store: IndexStore) -> None:
         self.index_store = index_store
+        self.query_cache = QueryEmbeddingCache(CONFIG.query_cache_size, CONFIG.query_cache_path)
 
     def answer_question(
         self,
@@ -25,25 +29,51 @@ class ExplorationAgent:
         question: str,
         source_type: str = "repo",
         commit_id: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        contexts: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        """Retrieve relevant chunks and generate an evidence-backed answer."""
-        embedding_provider = get_embedding_provider()
-        query_vector = embedding_provider.embed([question])[0]
-        try:
-            index_key = f"{source_type}__{owner}" if source_type != "repo" else f"{source_type}__{owner}__{repo}"
-            results = self.index_store.search(index_key, query_vector, top_k=5)
-        except FileNotFoundError:
-            results = []
+        """Retrieve relevant chunks and generate an evidence-backed answer.
+
+        Extra ``contexts`` (dicts with ``type``/``owner``/``repo`` and optional
+        ``commit_id``/``path_prefix``) are searched together with the primary one
+        and merged into a single ranked list; each index uses its own context's filter.
+        """
+        mode = CONFIG.retrieval_mode
+        query_text = question if mode in ("hybrid", "lexical") else None
+        query_vector = None
+        query_cache_hit = False
+        if mode == "dense" or (mode == "hybrid" and not is_identifier_query(question)):
+            # Identifier lookups are answered by BM25 alone, without loading the embedding model.
+            query_vector, query_cache_hit = self.query_cache.get_or_embed(
+                self._embedding_model(),
+                question,
+                lambda text: get_embedding_provider().embed([text])[0],
+            )
+        primary = {"commit_id": commit_id, "path_prefix": path_prefix}
+        filters: Dict[str, MetadataFilter] = {}
+        first = {"type": source_type, "owner": owner, "repo": repo, **primary}
+        for context in [first, *(contexts or [])]:
+            index_key = self._index_key(
+                context.get("type", "repo"), context["owner"], context.get("repo", "")
+            )
+            where = MetadataFilter(
+                commit=context.get("commit_id"), path_prefix=context.get("path_prefix")
+            )
+            filters.setdefault(index_key, where)
+        results = self._retrieve(filters, query_vector, query_text)
+        if not results and any(where.commit for where in filters.values()):
+            # The commit is a preference: fall back to any commit within each path scope.
+            anywhere = {
+                key: MetadataFilter(path_prefix=where.path_prefix) for key, where in filters.items()
+            }
+            results = self._retrieve(anywhere, query_vector, query_text)
 
         llm_provider, backend = get_llm_provider()
-        if commit_id:
-            filtered = [result for result in results if result.metadata.get("commit") == commit_id]
-            if filtered:
-                results = filtered
+        default_id = f"{owner}/{repo}" if source_type == "repo" else f"{source_type}/{owner}"
         sources_payload = [
             {
                 "type": result.metadata.get("type", source_type),
-                "id": f"{owner}/{repo}" if source_type == "repo" else f"{source_type}/{owner}",
+                "id": self._source_id(result.metadata, default_id),
                 "path": result.metadata.get("path", ""),
                 "url": result.metadata.get("url", ""),
                 "excerpt": result.text[:600],
@@ -117,10 +147,54 @@ class ExplorationAgent:
                 "confidence_rationale": rationale,
                 "sources": response["sources"],
                 "model_used": backend,
+                "query_embedding_cached": query_cache_hit,
+                "query_cache": self.query_cache.stats(),
             }
         )
         return response
 
+    def _retrieve(
+        self,
+        filters: Dict[str, MetadataFilter],
+        query_vector: Optional[List[float]],
+        query_text: Optional[str],
+    ) -> List[Any]:
+        index_keys = list(filters)
+        if len(index_keys) > 1:
+            return self.index_store.search_federated(
+                index_keys, query_vector, top_k=5, where=filters, query_text=query_text
+            )
+        where = filters[index_keys[0]]
+        try:
+            if query_text is not None:
+                return self.index_store.search_hybrid(
+                    index_keys[0], query_text, query_vector, top_k=5, where=where
+                )
+            return self.index_store.search(index_keys[0], query_vector, top_k=5, where=where)
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _embedding_model() -> str:
+        backend = CONFIG.embedding_backend.lower()
+        if backend == "openai":
+            return f"openai:{CONFIG.openai_embedding_model}"
+        return f"{backend}:{CONFIG.embedding_model}"
+
+    @staticmethod
+    def _index_key(source_type: str, owner: str, repo: str) -> str:
+        if source_type != "repo":
+            return f"{source_type}__{owner}"
+        return f"{source_type}__{owner}__{repo}"
+
+    @staticmethod
+    def _source_id(metadata: Dict[str, Any], default: str) -> str:
+        if not metadata.get("owner"):
+            return default
+        if metadata.get("type", "repo") == "repo":
+            return f"{metadata['owner']}/{metadata.get('repo')}"
+        return f"{metadata['type']}/{metadata['owner']}"
+
     @staticmethod
     def _extract_followups(answer: str) -> List[str]:
         if "Follow-ups:" not in answer:
@@ -133,8 +207,14 @@ class ExplorationAgent:
     def _confidence(results: List[Any], answer: str) -> tuple[str, str]:
         if not results:
             return "low", "No sources retrieved for the query."
-        scores = [result.score for result in results]
+        # Fused and BM25 scores are rank-normalized, so only cosine similarity is calibrated.
+        dense = [result.dense_score for result in results if result.dense_score is not None]
+        scores = sorted(dense, reverse=True)
         cited = "[" in answer and "]" in answer
+        if not scores:
+            if cited:
+                return "medium", "Keyword matches with citations; similarity was not measured."
+            return "low", "Similarity or citations were insufficient."
         if scores[0] > 0.8 and cited:
             return "high", "Top result is highly similar and citations are present."
         if sum(scores[:3]) > 1.6 and cited:
@@ -0,0 +1,134 @@
+"""Token-aware batching and concurrent dispatch for remote embedding APIs."""
+
+from __future__ import annotations
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple, Type
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def plan_batches(token_counts: Sequence[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """Group input positions into consecutive batches within both budgets.
+
+    An input larger than ``max_tokens`` is sent on its own.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    tokens = 0
+    for position, count in enumerate(token_counts):
+        if current and (tokens + count > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(position)
+        tokens += count
+    if current:
+        batches.append(current)
+    return batches
+
+
+def token_counter(model: str) -> Callable[[str], int]:
+    """Return an exact token count when tiktoken is available, else a 4-chars-per-token estimate."""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    return lambda text: len(text) // 4 + 1
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read ``Retry-After`` / ``retry-after-ms`` from an HTTP error response, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def is_retryable(exc: BaseException, retry_on: Tuple[Type[BaseException], ...]) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        # Connection errors and timeouts carry no status code.
+        return isinstance(exc, retry_on)
+    return status in RETRYABLE_STATUS or status >= 500
+
+
+class BatchDispatcher:
+    """Send batches concurrently with bounded parallelism and per-batch retries."""
+
+    def __init__(
+        self,
+        send: Callable[[List[str]], List[List[float]]],
+        count_tokens: Callable[[str], int],
+        max_tokens: int,
+        max_items: int,
+        concurrency: int,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        retry_on: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError),
+    ) -> None:
+        self.send = send
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.retry_on = retry_on
+
+    def run(self, texts: List[str]) -> List[List[float]]:
+        """Embed ``texts`` and return vectors in input order."""
+        if not texts:
+            return []
+        token_counts = [self.count_tokens(text) for text in texts]
+        batches = plan_batches(token_counts, self.max_tokens, self.max_items)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        def dispatch(batch: List[int]) -> None:
+            vectors = self._send_with_retry([texts[position] for position in batch])
+            if len(vectors) != len(batch):
+                raise RuntimeError(
+                    f"Embedding API returned {len(vectors)} vectors for {len(batch)} inputs"
+                )
+            for position, vector in zip(batch, vectors):
+                results[position] = vector
+
+        if len(batches) == 1:
+            dispatch(batches[0])
+        else:
+            workers = min(self.concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+                for future in [pool.submit(dispatch, batch) for batch in batches]:
+                    future.result()
+        return results  # type: ignore[return-value]
+
+    def _send_with_retry(self, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return self.send(batch)
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc, self.retry_on):
+                    raise
+                delay = retry_after_seconds(exc)
+                if delay is None:
+                    ceiling = min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)
+                    delay = random.uniform(0, ceiling)
+                time.sleep(delay)
+                attempt += 1
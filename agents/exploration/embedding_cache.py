@@ -0,0 +1,65 @@
+"""Content-addressed on-disk cache of embedding vectors."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_BATCH = 500
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """SQLite table of float32 vector blobs keyed by (model, sha256(text))."""
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, digest BLOB NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, digest)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Return the cached vector for each text, or None on a miss."""
+        digests = [text_digest(text) for text in texts]
+        found: Dict[bytes, bytes] = {}
+        unique = list(dict.fromkeys(digests))
+        with self._lock:
+            for start in range(0, len(unique), _BATCH):
+                batch = unique[start : start + _BATCH]
+                placeholders = ",".join("?" * len(batch))
+                query = (
+                    "SELECT digest, vector FROM embeddings "
+                    f"WHERE model = ? AND digest IN ({placeholders})"
+                )
+                rows = self._conn.execute(query, [model, *batch]).fetchall()
+                found.update(rows)
+        return [
+            np.frombuffer(found[digest], dtype="float32").tolist() if digest in found else None
+            for digest in digests
+        ]
+
+    def put_many(
+        self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        rows = [
+            (model, text_digest(text), np.asarray(vector, dtype="float32").tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._conn.commit()
@@ -2,52 +2,162 @@
 
 from __future__ import annotations
 
-from typing import List
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 
-from openai import OpenAI
+from openai import APIConnectionError, OpenAI
 
+from agents.exploration.batching import BatchDispatcher, token_counter
+from agents.exploration.embedding_cache import EmbeddingCache
+from agents.exploration.local_engine import LocalEmbeddingEngine
 from apps.api.config import CONFIG
+from infra.observability.logger import log_event
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+WARMUP_TEXTS = ["warm-up"] * 8
 
 
 class EmbeddingProvider:
     """Abstract embedding provider."""
 
+    model_name = ""
+    cache: Optional[EmbeddingCache] = None
+    load_seconds = 0.0
+
     def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, sending only texts missing from the cache to the model."""
+        if self.cache is None or not texts:
+            return self._embed(texts)
+        vectors = self.cache.get_many(self.model_name, texts)
+        misses = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if misses:
+            fresh = dict(zip(misses, self._embed(misses)))
+            self.cache.put_many(self.model_name, misses, list(fresh.values()))
+            vectors = [
+                vector if vector is not None else fresh[text]
+                for text, vector in zip(texts, vectors)
+            ]
+        return vectors
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
         raise NotImplementedError
 
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
-    """OpenAI embeddings provider."""
+    """OpenAI embeddings provider with token-aware, concurrent batching."""
 
-    def __init__(self, api_key: str, model: str) -> None:
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None) -> None:
+        # Retries are handled per batch by the dispatcher, which honors Retry-After.
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
         self.model = model
-
-    def embed(self, texts: List[str]) -> List[List[float]]:
+        self.model_name = f"openai:{model}"
+        self.dispatcher = BatchDispatcher(
+            self._send,
+            token_counter(model),
+            max_tokens=CONFIG.openai_embedding_batch_tokens,
+            max_items=CONFIG.openai_embedding_batch_size,
+            concurrency=CONFIG.openai_embedding_concurrency,
+            max_retries=CONFIG.openai_embedding_max_retries,
+            retry_on=(APIConnectionError, ConnectionError, TimeoutError),
+        )
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        return self.dispatcher.run(texts)
+
+    def _send(self, texts: List[str]) -> List[List[float]]:
         response = self.client.embeddings.create(model=self.model, input=texts)
-        return [item.embedding for item in response.data]
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
 
 
 class LocalEmbeddingProvider(EmbeddingProvider):
     """Local embeddings provider using sentence-transformers."""
 
-    def __init__(self, model_name: str) -> None:
+    def __init__(self, model_name: str, workers: int = 1) -> None:
         try:
             from sentence_transformers import SentenceTransformer
         except ImportError as exc:
             raise RuntimeError("sentence-transformers is required for local embeddings") from exc
         self.model = SentenceTransformer(model_name)
+        self.model_name = f"local:{model_name}"
+        # The engine serializes calls: the fast tokenizer is not re-entrant across threads.
+        self.engine = LocalEmbeddingEngine(self.model, workers)
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        vectors = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-        return vectors.tolist()
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        return self.engine.encode(texts).tolist()
+
+
+_PROVIDERS: Dict[tuple, EmbeddingProvider] = {}
+_PROVIDERS_LOCK = threading.Lock()
 
 
 def get_embedding_provider() -> EmbeddingProvider:
-    """Return configured embedding provider."""
+    """Return the configured embedding provider, loading it once per process."""
     backend = CONFIG.embedding_backend.lower()
+    model = CONFIG.openai_embedding_model if backend == "openai" else CONFIG.embedding_model
+    key = (backend, model)
+    provider = _PROVIDERS.get(key)
+    if provider is not None:
+        return provider
+    with _PROVIDERS_LOCK:
+        provider = _PROVIDERS.get(key)
+        if provider is None:
+            started = time.perf_counter()
+            provider = _create_provider(backend, model)
+            provider.load_seconds = time.perf_counter() - started
+            provider.cache = _embedding_cache(CONFIG.embedding_cache_path)
+            _PROVIDERS[key] = provider
+        return provider
+
+
+def warm_up_embedding_provider() -> Dict[str, Any]:
+    """Load the configured provider, run a dummy batch and log load time and memory."""
+    rss_before = _rss_bytes()
+    provider = get_embedding_provider()
+    started = time.perf_counter()
+    provider._embed(WARMUP_TEXTS)
+    report = {
+        "event": "embedding_warmup",
+        "model": provider.model_name,
+        "load_seconds": round(provider.load_seconds, 3),
+        "warmup_seconds": round(time.perf_counter() - started, 3),
+        "rss_mb": round(_rss_bytes() / 2**20, 1),
+        "rss_delta_mb": round((_rss_bytes() - rss_before) / 2**20, 1),
+    }
+    log_event(report)
+    return report
+
+
+def _create_provider(backend: str, model: str) -> EmbeddingProvider:
     if backend == "openai":
         if not CONFIG.openai_api_key:
             raise RuntimeError("OPENAI_API_KEY is required for OpenAI embeddings")
-        return OpenAIEmbeddingProvider(CONFIG.openai_api_key, CONFIG.openai_embedding_model)
-    return LocalEmbeddingProvider(CONFIG.embedding_model)
+        return OpenAIEmbeddingProvider(CONFIG.openai_api_key, model, CONFIG.openai_base_url)
+    if backend == "onnx":
+        from agents.exploration.onnx_embeddings import OnnxEmbeddingProvider
+
+        return OnnxEmbeddingProvider(
+            model, CONFIG.embedding_onnx_dir, CONFIG.embedding_onnx_threads
+        )
+    return LocalEmbeddingProvider(model, CONFIG.embedding_workers)
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * resource.getpagesize()
+    except (OSError, AttributeError):
+        pass
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@lru_cache(maxsize=None)
+def _embedding_cache(path: Optional[str]) -> Optional[EmbeddingCache]:
+    return EmbeddingCache(path) if path else None
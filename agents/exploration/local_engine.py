@@ -0,0 +1,89 @@
+"""Length-bucketed, optionally multi-process encoding for sentence-transformers."""
+
+from __future__ import annotations
+
+import atexit
+import math
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BATCH_TOKEN_BUDGET = 16384
+MIN_BATCH_SIZE = 8
+MAX_BATCH_SIZE = 256
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str, max_seq_length: int) -> int:
+    return max(1, min(len(text) // CHARS_PER_TOKEN + 1, max_seq_length))
+
+
+def auto_batch_size(tokens: int) -> int:
+    """Fit a batch of padded sequences of ``tokens`` into the per-batch token budget."""
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, BATCH_TOKEN_BUDGET // max(tokens, 1)))
+
+
+def length_buckets(texts: List[str], max_seq_length: int) -> Dict[int, List[int]]:
+    """Group input positions by power-of-two token length so each batch pads little."""
+    buckets: Dict[int, List[int]] = {}
+    for position, text in enumerate(texts):
+        tokens = estimate_tokens(text, max_seq_length)
+        buckets.setdefault(2 ** math.ceil(math.log2(tokens)), []).append(position)
+    return buckets
+
+
+class LocalEmbeddingEngine:
+    """Encode texts bucket by bucket, sharding large buckets across worker processes.
+
+    ``workers`` > 1 starts a sentence-transformers multi-process pool on first
+    use; it is stopped at interpreter exit.
+    """
+
+    def __init__(self, model: Any, workers: int = 1) -> None:
+        self.model = model
+        self.workers = max(1, workers)
+        self.max_seq_length = int(getattr(model, "max_seq_length", None) or 512)
+        self._pool: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Return L2-normalized vectors in input order."""
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype="float32")
+        output: Optional[np.ndarray] = None
+        buckets = length_buckets(texts, self.max_seq_length)
+        with self._lock:
+            for bucket_tokens, positions in sorted(buckets.items()):
+                batch = [texts[position] for position in positions]
+                vectors = self._encode_bucket(batch, auto_batch_size(bucket_tokens))
+                if output is None:
+                    output = np.empty((len(texts), vectors.shape[1]), dtype="float32")
+                output[positions] = vectors
+        return output
+
+    def _encode_bucket(self, texts: List[str], batch_size: int) -> np.ndarray:
+        if self.workers > 1 and len(texts) >= batch_size * self.workers:
+            vectors = self.model.encode_multi_process(
+                texts,
+                self._start_pool(),
+                batch_size=batch_size,
+                chunk_size=max(batch_size, math.ceil(len(texts) / (self.workers * 4))),
+            )
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            return (vectors / norms).astype("float32")
+        return self.model.encode(
+            texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+        ).astype("float32")
+
+    def _start_pool(self) -> Dict[str, Any]:
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+            atexit.register(self.close)
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
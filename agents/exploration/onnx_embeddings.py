@@ -0,0 +1,205 @@
+"""Int8-quantized ONNX Runtime embedding provider for CPU-only nodes."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from agents.exploration.embeddings import EmbeddingProvider
+from agents.exploration.local_engine import auto_batch_size, length_buckets
+
+FLOAT_FILE = "model.onnx"
+QUANTIZED_FILE = "model.int8.onnx"
+META_FILE = "embedding.json"
+AGREEMENT_THRESHOLD = 0.98
+AGREEMENT_TEXTS = [
+    "def get_file_content(owner, repo, path): return the decoded blob",
+    "How do I run the API server locally?",
+    "PAY-123 Payments fail when the currency code is missing",
+    "Configuration is read from environment variables with demo fallbacks.",
+    "README",
+    "class IndexStore manages vector indexes with memory-mapped chunk storage " * 8,
+]
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two embeddings of the same texts."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = np.sum(reference * candidate, axis=1)
+    return {"mean": round(float(cosines.mean()), 5), "min": round(float(cosines.min()), 5)}
+
+
+def model_dir(root: str, model_name: str) -> Path:
+    return Path(root) / model_name.replace("/", "__")
+
+
+def export_quantized(model_name: str, target: Path) -> Dict[str, Any]:
+    """Export ``model_name``'s transformer to ONNX, quantize weights to int8 and verify agreement.
+
+    The export is built in a scratch directory and only renamed to ``target``
+    once it passes. Raises RuntimeError if the quantized graph's vectors drift
+    from the sentence-transformers ones, since they would not match existing indexes.
+    """
+    staging = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        meta = _export(model_name, staging)
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return meta
+
+
+def _export(model_name: str, target: Path) -> Dict[str, Any]:
+    try:
+        import torch
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from sentence_transformers import SentenceTransformer
+    except ImportError as exc:
+        raise RuntimeError(
+            "torch, sentence-transformers and onnxruntime are required to export an ONNX model"
+            ' (pip install -e ".[onnx]")'
+        ) from exc
+
+    reference_model = SentenceTransformer(model_name, device="cpu")
+    transformer = reference_model[0]
+    pooling = reference_model[1].get_pooling_mode_str() if len(reference_model) > 1 else "mean"
+    target.mkdir(parents=True, exist_ok=True)
+    sample = transformer.tokenizer(["warm-up"], return_tensors="pt")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample
+    ]
+    axes = {name: {0: "batch", 1: "sequence"} for name in (*input_names, "last_hidden_state")}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer.auto_model,
+            tuple(sample[name] for name in input_names),
+            str(target / FLOAT_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=14,
+        )
+    quantize_dynamic(
+        str(target / FLOAT_FILE), str(target / QUANTIZED_FILE), weight_type=QuantType.QInt8
+    )
+    (target / FLOAT_FILE).unlink(missing_ok=True)
+    transformer.tokenizer.save_pretrained(str(target))
+    meta = {
+        "model": model_name,
+        "pooling": pooling,
+        "max_length": int(reference_model.max_seq_length),
+    }
+    (target / META_FILE).write_text(json.dumps(meta, indent=2))
+
+    session = OnnxEmbeddingProvider.from_directory(target, model_name)
+    reference = reference_model.encode(
+        AGREEMENT_TEXTS, convert_to_numpy=True, normalize_embeddings=True
+    )
+    meta["agreement"] = cosine_agreement(reference, np.asarray(session._embed(AGREEMENT_TEXTS)))
+    (target / META_FILE).write_text(json.dumps(meta, indent=2))
+    if meta["agreement"]["min"] < AGREEMENT_THRESHOLD:
+        raise RuntimeError(
+            f"Quantized ONNX embeddings disagree with {model_name} "
+            f"(min cosine {meta['agreement']['min']} < {AGREEMENT_THRESHOLD})"
+        )
+    return meta
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """Runs the configured embedding model as an int8 ONNX graph with onnxruntime.
+
+    The graph is exported on first use into ``<onnx_dir>/<model>``; vectors are
+    pooled and normalized like the sentence-transformers pipeline so indexes
+    built by the local provider stay searchable.
+    """
+
+    def __init__(self, model_name: str, onnx_dir: str, intra_op_threads: int = 0) -> None:
+        target = model_dir(onnx_dir, model_name)
+        if not (target / QUANTIZED_FILE).exists() or not (target / META_FILE).exists():
+            export_quantized(model_name, target)
+        self._load(target, model_name, intra_op_threads)
+        # Guards against exports written before validation gated the rename.
+        if self.agreement is None or self.agreement["min"] < AGREEMENT_THRESHOLD:
+            raise RuntimeError(
+                f"Quantized ONNX model in {target} was not validated against {model_name} "
+                f"(agreement {self.agreement}); delete it to re-export"
+            )
+
+    @classmethod
+    def from_directory(
+        cls, target: Path, model_name: str, intra_op_threads: int = 0
+    ) -> "OnnxEmbeddingProvider":
+        provider = cls.__new__(cls)
+        provider._load(target, model_name, intra_op_threads)
+        return provider
+
+    def _load(self, target: Path, model_name: str, intra_op_threads: int) -> None:
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as exc:
+            raise RuntimeError(
+                "onnxruntime and transformers are required for ONNX embeddings"
+                ' (pip install -e ".[onnx]")'
+            ) from exc
+        meta = json.loads((target / META_FILE).read_text())
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(target / QUANTIZED_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(target))
+        self.pooling = meta["pooling"]
+        self.max_length = meta["max_length"]
+        self.agreement: Optional[Dict[str, float]] = meta.get("agreement")
+        self.model_name = f"onnx:{model_name}"
+        # Tokenizer calls are not re-entrant; the session itself is thread-safe.
+        self._lock = threading.Lock()
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        output: Optional[np.ndarray] = None
+        for bucket_tokens, positions in sorted(length_buckets(texts, self.max_length).items()):
+            batch_size = auto_batch_size(bucket_tokens)
+            for start in range(0, len(positions), batch_size):
+                batch = positions[start : start + batch_size]
+                vectors = self._encode_batch([texts[position] for position in batch])
+                if output is None:
+                    output = np.empty((len(texts), vectors.shape[1]), dtype="float32")
+                output[batch] = vectors
+        return output.tolist()
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            encoded = self.tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+        feed = {name: np.asarray(encoded[name], dtype="int64") for name in self.input_names}
+        hidden = self.session.run(None, feed)[0]
+        mask = feed["attention_mask"][..., None].astype("float32")
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        elif self.pooling == "max":
+            pooled = np.where(mask > 0, hidden, -1e9).max(axis=1)
+        else:
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return (pooled / norms).astype("float32")
@@ -0,0 +1,68 @@
+"""LRU cache of question embeddings for the exploration agent."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from agents.exploration.embedding_cache import EmbeddingCache
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of question vectors keyed by (model, normalized question).
+
+    With ``path`` set, entries are also written to an SQLite :class:`EmbeddingCache`
+    so they survive restarts.
+    """
+
+    def __init__(self, max_entries: int, path: Optional[str] = None) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = EmbeddingCache(path) if path else None
+
+    def get_or_embed(
+        self, model: str, question: str, embed: Callable[[str], List[float]]
+    ) -> tuple[List[float], bool]:
+        """Return the vector for ``question`` and whether it came from the cache."""
+        key = (model, normalize_question(question))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector, True
+        if self._disk is not None:
+            vector = self._disk.get_many(model, [key[1]])[0]
+        cached = vector is not None
+        if vector is None:
+            vector = embed(question)
+            if self._disk is not None:
+                self._disk.put_many(model, [key[1]], [vector])
+        with self._lock:
+            if cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector, cached
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
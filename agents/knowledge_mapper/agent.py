@@ -3,51 +3,101 @@
 from __future__ import annotations
 
 import json
+import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Set
 
 from agents.exploration.embeddings import get_embedding_provider
-from agents.knowledge_mapper.ingest import chunk_text, filter_paths, is_binary, normalize_text
+from agents.knowledge_mapper.ingest import (
+    chunk_id,
+    chunk_text,
+    filter_paths,
+    is_binary,
+    normalize_text,
+)
 from apps.api.config import CONFIG
 from domain.index_store import IndexStore
 from mcp.gateway.gateway import MCPGateway
 
+logger = logging.getLogger("ktai.knowledge_mapper")
+
+WALKED_DIRECTORIES = {"docs", "doc", "documentation", "src"}
+
 
 class KnowledgeMappingAgent:
-    """Builds a repository knowledge index using MCP GitHub data."""
+    """Builds a repository knowledge index from MCP GitHub, local git, Jira and Confluence data."""
 
     def __init__(self, gateway: MCPGateway) -> None:
         self.gateway = gateway
-        self.index_store = IndexStore(CONFIG.index_root)
+        self.index_store = IndexStore(CONFIG.index_root, CONFIG.index_cache_max_bytes)
 
     def ingest_repo(self, owner: str, repo: str, depth: int = 2) -> Dict[str, Any]:
-        """Ingest and index a GitHub repository for retrieval."""
+        """Ingest and index a GitHub repository for retrieval.
+
+        In ``tree``/``tarball`` mode the indexed head commit is recorded, and a
+        reindex only fetches and re-embeds the paths changed since that commit.
+        """
         index_key = self._index_key("repo", owner, repo)
-        file_paths = self._discover_paths(owner, repo, depth=depth)
-        documents = self._fetch_documents(owner, repo, file_paths)
-        chunks, metadata = self._build_chunks(documents, source_type="repo")
+        if CONFIG.repo_ingest_mode in {"tree", "tarball"}:
+            synced = self._sync_tree(
+                "github",
+                {"owner": owner, "repo": repo},
+                owner,
+                repo,
+                index_key,
+                depth,
+                archive=CONFIG.repo_ingest_mode == "tarball",
+            )
+        else:
+            file_paths = self._discover_paths(owner, repo, depth=depth)
+            documents, failures = self._fetch_documents(owner, repo, file_paths)
+            synced = (documents, failures, None, None, None)
+        status = self._index_repo(index_key, owner, repo, "github", *synced)
+        status["http_cache"] = self.gateway.request("github", "cache_stats", {})
+        self._write_status(index_key, status)
+        return status
 
-        embedding_provider = get_embedding_provider()
-        vectors = embedding_provider.embed(chunks)
-        self.index_store.build_index(index_key, vectors, metadata, chunks)
+    def ingest_local(
+        self,
+        path: str,
+        owner: Optional[str] = None,
+        repo: Optional[str] = None,
+        ref: Optional[str] = None,
+        depth: int = 2,
+    ) -> Dict[str, Any]:
+        """Ingest a local clone or bare repository straight from its object store.
 
-        status = {
-            "owner": owner,
-            "repo": repo,
-            "last_indexed": datetime.utcnow().isoformat(),
-            "file_count": len({doc["path"] for doc in documents}),
-            "chunk_count": len(chunks),
-            "commit": metadata[0].get("commit") if metadata else None,
-        }
+        The index is keyed like a GitHub repo, with ``owner`` defaulting to
+        ``local`` and ``repo`` to the directory name; reindexing is incremental
+        from the recorded head commit as in ``tree`` mode.
+        """
+        owner = owner or "local"
+        repo = repo or Path(path.rstrip("/")).name.removesuffix(".git")
+        index_key = self._index_key("repo", owner, repo)
+        synced = self._sync_tree(
+            "local_git", {"path": path, "ref": ref}, owner, repo, index_key, depth, archive=True
+        )
+        status = self._index_repo(index_key, owner, repo, "local_git", *synced)
+        status.update({"source": "local", "path": path})
         self._write_status(index_key, status)
         return status
 
     def ingest_jira(self, project_key: str) -> Dict[str, Any]:
-        """Ingest and index Jira issues."""
+        """Ingest and index Jira issues.
+
+        After a first full sync only issues updated since the previous sync
+        started are fetched and re-indexed. Deleted issues are only dropped by a
+        full sync, which runs whenever the index is missing.
+        """
         index_key = self._index_key("jira", project_key)
-        issues = self.gateway.request("jira", "list_issues", {"project_key": project_key})
+        since = self._last_synced(index_key, "last_updated")
+        sync = self.gateway.request(
+            "jira", "sync_issues", {"project_key": project_key, "updated_since": since}
+        )
+        issues = sync["issues"]
         documents: List[Dict[str, Any]] = []
         for issue in issues:
             text = normalize_text(f"{issue.get('summary', '')} {issue.get('description', '')}")
@@ -63,23 +113,54 @@ class KnowledgeMappingAgent:
                 }
             )
         chunks, metadata = self._build_chunks(documents, source_type="jira")
-        if chunks:
-            embedding_provider = get_embedding_provider()
-            vectors = embedding_provider.embed(chunks)
-            self.index_store.build_index(index_key, vectors, metadata, chunks)
+        scope = {issue.get("key") for issue in issues} if since else None
+        changes = self._index_chunks(index_key, chunks, metadata, scope=scope)
+        issue_count, chunk_count = len(documents), len(chunks)
+        if scope is not None:
+            issue_count, chunk_count = self._indexed_counts(index_key)
         status = {
             "project_key": project_key,
             "last_indexed": datetime.utcnow().isoformat(),
-            "issue_count": len(documents),
-            "chunk_count": len(chunks),
+            "last_updated": sync["last_updated"] or since,
+            "incremental": scope is not None,
+            "changed_issues": len(issues),
+            "issue_count": issue_count,
+            "chunk_count": chunk_count,
+            "http_cache": self.gateway.request("jira", "cache_stats", {}),
+            **changes,
         }
         self._write_status(index_key, status)
         return status
 
     def ingest_confluence(self, space_key: str) -> Dict[str, Any]:
-        """Ingest and index Confluence pages."""
+        """Ingest and index Confluence pages.
+
+        The page versions seen are recorded; later runs list versions only and
+        fetch, re-index or delete just the pages that were edited, added or removed.
+        """
         index_key = self._index_key("confluence", space_key)
-        pages = self.gateway.request("confluence", "list_pages", {"space_key": space_key})
+        previous = self._last_synced(index_key, "page_versions")
+        scope: Optional[Set[str]] = None
+        failures: List[Dict[str, str]] = []
+        if previous is None:
+            pages = self.gateway.request("confluence", "list_pages", {"space_key": space_key})
+            versions = {str(page.get("id")): page.get("version") for page in pages}
+        else:
+            versions = self.gateway.request(
+                "confluence", "list_page_versions", {"space_key": space_key}
+            )
+            changed = [
+                page_id for page_id, version in versions.items() if previous.get(page_id) != version
+            ]
+            scope = set(changed) | (set(previous) - set(versions))
+            fetched = self.gateway.request("confluence", "get_pages", {"page_ids": changed})
+            pages, failures = fetched["pages"], fetched["failed"]
+            for failure in failures:
+                # Keep the old version so the page is fetched again next time.
+                if failure["id"] in previous:
+                    versions[failure["id"]] = previous[failure["id"]]
+                else:
+                    versions.pop(failure["id"], None)
         documents: List[Dict[str, Any]] = []
         for page in pages:
             raw_body = page.get("body") or ""
@@ -96,15 +177,27 @@ class KnowledgeMappingAgent:
                 }
             )
         chunks, metadata = self._build_chunks(documents, source_type="confluence")
-        if chunks:
-            embedding_provider = get_embedding_provider()
-            vectors = embedding_provider.embed(chunks)
-            self.index_store.build_index(index_key, vectors, metadata, chunks)
+        changes = self._index_chunks(
+            index_key,
+            chunks,
+            metadata,
+            keep_paths={failure["id"] for failure in failures},
+            scope=scope,
+        )
+        page_count, chunk_count = len(documents), len(chunks)
+        if scope is not None:
+            page_count, chunk_count = self._indexed_counts(index_key)
         status = {
             "space_key": space_key,
             "last_indexed": datetime.utcnow().isoformat(),
-            "page_count": len(documents),
-            "chunk_count": len(chunks),
+            "page_count": page_count,
+            "chunk_count": chunk_count,
+            "incremental": scope is not None,
+            "changed_pages": len(scope) if scope is not None else len(pages),
+            "failed_pages": failures,
+            "page_versions": versions,
+            "http_cache": self.gateway.request("confluence", "cache_stats", {}),
+            **changes,
         }
         self._write_status(index_key, status)
         return status
@@ -124,7 +217,7 @@ class KnowledgeMappingAgent:
             paths.append(readme["path"])
 
         for item in structure["items"]:
-            if item.get("type") == "dir" and item.get("name") in {"docs", "doc", "documentation", "src"}:
+            if item.get("type") == "dir" and item.get("name") in WALKED_DIRECTORIES:
                 paths.extend(self._walk_directory(owner, repo, item["path"], depth - 1))
 
         unique_paths = list(dict.fromkeys(paths))
@@ -144,20 +237,258 @@ class KnowledgeMappingAgent:
                 results.extend(self._walk_directory(owner, repo, item["path"], depth - 1))
         return results
 
-    def _fetch_documents(self, owner: str, repo: str, paths: List[str]) -> List[Dict[str, Any]]:
-        documents = []
-        for path in paths:
-            payload = {"owner": owner, "repo": repo, "path": path}
-            result = self.gateway.request("github", "get_file_content", payload)
-            raw_text = result.get("text", "")
-            if not raw_text or is_binary(raw_text):
+    def _sync_tree(
+        self,
+        server: str,
+        source: Dict[str, Any],
+        owner: str,
+        repo: str,
+        index_key: str,
+        depth: int,
+        archive: bool,
+    ) -> tuple:
+        """Fetch the selected files of ``server``'s tree, or only those changed since the last sync.
+
+        Returns (documents, failures, commit, base commit, changed path scope,
+        complete); base commit and scope are None for a full sync. ``complete`` is
+        false when the tree listing was truncated: only listed paths are then in
+        scope, so files missing from the listing are neither deleted nor retagged.
+        """
+        tree = self.gateway.request(server, "get_repo_tree", source)
+        commit = tree["commit"]
+        listed = [item["path"] for item in tree["items"]]
+        file_paths = self._select_tree_paths(listed, depth)
+        base_commit = self._last_synced(index_key, "head_commit")
+        diff = self._changed_paths(server, source, base_commit, commit) if base_commit else None
+        scope: Optional[Set[str]] = None
+        removed: Set[str] = set()
+        if diff is None:
+            base_commit = None
+        else:
+            changed, removed = diff
+            scope = changed | removed
+            file_paths = [path for path in file_paths if path in changed]
+            if server == "github":
+                # A handful of blobs is cheaper than the whole tarball; a local
+                # cat-file pass only reads the objects asked for anyway.
+                archive = False
+        complete = not tree.get("truncated")
+        if not complete:
+            logger.warning("Tree of %s %s is truncated; keeping unlisted files", server, source)
+            present = set(listed)
+            scope = {path for path in (listed if scope is None else scope) if path in present}
+            scope |= removed
+        documents, failures = self._fetch_tree_documents(
+            server, source, owner, repo, tree, file_paths, archive
+        )
+        return documents, failures, commit, base_commit, scope, complete
+
+    def _index_repo(
+        self,
+        index_key: str,
+        owner: str,
+        repo: str,
+        server: str,
+        documents: List[Dict[str, Any]],
+        failures: List[Dict[str, str]],
+        commit: Optional[str] = None,
+        base_commit: Optional[str] = None,
+        scope: Optional[Set[str]] = None,
+        complete: bool = True,
+    ) -> Dict[str, Any]:
+        chunks, metadata = self._build_chunks(documents, source_type="repo")
+        retag = None
+        if scope is not None and complete:
+            # Files outside the diff are unchanged at ``commit``; only their tags move.
+            def retag(meta: Dict[str, Any]) -> Dict[str, Any]:
+                url = self._blob_url(server, owner, repo, commit, meta["path"])
+                return {**meta, "commit": commit, "url": url}
+
+        changes = self._index_chunks(
+            index_key,
+            chunks,
+            metadata,
+            keep_paths={failure["path"] for failure in failures},
+            scope=scope,
+            retag=retag,
+        )
+        file_count, chunk_count = len({doc["path"] for doc in documents}), len(chunks)
+        if scope is not None:
+            file_count, chunk_count = self._indexed_counts(index_key)
+        return {
+            "owner": owner,
+            "repo": repo,
+            "last_indexed": datetime.utcnow().isoformat(),
+            "file_count": file_count,
+            "chunk_count": chunk_count,
+            "commit": commit or (metadata[0].get("commit") if metadata else None),
+            # Failed or unlisted files must be retried, so only advance past a clean run.
+            "head_commit": commit if complete and not failures else base_commit,
+            "base_commit": base_commit,
+            "incremental": base_commit is not None,
+            "changed_files": len(scope) if scope is not None else file_count,
+            "failed_files": failures,
+            "tree_truncated": not complete,
+            **changes,
+        }
+
+    def _last_synced(self, index_key: str, field: str) -> Optional[str]:
+        """Sync cursor ``field`` of the last ingest, if its index still exists."""
+        cursor = self.get_status(index_key).get(field)
+        if cursor and self.index_store.chunk_ids(index_key):
+            return cursor
+        return None
+
+    def _indexed_counts(self, index_key: str) -> tuple[int, int]:
+        """Return (documents, chunks) currently live in the index."""
+        indexed = self.index_store.chunk_ids(index_key)
+        return len({identifier.rsplit(":", 2)[0] for identifier in indexed}), len(indexed)
+
+    def _changed_paths(
+        self, server: str, source: Dict[str, Any], base: str, head: str
+    ) -> Optional[tuple[Set[str], Set[str]]]:
+        """Return (added or modified, removed) paths, or None if a full ingest is needed."""
+        if base == head:
+            return set(), set()
+        try:
+            diff = self.gateway.request(
+                server, "compare_commits", {**source, "base": base, "head": head}
+            )
+        except Exception as exc:
+            logger.warning("Compare %s...%s failed on %s %s: %s", base, head, server, source, exc)
+            return None
+        if not diff["complete"]:
+            return None
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        for item in diff["files"]:
+            if item["status"] == "removed":
+                removed.add(item["path"])
                 continue
-            text = normalize_text(raw_text)
-            if not text:
+            changed.add(item["path"])
+            # A copy leaves its source in place; only a rename retires the old path.
+            if item["status"] == "renamed" and item.get("previous_path"):
+                removed.add(item["previous_path"])
+        return changed, removed
+
+    def _fetch_tree_documents(
+        self,
+        server: str,
+        source: Dict[str, Any],
+        owner: str,
+        repo: str,
+        tree: Dict[str, Any],
+        paths: List[str],
+        archive: bool = False,
+    ) -> tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """Fetch ``paths`` of a ``get_repo_tree`` listing, tagged with the tree's commit.
+
+        Contents come from blobs fetched by sha, or from a single archive pass
+        when ``archive`` is set.
+        """
+        commit = tree["commit"]
+        blobs = {item["path"]: item["sha"] for item in tree["items"]}
+
+        def metadata(path: str) -> Dict[str, Any]:
+            return {
+                "source_type": "repo",
+                "owner": owner,
+                "repo": repo,
+                "path": path,
+                "commit": commit,
+                "url": self._blob_url(server, owner, repo, commit, path),
+            }
+
+        if not archive:
+            documents, failures = self._fetch_documents(
+                owner,
+                repo,
+                paths,
+                fetch=lambda path: {
+                    "text": self.gateway.request(
+                        server, "get_blob", {**source, "sha": blobs[path]}
+                    ),
+                    "metadata": metadata(path),
+                },
+            )
+            return documents, failures
+
+        files = self.gateway.request(
+            server, "get_archive", {**source, "commit": commit, "paths": paths}
+        )
+        documents: List[Dict[str, Any]] = []
+        failures: List[Dict[str, str]] = []
+        for path in paths:
+            if path not in files:
+                failures.append({"path": path, "error": "missing from archive"})
                 continue
-            metadata = result.get("metadata", {})
-            documents.append({"path": path, "text": text, **metadata})
-        return documents
+            document = self._to_document(path, {"text": files[path], "metadata": metadata(path)})
+            if document is not None:
+                documents.append(document)
+        return documents, failures
+
+    @staticmethod
+    def _blob_url(server: str, owner: str, repo: str, commit: str, path: str) -> Optional[str]:
+        if server != "github":
+            return None
+        return f"https://github.com/{owner}/{repo}/blob/{commit}/{path}"
+
+    @staticmethod
+    def _select_tree_paths(paths: List[str], depth: int) -> List[str]:
+        """Pick the files the contents walk would reach: top level, and docs/src to ``depth``."""
+        selected = []
+        for path in paths:
+            parts = path.split("/")
+            if len(parts) == 1 or (parts[0] in WALKED_DIRECTORIES and len(parts) <= depth + 1):
+                selected.append(path)
+        return filter_paths(selected)
+
+    def _fetch_documents(
+        self,
+        owner: str,
+        repo: str,
+        paths: List[str],
+        fetch: Optional[Callable[[str], Dict[str, Any]]] = None,
+    ) -> tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """Fetch files concurrently, keeping path order and collecting per-file failures.
+
+        ``fetch`` returns a ``get_file_content``-shaped result for a path; it
+        defaults to that tool.
+        """
+        if fetch is None:
+
+            def fetch(path: str) -> Dict[str, Any]:
+                payload = {"owner": owner, "repo": repo, "path": path}
+                return self.gateway.request("github", "get_file_content", payload)
+
+        documents: List[Dict[str, Any]] = []
+        failures: List[Dict[str, str]] = []
+        if not paths:
+            return documents, failures
+        workers = max(1, min(CONFIG.ingest_concurrency, len(paths)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+            futures = [pool.submit(fetch, path) for path in paths]
+            for path, future in zip(paths, futures):
+                try:
+                    document = self._to_document(path, future.result())
+                except Exception as exc:
+                    logger.warning("Failed to fetch %s/%s:%s: %s", owner, repo, path, exc)
+                    failures.append({"path": path, "error": str(exc)})
+                    continue
+                if document is not None:
+                    documents.append(document)
+        return documents, failures
+
+    @staticmethod
+    def _to_document(path: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        raw_text = result.get("text", "")
+        if not raw_text or is_binary(raw_text):
+            return None
+        text = normalize_text(raw_text)
+        if not text:
+            return None
+        metadata = result.get("metadata", {})
+        return {"path": path, "text": text, **metadata}
 
     def _build_chunks(
         self, documents: List[Dict[str, Any]], source_type: str
@@ -165,9 +496,10 @@ class KnowledgeMappingAgent:
         chunks: List[str] = []
         metadata: List[Dict[str, Any]] = []
         for doc in documents:
-            for chunk in chunk_text(doc["text"]):
+            for ordinal, chunk in enumerate(chunk_text(doc["text"])):
                 chunks.append(chunk)
                 meta = {
+                    "chunk_id": chunk_id(str(doc.get("path")), ordinal, chunk),
                     "type": source_type,
                     "owner": doc.get("owner"),
                     "repo": doc.get("repo"),
@@ -178,6 +510,84 @@ class KnowledgeMappingAgent:
                 metadata.append(meta)
         return chunks, metadata
 
+    def _index_chunks(
+        self,
+        index_key: str,
+        chunks: List[str],
+        metadata: List[Dict[str, Any]],
+        keep_paths: Optional[Set[str]] = None,
+        scope: Optional[Set[str]] = None,
+        retag: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ) -> Dict[str, int]:
+        """Embed and upsert only chunks whose id changed, deleting stale ones.
+
+        All changes are published as one index generation.
+
+        Chunks whose id is already indexed but whose metadata changed (e.g. the
+        commit they are tagged with) get their metadata rewritten in place.
+        Chunks of ``keep_paths`` (files that failed to fetch) are never deleted.
+        When ``scope`` is given, ``chunks`` only cover those paths; chunks of
+        other paths are kept, with their metadata passed through ``retag``.
+        """
+        stored = self.index_store.chunk_metadata(index_key)
+        existing = set(stored)
+        current = [meta["chunk_id"] for meta in metadata]
+        if not existing:
+            if chunks:
+                vectors = get_embedding_provider().embed(chunks)
+                self.index_store.build_index(
+                    index_key,
+                    vectors,
+                    metadata,
+                    chunks,
+                    tune=CONFIG.index_autotune,
+                    target_recall=CONFIG.index_target_recall,
+                    encoding=CONFIG.index_encoding,
+                    rerank=CONFIG.index_rerank,
+                    shards=CONFIG.index_shards,
+                    shard_by=CONFIG.index_shard_by,
+                )
+            return {"embedded_chunks": len(chunks), "deleted_chunks": 0, "retagged_chunks": 0}
+
+        fresh = [row for row, identifier in enumerate(current) if identifier not in existing]
+        vectors = get_embedding_provider().embed([chunks[row] for row in fresh]) if fresh else []
+        retagged = {
+            identifier: metadata[row]
+            for row, identifier in enumerate(current)
+            if identifier in existing and self._metadata_changed(stored[identifier], metadata[row])
+        }
+        stale = []
+        for identifier in existing - set(current):
+            path = identifier.rsplit(":", 2)[0]
+            if path in (keep_paths or set()):
+                continue
+            if scope is not None and path not in scope:
+                if retag is not None:
+                    tagged = retag(stored[identifier])
+                    if self._metadata_changed(stored[identifier], tagged):
+                        retagged[identifier] = tagged
+                continue
+            stale.append(identifier)
+        # One generation, so searches never see a file's old and new chunks side by side.
+        applied = self.index_store.apply(
+            index_key,
+            [current[row] for row in fresh],
+            vectors,
+            [metadata[row] for row in fresh],
+            [chunks[row] for row in fresh],
+            deleted=stale,
+            retagged=retagged,
+        )
+        return {
+            "embedded_chunks": len(fresh),
+            "deleted_chunks": applied["deleted"],
+            "retagged_chunks": applied["retagged"],
+        }
+
+    @staticmethod
+    def _metadata_changed(stored: Dict[str, Any], metadata: Dict[str, Any]) -> bool:
+        return any(stored.get(field) != value for field, value in metadata.items())
+
     def _status_path(self, index_key: str) -> Path:
         return Path(CONFIG.index_root) / index_key / "index_status.json"
 
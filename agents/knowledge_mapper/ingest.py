@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import hashlib
 import re
 from dataclasses import dataclass
 from typing import Iterable, List
@@ -47,6 +48,12 @@ def chunk_text(text: str, chunk_size: int = 700, overlap: int = 120) -> List[str
     return chunks
 
 
+def chunk_id(path: str, ordinal: int, text: str) -> str:
+    """Build a stable chunk id from its path, position, and content hash."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    return f"{path}:{ordinal}:{digest}"
+
+
 def filter_paths(paths: Iterable[str]) -> List[str]:
     """Filter repo paths for documentation and key code sources."""
     allowed = []
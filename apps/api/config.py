@@ -34,6 +34,38 @@ class AppConfig:
     confluence_base_url: str | None
     jira_token: str | None
     confluence_token: str | None
+    index_cache_max_bytes: int
+    index_autotune: bool
+    index_target_recall: float
+    index_encoding: str
+    index_rerank: bool
+    retrieval_mode: str
+    index_shards: int
+    index_shard_by: str
+    embedding_cache_path: str | None
+    embedding_warmup: bool
+    openai_base_url: str | None
+    openai_embedding_batch_tokens: int
+    openai_embedding_batch_size: int
+    openai_embedding_concurrency: int
+    openai_embedding_max_retries: int
+    query_cache_size: int
+    query_cache_path: str | None
+    embedding_workers: int
+    embedding_onnx_dir: str
+    embedding_onnx_threads: int
+    ingest_concurrency: int
+    github_api_url: str
+    repo_ingest_mode: str
+    http_cache_path: str | None
+    http_cache_max_age: float
+    http_cache_max_bytes: int
+    mcp_rate_limit_rps: float
+    mcp_rate_limit_burst: int
+    mcp_max_concurrency: int
+    mcp_rate_limit_reserve: int
+    mcp_max_retries: int
+    local_git_roots: str
 
 
 def _env_or_demo(key: str, default: str | None = None) -> str | None:
@@ -59,4 +91,42 @@ CONFIG = AppConfig(
     confluence_base_url=_env_or_demo("CONFLUENCE_BASE_URL"),
     jira_token=_env_or_demo("JIRA_TOKEN"),
     confluence_token=_env_or_demo("CONFLUENCE_TOKEN"),
+    index_cache_max_bytes=int(os.getenv("INDEX_CACHE_MAX_MB", "1024")) * 1024 * 1024,
+    index_autotune=os.getenv("INDEX_AUTOTUNE", "false").lower() == "true",
+    index_target_recall=float(os.getenv("INDEX_TARGET_RECALL", "0.95")),
+    index_encoding=os.getenv("INDEX_ENCODING", "float32").lower(),
+    index_rerank=os.getenv("INDEX_RERANK", "true").lower() == "true",
+    retrieval_mode=os.getenv("RETRIEVAL_MODE", "hybrid").lower(),
+    index_shards=int(os.getenv("INDEX_SHARDS", "1")),
+    index_shard_by=os.getenv("INDEX_SHARD_BY", "path").lower(),
+    embedding_cache_path=os.getenv(
+        "EMBEDDING_CACHE_PATH", str(Path(os.getenv("INDEX_ROOT", "indexes")) / "embeddings.sqlite")
+    )
+    or None,
+    embedding_warmup=os.getenv("EMBEDDING_WARMUP", "true").lower() == "true",
+    openai_base_url=os.getenv("OPENAI_BASE_URL") or None,
+    openai_embedding_batch_tokens=int(os.getenv("OPENAI_EMBEDDING_BATCH_TOKENS", "250000")),
+    openai_embedding_batch_size=int(os.getenv("OPENAI_EMBEDDING_BATCH_SIZE", "512")),
+    openai_embedding_concurrency=int(os.getenv("OPENAI_EMBEDDING_CONCURRENCY", "4")),
+    openai_embedding_max_retries=int(os.getenv("OPENAI_EMBEDDING_MAX_RETRIES", "5")),
+    query_cache_size=int(os.getenv("QUERY_CACHE_SIZE", "1024")),
+    query_cache_path=os.getenv("QUERY_CACHE_PATH") or None,
+    embedding_workers=int(os.getenv("EMBEDDING_WORKERS", "1")),
+    embedding_onnx_dir=os.getenv("EMBEDDING_ONNX_DIR", "models/onnx"),
+    embedding_onnx_threads=int(os.getenv("EMBEDDING_ONNX_THREADS", "0")),
+    ingest_concurrency=int(os.getenv("INGEST_CONCURRENCY", "8")),
+    github_api_url=os.getenv("GITHUB_API_URL", "https://api.github.com"),
+    repo_ingest_mode=os.getenv("REPO_INGEST_MODE", "tree").lower(),
+    http_cache_path=os.getenv(
+        "HTTP_CACHE_PATH", str(Path(os.getenv("INDEX_ROOT", "indexes")) / "http_cache.sqlite")
+    )
+    or None,
+    http_cache_max_age=float(os.getenv("HTTP_CACHE_MAX_AGE", "0")),
+    http_cache_max_bytes=int(os.getenv("HTTP_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    mcp_rate_limit_rps=float(os.getenv("MCP_RATE_LIMIT_RPS", "10")),
+    mcp_rate_limit_burst=int(os.getenv("MCP_RATE_LIMIT_BURST", "20")),
+    mcp_max_concurrency=int(os.getenv("MCP_MAX_CONCURRENCY", "8")),
+    mcp_rate_limit_reserve=int(os.getenv("MCP_RATE_LIMIT_RESERVE", "20")),
+    mcp_max_retries=int(os.getenv("MCP_MAX_RETRIES", "5")),
+    local_git_roots=os.getenv("LOCAL_GIT_ROOTS", ""),
 )
@@ -13,6 +13,7 @@ from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
 from agents.exploration.agent import ExplorationAgent
+from agents.exploration.embeddings import warm_up_embedding_provider
 from agents.knowledge_mapper.agent import KnowledgeMappingAgent
 from agents.learning_path.agent import ChecklistView, LearningPathAgent
 from agents.orchestrator.agent import OrchestratorAgent, SessionContext
@@ -45,6 +46,7 @@ from mcp.gateway.gateway import MCPGateway
 from mcp.github.server import GitHubMCPServer
 from mcp.gitlab.server import GitlabMCPServer
 from mcp.jira.server import JiraMCPServer
+from mcp.local_git.server import LocalGitMCPServer
 from memory.sessions.store import append_message
 from typing import Optional
 
@@ -66,11 +68,12 @@ mcp_gateway.register_server("gitlab", GitlabMCPServer())
 mcp_gateway.register_server("jira", JiraMCPServer())
 mcp_gateway.register_server("confluence", ConfluenceMCPServer())
 mcp_gateway.register_server("github", GitHubMCPServer())
+mcp_gateway.register_server("local_git", LocalGitMCPServer())
 
 # Agents
 knowledge_mapper = KnowledgeMappingAgent(mcp_gateway)
 learning_agent = LearningPathAgent()
-exploration_agent = ExplorationAgent(IndexStore(CONFIG.index_root))
+exploration_agent = ExplorationAgent(IndexStore(CONFIG.index_root, CONFIG.index_cache_max_bytes))
 
 GENERATED_DIR = Path("apps/api/generated")
 
@@ -84,6 +87,17 @@ def startup() -> None:
         seed_db(db)
     finally:
         db.close()
+    if CONFIG.embedding_warmup:
+        try:
+            report = warm_up_embedding_provider()
+            logger.info(
+                "Embedding model %s loaded in %.2fs (rss %.0f MB)",
+                report["model"],
+                report["load_seconds"],
+                report["rss_mb"],
+            )
+        except Exception:
+            logger.exception("Embedding warm-up failed; the model will load on first use")
 
 
 def _get_primary_session(db: Session) -> OnboardingSession:
@@ -205,6 +219,8 @@ def explore(request: ExploreRequest, http_request: Request, db: Session = Depend
         question=request.question,
         source_type=request.context.type,
         commit_id=request.context.commit_id,
+        path_prefix=request.context.path_prefix,
+        contexts=[context.model_dump() for context in request.contexts],
     )
     return ExploreResponse(**answer)
 
@@ -230,7 +246,7 @@ def list_github_repos(owner: Optional[str] = None, http_request: Request = None)
 
 @app.post("/api/index/reindex")
 def reindex_repo(payload: dict, http_request: Request) -> dict:
-    """Trigger indexing for repo/jira/confluence sources."""
+    """Trigger indexing for repo/local/jira/confluence sources."""
     rate_limiter.check(http_request)
     source_type = payload.get("type", "repo")
     if source_type == "repo":
@@ -239,6 +255,16 @@ def reindex_repo(payload: dict, http_request: Request) -> dict:
         if not owner or not repo:
             raise HTTPException(status_code=400, detail="owner and repo are required")
         return knowledge_mapper.ingest_repo(owner, repo)
+    if source_type == "local":
+        path = payload.get("path")
+        if not path:
+            raise HTTPException(status_code=400, detail="path is required")
+        try:
+            return knowledge_mapper.ingest_local(
+                path, owner=payload.get("owner"), repo=payload.get("repo"), ref=payload.get("ref")
+            )
+        except (ValueError, FileNotFoundError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
     if source_type == "jira":
         project_key = payload.get("project_key")
         if not project_key:
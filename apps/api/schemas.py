@@ -60,12 +60,18 @@ class ExploreContext(BaseModel):
     owner: str
     repo: str
     commit_id: Optional[str] = None
+    path_prefix: Optional[str] = Field(
+        None, description="Limit retrieval to paths under this prefix"
+    )
 
 
 class ExploreRequest(BaseModel):
     session_id: int
     context: ExploreContext
     question: str
+    contexts: List[ExploreContext] = Field(
+        default_factory=list, description="Additional sources searched together with context"
+    )
 
 
 class ExploreSource(BaseModel):
@@ -16,4 +16,34 @@ TOOL_SCHEMAS = [
         "description": "Fetch raw file content.",
         "input_schema": {"owner": "string", "repo": "string", "path": "string", "ref": "string"},
     },
+    {
+        "name": "get_repo_tree",
+        "description": "Resolve a ref to its commit and list every file in its tree.",
+        "input_schema": {"owner": "string", "repo": "string", "ref": "string"},
+    },
+    {
+        "name": "get_blob",
+        "description": "Fetch a file's content by blob sha.",
+        "input_schema": {"owner": "string", "repo": "string", "sha": "string"},
+    },
+    {
+        "name": "get_archive",
+        "description": "Stream a commit's tarball once and return the content of selected paths.",
+        "input_schema": {"owner": "string", "repo": "string", "commit": "string", "paths": "array"},
+    },
+    {
+        "name": "compare_commits",
+        "description": "List files added, modified, renamed or removed between two commits.",
+        "input_schema": {"owner": "string", "repo": "string", "base": "string", "head": "string"},
+    },
+    {
+        "name": "cache_stats",
+        "description": "Return conditional-request cache hit, 304 and miss counters.",
+        "input_schema": {},
+    },
+    {
+        "name": "rate_limit_stats",
+        "description": "Return the last known rate-limit quota and request parallelism per host.",
+        "input_schema": {},
+    },
 ]
@@ -0,0 +1,21 @@
+"""Declarative tool schemas for the local git MCP."""
+
+TOOL_SCHEMAS = [
+    {
+        "name": "get_repo_tree",
+        "description": (
+            "Resolve a ref of a local repository to its commit and list every file in its tree."
+        ),
+        "input_schema": {"path": "string", "ref": "string"},
+    },
+    {
+        "name": "compare_commits",
+        "description": "List files added, modified, renamed or removed between two local commits.",
+        "input_schema": {"path": "string", "base": "string", "head": "string"},
+    },
+    {
+        "name": "get_archive",
+        "description": "Read the content of selected paths at a commit in one pass.",
+        "input_schema": {"path": "string", "commit": "string", "paths": "array"},
+    },
+]
@@ -0,0 +1,355 @@
+"""ANN backend construction, selection, vector encodings, and recall/latency autotuning."""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+FLAT_MAX_ROWS = 5000
+DEFAULT_HNSW_PARAMS = {"M": 16, "ef_construction": 200, "ef": 50}
+HNSW_M_GRID = (8, 16, 32)
+HNSW_EF_GRID = (16, 32, 64, 128, 256)
+IVF_NLIST_FACTORS = (1, 4)
+IVF_NPROBE_GRID = (1, 2, 4, 8, 16, 32, 64)
+IVF_MIN_POINTS_PER_LIST = 39
+ENCODINGS = ("float32", "float16", "int8", "pq")
+RERANK_FACTOR = 4
+PQ_DEFAULT_PARAMS = {"nlist_factor": 1, "nprobe": 16}
+_SQ_CODECS = {"float16": "SQfp16", "int8": "SQ8"}
+
+
+def default_config(rows: int) -> Dict[str, Any]:
+    """Pick a backend without tuning: exact search for tiny corpora, HNSW otherwise."""
+    if faiss is not None and (rows <= FLAT_MAX_ROWS or hnswlib is None):
+        return {"backend": "faiss", "params": {}}
+    if hnswlib is not None:
+        return {"backend": "hnsw", "params": dict(DEFAULT_HNSW_PARAMS)}
+    raise RuntimeError("faiss-cpu is not installed")
+
+
+def with_encoding(config: Dict[str, Any], encoding: str) -> Dict[str, Any]:
+    """Return ``config`` storing vectors with ``encoding``.
+
+    ``float16`` and ``int8`` use faiss scalar quantizers under any backend; ``pq``
+    is only offered as IVF-PQ, since flat PQ indexes cannot take ID selectors.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown vector encoding: {encoding}")
+    if encoding != "float32" and faiss is None:
+        raise RuntimeError("faiss-cpu is required for compressed vector encodings")
+    config = {"backend": config["backend"], "params": dict(config["params"]), "encoding": encoding}
+    if encoding == "pq" and config["backend"] != "ivf":
+        config["backend"] = "ivf"
+        config["params"] = dict(PQ_DEFAULT_PARAMS)
+    return config
+
+
+def uses_hnswlib(config: Dict[str, Any]) -> bool:
+    """HNSW over raw float32 vectors is served by hnswlib; everything else by faiss."""
+    return config["backend"] == "hnsw" and config.get("encoding", "float32") == "float32"
+
+
+def build(config: Dict[str, Any], vectors: np.ndarray) -> Any:
+    """Build an index for normalized ``vectors`` with row ids as labels."""
+    backend, params = config["backend"], config["params"]
+    rows, dim = vectors.shape
+    if uses_hnswlib(config):
+        index = hnswlib.Index(space="cosine", dim=dim)
+        index.init_index(
+            max_elements=rows, ef_construction=params["ef_construction"], M=params["M"]
+        )
+        index.add_items(vectors, list(range(rows)))
+        index.set_ef(params["ef"])
+        return index
+    if faiss is None:
+        raise RuntimeError("faiss-cpu is not installed")
+    encoding = config.get("encoding", "float32")
+    if backend == "faiss" and encoding == "float32":
+        index = faiss.IndexFlatIP(dim)
+        index.add(vectors)
+        return index
+    if encoding == "float32":
+        codec = "Flat"
+    elif encoding in _SQ_CODECS:
+        codec = _SQ_CODECS[encoding]
+    else:
+        codec = f"PQ{pq_subquantizers(dim)}x{pq_bits(rows)}"
+    if backend == "hnsw":
+        factory = f"HNSW{params['M']},{codec}"
+    elif backend == "ivf":
+        params["nlist"] = ivf_nlist(rows, params.get("nlist_factor", 1))
+        if "nprobe_fraction" in params:
+            # Tuned on a sample: probe the same share of lists in the full corpus.
+            nprobe = math.ceil(params["nprobe_fraction"] * params["nlist"])
+            params["nprobe"] = min(params["nlist"], nprobe)
+        factory = f"IVF{params['nlist']},{codec}"
+    else:
+        factory = codec
+    index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+    if backend == "hnsw":
+        index.hnsw.efConstruction = params["ef_construction"]
+    index.train(vectors)
+    index.add(vectors)
+    configure(index, config)
+    return index
+
+
+def configure(index: Any, config: Dict[str, Any]) -> None:
+    """Apply query-time parameters after loading an index from disk."""
+    params = config.get("params", {})
+    if uses_hnswlib(config):
+        index.set_ef(params.get("ef", DEFAULT_HNSW_PARAMS["ef"]))
+    elif config["backend"] == "hnsw":
+        index.hnsw.efSearch = params.get("ef", DEFAULT_HNSW_PARAMS["ef"])
+    elif config["backend"] == "ivf":
+        index.nprobe = params.get("nprobe", 1)
+
+
+def search(
+    index: Any,
+    config: Dict[str, Any],
+    queries: np.ndarray,
+    k: int,
+    allowed: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(scores, labels)`` for normalized queries, restricted to ``allowed`` rows."""
+    if uses_hnswlib(config):
+        if allowed is None:
+            labels, distances = index.knn_query(queries, k=k)
+        else:
+            labels, distances = index.knn_query(
+                queries, k=k, num_threads=1, filter=lambda label: bool(allowed[label])
+            )
+        return 1 - distances, labels
+    if allowed is None:
+        return index.search(queries, k)
+    bitmap = np.packbits(allowed, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(allowed), faiss.swig_ptr(bitmap))
+    if config["backend"] == "ivf":
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    elif config["backend"] == "hnsw":
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(queries, k, params=params)
+
+
+def rerank(
+    vectors: np.ndarray, queries: np.ndarray, labels: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Rescore candidate labels exactly against stored float32 vectors."""
+    scores = np.full(labels.shape, -np.inf, dtype="float32")
+    for row, (query_vector, candidates) in enumerate(zip(queries, labels)):
+        valid = candidates >= 0
+        if valid.any():
+            scores[row, valid] = vectors[candidates[valid]] @ query_vector
+    order = np.argsort(-scores, axis=1)
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(labels, order, axis=1)
+
+
+def measure_recall(
+    index: Any,
+    config: Dict[str, Any],
+    vectors: np.ndarray,
+    k: int = 10,
+    query_count: int = 100,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Measure recall@k of ``index`` against exact search, with and without re-ranking."""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), size=min(len(vectors), query_count), replace=False)]
+    k = min(k, len(vectors))
+    truth = _exact_top_k(queries, vectors, k)
+    _, labels = search(index, config, queries, k)
+    _, candidates = search(index, config, queries, min(k * RERANK_FACTOR, len(vectors)))
+    _, reranked = rerank(vectors, queries, candidates)
+    return {
+        "k": k,
+        "query_count": len(queries),
+        "ann": round(_recall(labels, truth), 4),
+        "reranked": round(_recall(reranked[:, :k], truth), 4),
+    }
+
+
+def calibrate(
+    index: Any,
+    config: Dict[str, Any],
+    vectors: np.ndarray,
+    target_recall: float,
+    reranked: bool = False,
+) -> Dict[str, Any]:
+    """Measure recall of a built index, doubling IVF ``nprobe`` until it meets ``target_recall``.
+
+    ``reranked`` judges the re-ranked recall, as served for compressed encodings.
+    Updates ``config["params"]`` in place and returns the last measurement.
+    """
+    metric = "reranked" if reranked else "ann"
+    recall = measure_recall(index, config, vectors)
+    params = config["params"]
+    while config["backend"] == "ivf" and recall[metric] < target_recall:
+        if params["nprobe"] >= params["nlist"]:
+            break
+        params["nprobe"] = min(params["nprobe"] * 2, params["nlist"])
+        if "nprobe_fraction" in params:
+            params["nprobe_fraction"] = params["nprobe"] / params["nlist"]
+        configure(index, config)
+        recall = measure_recall(index, config, vectors)
+    return recall
+
+
+def pq_subquantizers(dim: int) -> int:
+    """Largest divisor of ``dim`` giving at most one byte per four dimensions (~16x)."""
+    for count in range(max(1, dim // 4), 0, -1):
+        if dim % count == 0:
+            return count
+    return 1
+
+
+def pq_bits(rows: int) -> int:
+    return max(4, min(8, int(math.log2(max(rows // IVF_MIN_POINTS_PER_LIST, 1)))))
+
+
+def ivf_nlist(rows: int, factor: float) -> int:
+    return max(1, min(int(factor * math.sqrt(rows)), rows // IVF_MIN_POINTS_PER_LIST))
+
+
+def autotune(
+    vectors: np.ndarray,
+    k: int = 10,
+    target_recall: float = 0.95,
+    sample_size: int = 20000,
+    query_count: int = 200,
+    seed: int = 0,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Sweep ANN configurations on a sample and return the cheapest meeting ``target_recall``.
+
+    IVF ``nprobe`` is also kept as a fraction of ``nlist`` so that :func:`build`
+    probes the same share of lists in the full corpus; :func:`calibrate` then checks
+    the target on the built index.
+
+    Ground truth is an exact inner-product search over the sample. Latency is the
+    mean per-query time, scaled to the full corpus size for flat (linear) and IVF
+    (square-root) scans; HNSW latency is taken as measured.
+    """
+    rows = len(vectors)
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(rows, size=min(rows, sample_size), replace=False)]
+    queries = sample[rng.choice(len(sample), size=min(len(sample), query_count), replace=False)]
+    k = min(k, len(sample))
+    truth = np.argsort(-(queries @ sample.T), axis=1)[:, :k]
+    scale = rows / len(sample)
+
+    candidates: List[Dict[str, Any]] = []
+    if faiss is not None:
+        candidates.append({"backend": "faiss", "params": {}, "_scale": scale})
+    if hnswlib is not None and len(sample) > FLAT_MAX_ROWS // 10:
+        for m in HNSW_M_GRID:
+            for ef in HNSW_EF_GRID:
+                if ef < k:
+                    continue
+                params = {"M": m, "ef_construction": 200, "ef": ef}
+                candidates.append({"backend": "hnsw", "params": params, "_scale": 1.0})
+    if faiss is not None and len(sample) >= IVF_MIN_POINTS_PER_LIST * 4:
+        for factor in IVF_NLIST_FACTORS:
+            nlist = ivf_nlist(len(sample), factor)
+            for nprobe in IVF_NPROBE_GRID:
+                if nprobe > nlist:
+                    continue
+                params = {
+                    "nlist_factor": factor,
+                    "nlist": nlist,
+                    "nprobe": nprobe,
+                    "nprobe_fraction": nprobe / nlist,
+                }
+                candidates.append({"backend": "ivf", "params": params, "_scale": math.sqrt(scale)})
+
+    trials: List[Dict[str, Any]] = []
+    built: Dict[Tuple[Any, ...], Any] = {}
+    for candidate in candidates:
+        config = {"backend": candidate["backend"], "params": dict(candidate["params"])}
+        build_key = _build_key(config)
+        index = built.get(build_key)
+        if index is None:
+            index = build(config, sample)
+            built[build_key] = index
+        configure(index, config)
+        started = time.perf_counter()
+        _, labels = search(index, config, queries, k)
+        latency_ms = (time.perf_counter() - started) * 1000 / len(queries) * candidate["_scale"]
+        recall = _recall(labels, truth)
+        trials.append({**config, "recall": round(recall, 4), "latency_ms": round(latency_ms, 4)})
+
+    passing = [trial for trial in trials if trial["recall"] >= target_recall]
+    best = min(passing, key=lambda trial: trial["latency_ms"]) if passing else None
+    if best is None:
+        chosen = {"backend": "faiss", "params": {}} if faiss is not None else default_config(rows)
+    else:
+        chosen = {"backend": best["backend"], "params": dict(best["params"])}
+    report = {
+        "target_recall": target_recall,
+        "k": k,
+        "sample_size": len(sample),
+        "query_count": len(queries),
+        "selected": best,
+        "trials": trials,
+    }
+    return chosen, report
+
+
+def _build_key(config: Dict[str, Any]) -> Tuple[Any, ...]:
+    params = config["params"]
+    if config["backend"] == "hnsw":
+        return ("hnsw", params["M"], params["ef_construction"])
+    if config["backend"] == "ivf":
+        return ("ivf", params["nlist_factor"])
+    return ("faiss",)
+
+
+def _exact_top_k(queries: np.ndarray, vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _recall(labels: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(
+        len(set(found.tolist()) & set(expected.tolist())) for found, expected in zip(labels, truth)
+    )
+    return hits / truth.size if truth.size else 1.0
+
+
+def stored_vectors(index: Any, config: Dict[str, Any], rows: List[int]) -> np.ndarray:
+    """Read back the normalized (possibly lossy-decoded) vectors stored for ``rows``."""
+    if uses_hnswlib(config):
+        return np.asarray(index.get_items(rows), dtype="float32")
+    if config["backend"] == "ivf":
+        faiss.extract_index_ivf(index).make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)[rows]
+
+
+def as_manifest(
+    config: Dict[str, Any], dim: int, tuning: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    manifest = {
+        "backend": config["backend"],
+        "dim": dim,
+        "params": config.get("params", {}),
+        "encoding": config.get("encoding", "float32"),
+    }
+    if tuning is not None:
+        manifest["tuning"] = tuning
+    return manifest
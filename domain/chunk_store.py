@@ -0,0 +1,336 @@
+"""Memory-mapped binary storage for chunk texts and metadata."""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+TEXT_FILE = "chunks.bin"
+OFFSETS_FILE = "chunks.offsets.npy"
+CODES_FILE = "metadata.codes.npy"
+DICTIONARY_FILE = "metadata.dict.json"
+RAW_FILE = "metadata.raw.bin"
+RAW_OFFSETS_FILE = "metadata.raw.offsets.npy"
+MISSING = -1
+# Repeated across many chunks, so dictionary-encoded; any other field (chunk_id,
+# path, url, ...) is close to unique per chunk and stored like the texts.
+DICTIONARY_FIELDS = ("type", "source_type", "owner", "repo", "commit")
+
+# numpy parses .npy headers with ``ast.literal_eval``, which CPython 3.11 can fail
+# with "AST constructor recursion depth mismatch" when several threads run it at
+# once. Every read of a .npy header, .npz members included, holds this lock.
+NPY_LOCK = threading.Lock()
+
+
+class RowView(Sequence):
+    """Read-only sequence that materializes rows on access."""
+
+    def __init__(self, length: int, getter: Callable[[int], Any]) -> None:
+        self._length = length
+        self._getter = getter
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, row: Any) -> Any:
+        if isinstance(row, slice):
+            return [self._getter(idx) for idx in range(*row.indices(self._length))]
+        row = int(row)
+        if row < 0:
+            row += self._length
+        if row < 0 or row >= self._length:
+            raise IndexError("row out of range")
+        return self._getter(row)
+
+
+class ChunkStore:
+    """Offsets table plus UTF-8 text blob, with columnar metadata.
+
+    Low-cardinality fields (``DICTIONARY_FIELDS``) are dictionary-encoded; the
+    others are JSON cells in a second blob addressed by an offsets table, row-major.
+    Texts, codes and cells are memory-mapped, so a lookup only touches the pages
+    for the requested rows and the OS page cache is shared across worker processes.
+    Stores written before the cell blob existed dictionary-encode every field.
+    """
+
+    FILES = (TEXT_FILE, OFFSETS_FILE, CODES_FILE, DICTIONARY_FILE, RAW_FILE, RAW_OFFSETS_FILE)
+    REQUIRED_FILES = FILES[:4]
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.offsets = load_npy(self.directory / OFFSETS_FILE, mmap_mode="r")
+        self.codes = load_npy(self.directory / CODES_FILE, mmap_mode="r")
+        dictionary = json.loads((self.directory / DICTIONARY_FILE).read_text())
+        self.fields: List[str] = dictionary["fields"]
+        self.values: List[List[Any]] = dictionary["values"]
+        self.raw_fields: List[str] = dictionary.get("raw_fields", [])
+        self.resident_bytes = (self.directory / DICTIONARY_FILE).stat().st_size
+        self._blob = _map(self.directory / TEXT_FILE)
+        self.raw_offsets: np.ndarray = np.zeros(1, dtype="uint64")
+        self._raw: mmap.mmap | bytes = b""
+        if self.raw_fields:
+            self.raw_offsets = load_npy(self.directory / RAW_OFFSETS_FILE, mmap_mode="r")
+            self._raw = _map(self.directory / RAW_FILE)
+        self.texts = RowView(len(self), self.text_at)
+        self.metadata = RowView(len(self), self.metadata_at)
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        return all((Path(directory) / name).exists() for name in cls.REQUIRED_FILES)
+
+    def __len__(self) -> int:
+        return max(len(self.offsets) - 1, 0)
+
+    def text_at(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def metadata_at(self, row: int) -> Dict[str, Any]:
+        meta = {
+            field: self.values[col][int(code)]
+            for col, (field, code) in enumerate(zip(self.fields, self.codes[row]))
+            if code != MISSING
+        }
+        for field, cell in zip(self.raw_fields, self._raw_row(row)):
+            if cell:
+                meta[field] = json.loads(cell)
+        return meta
+
+    def column(self, field: str, start: int = 0) -> tuple[np.ndarray, List[Any]]:
+        """Return the codes of rows ``start:`` and the dictionary for a metadata field.
+
+        Cell-stored fields are factorized on the fly from those rows' cells.
+        """
+        if field in self.fields:
+            col = self.fields.index(field)
+            return self.codes[start:, col], self.values[col]
+        rows = max(len(self) - start, 0)
+        if field not in self.raw_fields:
+            return np.full(rows, MISSING, dtype="int32"), []
+        width, col = len(self.raw_fields), self.raw_fields.index(field)
+        cells = self.raw_offsets[start * width :]
+        starts = cells[col:-1:width].astype("int64")
+        ends = cells[col + 1 :: width].astype("int64")
+        base = int(cells[0])
+        blob = bytes(self._raw[base : int(cells[-1])])
+        codes = np.full(rows, MISSING, dtype="int32")
+        lookup: Dict[bytes, int] = {}
+        for row, (begin, end) in enumerate(zip((starts - base).tolist(), (ends - base).tolist())):
+            if end > begin:
+                codes[row] = lookup.setdefault(blob[begin:end], len(lookup))
+        return codes, [json.loads(cell) for cell in lookup]
+
+    def _raw_row(self, row: int) -> List[bytes]:
+        width = len(self.raw_fields)
+        if not width:
+            return []
+        bounds = self.raw_offsets[row * width : (row + 1) * width + 1]
+        start = int(bounds[0])
+        chunk = bytes(self._raw[start : int(bounds[-1])])
+        ends = [int(bound) - start for bound in bounds]
+        return [chunk[ends[col] : ends[col + 1]] for col in range(width)]
+
+    def _raw_rows(self, raw_fields: List[str]) -> List[List[bytes]]:
+        """Every row's cells laid out for ``raw_fields``, a superset of this store's."""
+        if raw_fields == self.raw_fields:
+            return [self._raw_row(row) for row in range(len(self))]
+        cols = [
+            self.raw_fields.index(field) if field in self.raw_fields else None
+            for field in raw_fields
+        ]
+        rows = []
+        for row in range(len(self)):
+            cells = self._raw_row(row)
+            rows.append([cells[col] if col is not None else b"" for col in cols])
+        return rows
+
+    @staticmethod
+    def write(directory: Path, texts: Iterable[str], metadata: List[Dict[str, Any]]) -> None:
+        """Write texts and metadata, replacing each file atomically."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_files(directory, None, texts, metadata)
+
+    @classmethod
+    def append(cls, directory: Path, texts: Iterable[str], metadata: List[Dict[str, Any]]) -> None:
+        """Append rows after the existing ones, extending the field dictionaries."""
+        directory = Path(directory)
+        _write_files(directory, cls(directory), texts, metadata)
+
+    @classmethod
+    def update(cls, directory: Path, rows: List[int], metadata: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of ``rows``; texts and offsets are left untouched."""
+        directory = Path(directory)
+        store = cls(directory)
+        fields = list(store.fields)
+        values = [list(column) for column in store.values]
+        raw_fields = list(store.raw_fields)
+        _add_fields(fields, values, raw_fields, metadata)
+        codes = np.full((len(store), len(fields)), MISSING, dtype="int32")
+        codes[:, : len(store.fields)] = store.codes
+        codes[np.asarray(rows, dtype="int64")] = _encode(fields, values, metadata)
+        cells = store._raw_rows(raw_fields)
+        for row, meta in zip(rows, metadata):
+            cells[row] = _cells(raw_fields, meta)
+        _write_columns(directory, codes, fields, values, raw_fields)
+        _write_raw(directory, None, raw_fields, cells)
+
+
+def _map(path: Path) -> mmap.mmap | bytes:
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size:
+            return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return b""
+
+
+def _write_files(
+    directory: Path,
+    base: Optional[ChunkStore],
+    texts: Iterable[str],
+    metadata: List[Dict[str, Any]],
+) -> None:
+    base_offsets = np.zeros(1, dtype="uint64") if base is None else np.asarray(base.offsets)
+    offsets = [int(base_offsets[-1])]
+    with atomic_path(directory / TEXT_FILE) as tmp_path, open(tmp_path, "wb") as handle:
+        if base is not None:
+            with open(directory / TEXT_FILE, "rb") as source:
+                shutil.copyfileobj(source, handle)
+        for text in texts:
+            encoded = text.encode("utf-8")
+            handle.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+
+    fields = [] if base is None else list(base.fields)
+    values: List[List[Any]] = [] if base is None else [list(column) for column in base.values]
+    raw_fields = [] if base is None else list(base.raw_fields)
+    _add_fields(fields, values, raw_fields, metadata)
+    codes = _encode(fields, values, metadata)
+    if base is not None:
+        padded = np.full((len(base), len(fields)), MISSING, dtype="int32")
+        padded[:, : len(base.fields)] = base.codes
+        codes = np.concatenate([padded, codes])
+
+    all_offsets = np.concatenate([base_offsets[:-1], np.asarray(offsets, dtype="uint64")])
+    with atomic_path(directory / OFFSETS_FILE) as tmp_path, open(tmp_path, "wb") as handle:
+        np.save(handle, all_offsets.astype("uint64"))
+    _write_columns(directory, codes, fields, values, raw_fields)
+    cells = [_cells(raw_fields, meta) for meta in metadata]
+    if base is not None and raw_fields != base.raw_fields:
+        # A new cell field changes the row layout, so existing rows are rewritten.
+        cells = base._raw_rows(raw_fields) + cells
+        base = None
+    _write_raw(directory, base, raw_fields, cells)
+
+
+def _add_fields(
+    fields: List[str],
+    values: List[List[Any]],
+    raw_fields: List[str],
+    metadata: List[Dict[str, Any]],
+) -> None:
+    """Register fields first seen in ``metadata`` as dictionary-encoded or cell-stored."""
+    for meta in metadata:
+        for field in meta:
+            if field in fields or field in raw_fields:
+                continue
+            if field in DICTIONARY_FIELDS:
+                fields.append(field)
+                values.append([])
+            else:
+                raw_fields.append(field)
+
+
+def _encode(
+    fields: List[str], values: List[List[Any]], metadata: List[Dict[str, Any]]
+) -> np.ndarray:
+    """Dictionary-encode ``fields`` of ``metadata``, extending ``values`` in place."""
+    lookups = [
+        {json.dumps(value, sort_keys=True): code for code, value in enumerate(column)}
+        for column in values
+    ]
+    codes = np.full((len(metadata), len(fields)), MISSING, dtype="int32")
+    for row, meta in enumerate(metadata):
+        for col, field in enumerate(fields):
+            if field not in meta:
+                continue
+            value = meta[field]
+            token = json.dumps(value, sort_keys=True)
+            code = lookups[col].get(token)
+            if code is None:
+                code = len(values[col])
+                lookups[col][token] = code
+                values[col].append(value)
+            codes[row, col] = code
+    return codes
+
+
+def _cells(raw_fields: List[str], meta: Dict[str, Any]) -> List[bytes]:
+    """JSON cells of ``meta`` for ``raw_fields``; an empty cell marks a missing field."""
+    return [
+        json.dumps(meta[field], sort_keys=True).encode("utf-8") if field in meta else b""
+        for field in raw_fields
+    ]
+
+
+def _write_columns(
+    directory: Path,
+    codes: np.ndarray,
+    fields: List[str],
+    values: List[List[Any]],
+    raw_fields: List[str],
+) -> None:
+    with atomic_path(directory / CODES_FILE) as tmp_path, open(tmp_path, "wb") as handle:
+        np.save(handle, codes)
+    with atomic_path(directory / DICTIONARY_FILE) as tmp_path:
+        dictionary = {"fields": fields, "values": values, "raw_fields": raw_fields}
+        tmp_path.write_text(json.dumps(dictionary))
+
+
+def _write_raw(
+    directory: Path, base: Optional[ChunkStore], raw_fields: List[str], rows: List[List[bytes]]
+) -> None:
+    """Write cell rows after those of ``base`` (same layout), or on their own without one."""
+    base_offsets = np.zeros(1, dtype="uint64")
+    if base is not None and base.raw_fields:
+        base_offsets = np.asarray(base.raw_offsets)
+    offsets = [int(base_offsets[-1])]
+    with atomic_path(directory / RAW_FILE) as tmp_path, open(tmp_path, "wb") as handle:
+        if base is not None and base.raw_fields:
+            with open(directory / RAW_FILE, "rb") as source:
+                shutil.copyfileobj(source, handle)
+        for cells in rows:
+            for cell in cells:
+                handle.write(cell)
+                offsets.append(offsets[-1] + len(cell))
+    all_offsets = np.concatenate([base_offsets[:-1], np.asarray(offsets, dtype="uint64")])
+    with atomic_path(directory / RAW_OFFSETS_FILE) as tmp_path, open(tmp_path, "wb") as handle:
+        np.save(handle, all_offsets.astype("uint64"))
+
+
+def load_npy(path: Path, mmap_mode: Optional[str] = None) -> np.ndarray:
+    """``np.load`` a single ``.npy`` file while holding :data:`NPY_LOCK`."""
+    with NPY_LOCK:
+        return np.load(path, mmap_mode=mmap_mode)
+
+
+@contextmanager
+def atomic_path(target: Path) -> Iterator[Path]:
+    """Yield a temporary sibling path and rename it over ``target`` on success.
+
+    Replacing rather than truncating keeps existing memory maps of the old file valid.
+    """
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    try:
+        yield tmp_path
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, target)
@@ -0,0 +1,201 @@
+"""Precomputed metadata postings for filtered vector search."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from domain.chunk_store import NPY_LOCK, ChunkStore, atomic_path
+
+FILTERS_FILE = "filters.postings.npz"
+# Full-width bitmaps written by earlier versions; superseded and no longer read.
+LEGACY_FILTERS_FILE = "filters.npz"
+FILTER_FIELDS = ("type", "commit", "path")
+FILTER_FAMILIES = (*FILTER_FIELDS, "dir")
+
+# (key names, offsets, rows): the rows of key ``i`` are ``rows[offsets[i]:offsets[i + 1]]``.
+Postings = Tuple[List[str], np.ndarray, np.ndarray]
+
+
+@dataclass(frozen=True)
+class MetadataFilter:
+    """Metadata predicate applied inside the vector search."""
+
+    commit: Optional[str] = None
+    path_prefix: Optional[str] = None
+    source_type: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return not (self.commit or self.path_prefix or self.source_type)
+
+
+class FilterIndex:
+    """Inverted index from metadata values to sorted row ids.
+
+    Families are ``type``, ``commit``, ``path`` (one key per file) and ``dir``
+    (one key per directory prefix, ending in ``/``). Each is stored CSR-style, so
+    the file grows with rows times directory depth rather than with rows times
+    distinct values, and appending rows never touches keys they do not carry.
+    """
+
+    def __init__(self, directory: Path, rows: int) -> None:
+        self.rows = rows
+        self._archive = np.load(Path(directory) / FILTERS_FILE)
+        self._families: Dict[str, tuple[Dict[str, int], np.ndarray, np.ndarray]] = {}
+        self._masks: Dict[tuple[str, str], np.ndarray] = {}
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (Path(directory) / FILTERS_FILE).exists()
+
+    def mask(self, where: MetadataFilter) -> np.ndarray:
+        """Return a boolean row mask for the rows matching ``where``."""
+        mask = np.ones(self.rows, dtype=bool)
+        if where.source_type:
+            mask &= self._key_mask("type", where.source_type)
+        if where.commit:
+            mask &= self._key_mask("commit", where.commit)
+        if where.path_prefix:
+            prefix = where.path_prefix.lstrip("/")
+            lookup, offsets, rows = self._family("dir")
+            if prefix in lookup:
+                mask &= self._key_mask("dir", prefix)
+            else:
+                lookup, offsets, rows = self._family("path")
+                matched = np.zeros(self.rows, dtype=bool)
+                for path, key in lookup.items():
+                    if path.startswith(prefix):
+                        matched[rows[offsets[key] : offsets[key + 1]]] = True
+                mask &= matched
+        return mask
+
+    def _key_mask(self, family: str, value: str) -> np.ndarray:
+        cached = self._masks.get((family, value))
+        if cached is not None:
+            return cached
+        lookup, offsets, rows = self._family(family)
+        mask = np.zeros(self.rows, dtype=bool)
+        key = lookup.get(value)
+        if key is not None:
+            mask[rows[offsets[key] : offsets[key + 1]]] = True
+        self._masks[(family, value)] = mask
+        return mask
+
+    def _family(self, family: str) -> tuple[Dict[str, int], np.ndarray, np.ndarray]:
+        loaded = self._families.get(family)
+        if loaded is None:
+            with NPY_LOCK:
+                names, offsets, rows = _read_family(self._archive, family)
+            loaded = ({name: key for key, name in enumerate(names)}, offsets, rows)
+            self._families[family] = loaded
+        return loaded
+
+    @staticmethod
+    def write(directory: Path, chunks: ChunkStore) -> None:
+        """Build postings from the dictionary-encoded columns of ``chunks``."""
+        families = {family: _empty() for family in FILTER_FAMILIES}
+        _write(Path(directory), _extend(families, chunks, 0))
+
+    @classmethod
+    def append(cls, directory: Path, chunks: ChunkStore, start: int) -> None:
+        """Add postings for rows ``start`` onwards of ``chunks``, keeping existing ones.
+
+        Falls back to a full build when the index is missing.
+        """
+        directory = Path(directory)
+        if not cls.exists(directory):
+            cls.write(directory, chunks)
+            return
+        with NPY_LOCK, np.load(directory / FILTERS_FILE) as archive:
+            families = {family: _read_family(archive, family) for family in FILTER_FAMILIES}
+        _write(directory, _extend(families, chunks, start))
+
+
+def _extend(families: Dict[str, Postings], chunks: ChunkStore, start: int) -> Dict[str, Postings]:
+    """Merge postings of rows ``start:`` into ``families`` in one pass per column."""
+    merged: Dict[str, Postings] = {}
+    path_rows: Dict[str, np.ndarray] = {}
+    for field in FILTER_FIELDS:
+        codes, values = chunks.column(field, start)
+        codes = np.asarray(codes, dtype="int64")
+        names = [value if field == "path" else str(value) for value in values]
+        # The trailing False is what MISSING (-1) codes index into.
+        valid = np.array(
+            [
+                value is not None and (field != "path" or isinstance(value, str))
+                for value in values
+            ]
+            + [False],
+            dtype=bool,
+        )
+        rows = np.flatnonzero(valid[codes])
+        order = np.argsort(codes[rows], kind="stable")
+        rows, row_codes = rows[order] + start, codes[rows[order]]
+        present, firsts = np.unique(row_codes, return_index=True)
+        bounds = np.append(firsts, len(rows))
+        groups = {names[code]: rows[bounds[i] : bounds[i + 1]] for i, code in enumerate(present)}
+        if field == "path":
+            path_rows = groups
+        merged[field] = _merge(families[field], groups)
+
+    directories: Dict[str, List[np.ndarray]] = {}
+    for path, rows in path_rows.items():
+        parts = path.split("/")[:-1]
+        for depth in range(1, len(parts) + 1):
+            directories.setdefault("/".join(parts[:depth]) + "/", []).append(rows)
+    merged["dir"] = _merge(
+        families["dir"],
+        {prefix: np.sort(np.concatenate(groups)) for prefix, groups in directories.items()},
+    )
+    return merged
+
+
+def _merge(existing: Postings, groups: Dict[str, np.ndarray]) -> Postings:
+    """Append ``groups`` (rows above every existing row) to the postings of ``existing``."""
+    names, offsets, rows = existing
+    if not groups:
+        return existing
+    names = list(names)
+    lookup = {name: key for key, name in enumerate(names)}
+    for name in groups:
+        if name not in lookup:
+            lookup[name] = len(names)
+            names.append(name)
+    old_keys = np.repeat(np.arange(len(offsets) - 1, dtype="int64"), np.diff(offsets))
+    new_keys = np.concatenate(
+        [np.full(len(group), lookup[name], dtype="int64") for name, group in groups.items()]
+    )
+    new_rows = np.concatenate(list(groups.values()))
+    keys = np.concatenate([old_keys, new_keys])
+    all_rows = np.concatenate([rows.astype("int64"), new_rows.astype("int64")])
+    # Stable by key keeps each key's existing rows first, and appended rows are all larger.
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(len(names) + 1, dtype="int64")
+    np.cumsum(np.bincount(keys, minlength=len(names)), out=offsets[1:])
+    return names, offsets, all_rows[order]
+
+
+def _empty() -> Postings:
+    return [], np.zeros(1, dtype="int64"), np.zeros(0, dtype="int64")
+
+
+def _read_family(archive: np.lib.npyio.NpzFile, family: str) -> Postings:
+    if f"{family}.offsets" not in archive.files:
+        return _empty()
+    blob = archive[f"{family}.names"].tobytes().decode("utf-8")
+    offsets = archive[f"{family}.offsets"].astype("int64")
+    names = blob.split("\0") if len(offsets) > 1 else []
+    return names, offsets, archive[f"{family}.rows"].astype("int64")
+
+
+def _write(directory: Path, families: Dict[str, Postings]) -> None:
+    arrays: Dict[str, np.ndarray] = {}
+    for family, (names, offsets, rows) in families.items():
+        arrays[f"{family}.names"] = np.frombuffer("\0".join(names).encode("utf-8"), dtype="uint8")
+        arrays[f"{family}.offsets"] = np.asarray(offsets, dtype="int64")
+        arrays[f"{family}.rows"] = np.asarray(rows, dtype="uint32")
+    with atomic_path(directory / FILTERS_FILE) as tmp_path, open(tmp_path, "wb") as handle:
+        np.savez(handle, **arrays)
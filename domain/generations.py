@@ -0,0 +1,235 @@
+"""Immutable index generations published through an atomic ``CURRENT`` pointer.
+
+Every write produces a new directory under ``<index>/generations/``. Readers
+resolve ``CURRENT`` once and lease the generation they loaded; writers only
+delete generations that are neither current nor leased, so a search never sees
+a half-written index and never waits for a rebuild.
+
+Leases only cover the current process. Writers of one index are serialized
+across processes by :func:`writer_lock`, and a superseded generation is kept
+for ``SWEEP_GRACE_SECONDS`` so readers in other workers that resolved it just
+before a publish can still open it.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from domain.chunk_store import atomic_path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CURRENT_FILE = "CURRENT"
+GENERATIONS_DIR = "generations"
+LOCK_FILE = ".write.lock"
+SWEEP_GRACE_SECONDS = 60.0
+
+_LEASES: Dict[Path, int] = {}
+_RETIRED: Dict[Path, tuple[str, ...]] = {}
+_WRITERS: Dict[Path, "WriterLock"] = {}
+_LOCK = threading.Lock()
+
+
+class WriterLock:
+    """Re-entrant writer lock for one index, held across threads and processes.
+
+    Threads of this process queue on an ``RLock``; the outermost holder also
+    takes an exclusive ``flock`` on ``<index>/.write.lock`` so writers in other
+    processes (e.g. other uvicorn workers) wait as well.
+    """
+
+    def __init__(self, index_dir: Path) -> None:
+        self.index_dir = index_dir
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle: Any = None
+
+    def __enter__(self) -> "WriterLock":
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self.index_dir.mkdir(parents=True, exist_ok=True)
+                handle = open(self.index_dir / LOCK_FILE, "a+")
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._handle = handle
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            handle, self._handle = self._handle, None
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            handle.close()
+        self._thread_lock.release()
+
+
+def writer_lock(index_dir: Path) -> WriterLock:
+    """Return the lock serializing writers of ``index_dir``."""
+    key = index_dir.resolve()
+    with _LOCK:
+        return _WRITERS.setdefault(key, WriterLock(key))
+
+
+def current(index_dir: Path) -> Path:
+    """Return the directory holding the live files (the index dir itself for the flat layout)."""
+    try:
+        name = (index_dir / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return index_dir
+    return index_dir / GENERATIONS_DIR / name
+
+
+def create(index_dir: Path, base: Optional[Path] = None, names: Iterable[str] = ()) -> Path:
+    """Create an unpublished generation, optionally seeded with ``names`` from ``base``.
+
+    Seed files are hard-linked when possible. Every writer replaces files through
+    :func:`domain.chunk_store.atomic_path`, so the shared inodes are never modified.
+    """
+    name = f"gen-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    gen_dir = index_dir / GENERATIONS_DIR / name
+    gen_dir.mkdir(parents=True)
+    if base is not None:
+        for file_name in names:
+            source = base / file_name
+            if not source.is_file():
+                continue
+            try:
+                os.link(source, gen_dir / file_name)
+            except OSError:
+                shutil.copy2(source, gen_dir / file_name)
+    return gen_dir
+
+
+def publish(index_dir: Path, gen_dir: Path) -> Optional[Path]:
+    """Flush ``gen_dir`` to disk and point ``CURRENT`` at it; return the previous generation."""
+    for path in gen_dir.iterdir():
+        _fsync(path)
+    _fsync(gen_dir)
+    previous = current(index_dir) if (index_dir / CURRENT_FILE).exists() else None
+    with atomic_path(index_dir / CURRENT_FILE) as tmp_path:
+        with open(tmp_path, "w") as handle:
+            handle.write(gen_dir.name)
+            handle.flush()
+            os.fsync(handle.fileno())
+    _fsync(index_dir)
+    if previous is not None and previous != gen_dir:
+        # Start the sweep grace period from the moment it stopped being current.
+        try:
+            os.utime(previous)
+        except FileNotFoundError:
+            pass
+    return previous
+
+
+def unpublish(index_dir: Path) -> None:
+    """Remove the ``CURRENT`` pointer so the index reads as missing."""
+    (index_dir / CURRENT_FILE).unlink(missing_ok=True)
+
+
+def retire(path: Path, legacy_names: tuple[str, ...] = ()) -> None:
+    """Delete a superseded generation once no reader holds it.
+
+    ``legacy_names`` lists the files to remove when ``path`` is a flat-layout
+    index directory rather than a generation directory.
+    """
+    with _LOCK:
+        if _LEASES.get(path, 0):
+            _RETIRED[path] = legacy_names
+            return
+        detached = _detach(path, legacy_names)
+    _remove(detached)
+
+
+def sweep(index_dir: Path, legacy_names: tuple[str, ...] = ()) -> None:
+    """Retire every generation except the current one, including crashed builds.
+
+    Generations modified within ``SWEEP_GRACE_SECONDS`` are left for a later
+    sweep: they were current moments ago or are still being written.
+    """
+    live = current(index_dir)
+    if live != index_dir and any((index_dir / name).exists() for name in legacy_names):
+        retire(index_dir, legacy_names)
+    root = index_dir / GENERATIONS_DIR
+    if root.exists():
+        for gen_dir in root.iterdir():
+            if gen_dir.name.startswith(".trash-"):
+                _remove(gen_dir)
+            elif gen_dir != live and _idle_seconds(gen_dir) >= SWEEP_GRACE_SECONDS:
+                retire(gen_dir)
+
+
+@contextmanager
+def lease(path: Path) -> Iterator[bool]:
+    """Hold ``path`` for reading; yields False if it was already removed."""
+    with _LOCK:
+        _LEASES[path] = _LEASES.get(path, 0) + 1
+        if path.parent.name == GENERATIONS_DIR:
+            alive = path.exists()
+        else:
+            alive = path in _RETIRED or not (path / CURRENT_FILE).exists()
+    detached = None
+    try:
+        yield alive
+    finally:
+        with _LOCK:
+            _LEASES[path] -= 1
+            if not _LEASES[path]:
+                del _LEASES[path]
+                if path in _RETIRED:
+                    detached = _detach(path, _RETIRED.pop(path))
+        _remove(detached)
+
+
+def _detach(path: Path, legacy_names: tuple[str, ...]) -> Optional[Path]:
+    """Make ``path`` invisible to new leases; the slow delete happens outside the lock."""
+    if path.parent.name == GENERATIONS_DIR:
+        trash = path.with_name(f".trash-{path.name}")
+        try:
+            path.rename(trash)
+        except FileNotFoundError:
+            return None
+        return trash
+    for name in legacy_names:
+        (path / name).unlink(missing_ok=True)
+    return None
+
+
+def _idle_seconds(path: Path) -> float:
+    try:
+        return time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def _remove(trash: Optional[Path]) -> None:
+    if trash is not None:
+        shutil.rmtree(trash, ignore_errors=True)
+
+
+def _fsync(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
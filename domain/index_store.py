@@ -1,14 +1,26 @@
-"""Vector index store abstraction using FAISS with metadata persistence."""
+"""Vector index store abstraction using FAISS with memory-mapped metadata persistence."""
 
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import multiprocessing
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence
 
 import numpy as np
 
+from domain import ann, generations
+from domain.chunk_store import RAW_OFFSETS_FILE, ChunkStore, atomic_path, load_npy
+from domain.filter_index import FILTERS_FILE, LEGACY_FILTERS_FILE, FilterIndex, MetadataFilter
+from domain.lexical_index import LexicalIndex, top_rows
+
 try:
     import hnswlib
 except ImportError:
@@ -22,45 +34,293 @@ except ImportError:
 
 @dataclass
 class SearchResult:
-    """Search result with text and metadata."""
+    """Search result with text and metadata.
+
+    ``score`` depends on the search (cosine, BM25 or a fused rank score);
+    ``dense_score`` is the cosine similarity whenever the vector search found the chunk.
+    """
 
     score: float
     text: str
     metadata: Dict[str, Any]
+    index_key: Optional[str] = None
+    dense_score: Optional[float] = None
+
+
+@dataclass
+class LoadedIndex:
+    """Deserialized index held in memory between searches."""
+
+    index: Any
+    metadata: Sequence[Dict[str, Any]]
+    texts: Sequence[str]
+    backend: str
+    dim: int
+    signature: tuple
+    nbytes: int
+    tombstones: frozenset[int] = field(default_factory=frozenset)
+    filters: Optional[FilterIndex] = None
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    vectors: Optional[np.ndarray] = None
+    lexical: Optional[LexicalIndex] = None
+    directory: Optional[Path] = None
+
+
+class IndexCache:
+    """Thread-safe LRU of loaded indexes bounded by an approximate memory budget."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, LoadedIndex] = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def get(self, key: str, signature: tuple, loader: Callable[[], LoadedIndex]) -> LoadedIndex:
+        """Return the cached entry for ``key`` or load it once across threads."""
+        entry = self._lookup(key, signature)
+        if entry is not None:
+            return entry
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            entry = self._lookup(key, signature)
+            if entry is not None:
+                return entry
+            loaded = loader()
+            with self._lock:
+                self.misses += 1
+                self._discard(key)
+                if loaded.nbytes <= self.max_bytes:
+                    self._entries[key] = loaded
+                    self._total_bytes += loaded.nbytes
+                    self._evict()
+            return loaded
+
+    def invalidate(self, key: str) -> None:
+        """Drop ``key`` and bump its generation so stale loads are not reused."""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _lookup(self, key: str, signature: tuple) -> Optional[LoadedIndex]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature != signature:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.nbytes
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.nbytes
+
+
+DEFAULT_CACHE_BYTES = 1024 * 1024 * 1024
+COMPACT_RATIO = 0.25
+RRF_K = 60
+HYBRID_ALPHA = 0.5
+HYBRID_CANDIDATE_FACTOR = 4
+TOMBSTONES_FILE = "tombstones.npy"
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+SHARDS_FILE = "shards.json"
+SHARDS_DIR = "shards"
+SHARD_PARTITIONS = ("path", "source")
+_CACHES: Dict[Path, IndexCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def _shared_cache(base_path: Path, max_bytes: Optional[int]) -> IndexCache:
+    """Return the process-wide cache for an index root, shared by all stores."""
+    key = base_path.resolve()
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = IndexCache(max_bytes if max_bytes is not None else DEFAULT_CACHE_BYTES)
+            _CACHES[key] = cache
+        elif max_bytes is not None:
+            cache.max_bytes = max_bytes
+        return cache
+
+
+def _write_lock(index_dir: Path) -> generations.WriterLock:
+    """Return the lock serializing writers of one index directory across processes."""
+    return generations.writer_lock(index_dir)
+
+
+def shard_of(metadata: Dict[str, Any], shards: int, shard_by: str) -> int:
+    """Return the shard for a chunk, hashing its path or its source (type/owner/repo)."""
+    if shard_by == "path":
+        value = str(metadata.get("path"))
+    else:
+        value = f"{metadata.get('type')}:{metadata.get('owner')}/{metadata.get('repo')}"
+    return zlib.crc32(value.encode("utf-8")) % shards
 
 
 class IndexStore:
-    """Manage a vector index with associated metadata (HNSW preferred)."""
+    """Manage a vector index with associated metadata (HNSW preferred).
 
-    def __init__(self, base_path: str) -> None:
+    Each write publishes a new immutable generation (see :mod:`domain.generations`);
+    indexes written before generations existed are read from the flat layout.
+    """
+
+    _INDEX_FILES = ("backend.txt", "index.bin")
+    _LEGACY_CHUNK_FILES = ("metadata.json", "chunks.json")
+    _DATA_FILES = (
+        *_INDEX_FILES,
+        *_LEGACY_CHUNK_FILES,
+        *ChunkStore.FILES,
+        *LexicalIndex.FILES,
+        MANIFEST_FILE,
+        TOMBSTONES_FILE,
+        FILTERS_FILE,
+        VECTORS_FILE,
+    )
+    # Flat-layout files retired once an index moves to generations.
+    _FLAT_FILES = (*_DATA_FILES, LEGACY_FILTERS_FILE)
+
+    def __init__(self, base_path: str, cache_max_bytes: Optional[int] = None) -> None:
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.cache = _shared_cache(self.base_path, cache_max_bytes)
 
     def _index_dir(self, index_key: str) -> Path:
         return self.base_path / index_key
 
-    def load(self, index_key: str) -> tuple[Any, List[Dict[str, Any]], List[str], str, int]:
-        index_dir = self._index_dir(index_key)
+    def _data_dir(self, index_key: str) -> Path:
+        return generations.current(self._index_dir(index_key))
+
+    def _signature(self, index_key: str, data_dir: Path) -> tuple:
+        if ChunkStore.exists(data_dir):
+            chunk_files = ChunkStore.REQUIRED_FILES
+        else:
+            chunk_files = self._LEGACY_CHUNK_FILES
+        stats = []
+        for name in (*self._INDEX_FILES, *chunk_files):
+            try:
+                stat = (data_dir / name).stat()
+            except FileNotFoundError:
+                raise FileNotFoundError("Index not found") from None
+            stats.append((name, stat.st_mtime_ns, stat.st_size))
+        optional = (MANIFEST_FILE, TOMBSTONES_FILE, FILTERS_FILE, VECTORS_FILE, *LexicalIndex.FILES)
+        for name in (*optional, RAW_OFFSETS_FILE):
+            if (data_dir / name).exists():
+                stat = (data_dir / name).stat()
+                stats.append((name, stat.st_mtime_ns, stat.st_size))
+        return (self.cache.generation(index_key), data_dir.name, *stats)
+
+    def get_loaded(self, index_key: str) -> LoadedIndex:
+        """Return a loaded index from the shared cache, reloading when files change."""
+        while True:
+            data_dir = self._data_dir(index_key)
+            try:
+                signature = self._signature(index_key, data_dir)
+                return self.cache.get(
+                    index_key, signature, lambda: self._load(index_key, signature, data_dir)
+                )
+            except FileNotFoundError:
+                # A writer published and removed this generation mid-read; retry on the new one.
+                if self._data_dir(index_key) == data_dir:
+                    raise
+
+    @contextmanager
+    def _reading(self, index_key: str) -> Iterator[LoadedIndex]:
+        """Yield the current index while holding a lease on its generation."""
+        while True:
+            loaded = self.get_loaded(index_key)
+            with generations.lease(loaded.directory) as alive:
+                if alive:
+                    yield loaded
+                    return
+
+    def load(self, index_key: str) -> tuple[Any, Sequence[Dict[str, Any]], Sequence[str], str, int]:
+        loaded = self._load(index_key, ())
+        return loaded.index, loaded.metadata, loaded.texts, loaded.backend, loaded.dim
+
+    def _load(
+        self, index_key: str, signature: tuple, data_dir: Optional[Path] = None
+    ) -> LoadedIndex:
+        index_dir = data_dir or self._data_dir(index_key)
         index_path = index_dir / "index.bin"
-        metadata_path = index_dir / "metadata.json"
-        texts_path = index_dir / "chunks.json"
 
         if not index_path.exists():
             raise FileNotFoundError("Index not found")
 
-        backend_info = (index_dir / "backend.txt").read_text().strip()
-        backend, dim_text = backend_info.split(":", 1)
-        dim = int(dim_text)
-        if backend == "hnsw":
+        manifest = self._read_manifest(index_dir)
+        backend, dim = manifest["backend"], manifest["dim"]
+        if ann.uses_hnswlib(manifest):
             index = hnswlib.Index(space="cosine", dim=dim)
             index.load_index(str(index_path))
         else:
             if faiss is None:
                 raise RuntimeError("faiss-cpu is not installed")
             index = faiss.read_index(str(index_path))
-        metadata = json.loads(metadata_path.read_text())
-        texts = json.loads(texts_path.read_text())
-        return index, metadata, texts, backend, dim
+        ann.configure(index, manifest)
+        nbytes = index_path.stat().st_size
+        if ChunkStore.exists(index_dir):
+            chunks = ChunkStore(index_dir)
+            metadata, texts = chunks.metadata, chunks.texts
+            nbytes += chunks.resident_bytes
+        else:
+            metadata_path = index_dir / "metadata.json"
+            texts_path = index_dir / "chunks.json"
+            metadata = json.loads(metadata_path.read_text())
+            texts = json.loads(texts_path.read_text())
+            nbytes += metadata_path.stat().st_size + texts_path.stat().st_size
+        tombstones: frozenset[int] = frozenset()
+        tombstones_path = index_dir / TOMBSTONES_FILE
+        if tombstones_path.exists():
+            tombstones = frozenset(int(row) for row in load_npy(tombstones_path))
+        filters = FilterIndex(index_dir, len(texts)) if FilterIndex.exists(index_dir) else None
+        vectors = None
+        if manifest.get("rerank") and (index_dir / VECTORS_FILE).exists():
+            vectors = load_npy(index_dir / VECTORS_FILE, mmap_mode="r")
+        if LexicalIndex.exists(index_dir):
+            lexical = LexicalIndex(index_dir)
+        else:
+            # Built before the lexical index existed; the next upsert persists one.
+            lexical = LexicalIndex.from_texts(texts)
+        nbytes += sum(array.nbytes for array in (lexical.offsets, lexical.deltas, lexical.freqs))
+        return LoadedIndex(
+            index,
+            metadata,
+            texts,
+            backend,
+            dim,
+            signature,
+            nbytes,
+            tombstones,
+            filters,
+            manifest,
+            vectors,
+            lexical,
+            index_dir,
+        )
 
     def save(
         self,
@@ -70,18 +330,26 @@ class IndexStore:
         texts: List[str],
         backend: str,
         dim: int,
+        manifest: Optional[Dict[str, Any]] = None,
+        vectors: Optional[np.ndarray] = None,
     ) -> None:
+        """Write a complete index as a new generation and publish it atomically.
+
+        ``vectors`` are the exact vectors kept for re-ranking compressed encodings.
+        """
         index_dir = self._index_dir(index_key)
-        index_dir.mkdir(parents=True, exist_ok=True)
-        if backend == "hnsw":
-            index.save_index(str(index_dir / "index.bin"))
-        else:
-            if faiss is None:
-                raise RuntimeError("faiss-cpu is not installed")
-            faiss.write_index(index, str(index_dir / "index.bin"))
-        (index_dir / "backend.txt").write_text(f"{backend}:{dim}")
-        (index_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
-        (index_dir / "chunks.json").write_text(json.dumps(texts, indent=2))
+        if manifest is None:
+            params = dict(ann.DEFAULT_HNSW_PARAMS) if backend == "hnsw" else {}
+            manifest = ann.as_manifest({"backend": backend, "params": params}, dim)
+        with _write_lock(index_dir):
+            gen_dir = generations.create(index_dir)
+            self._write_index(gen_dir, index, manifest)
+            self._write_vectors(gen_dir, vectors)
+            ChunkStore.write(gen_dir, texts, metadata)
+            FilterIndex.write(gen_dir, ChunkStore(gen_dir))
+            LexicalIndex.write(gen_dir, texts)
+            self._publish(index_key, gen_dir)
+            self._drop_shards(index_key)
 
     def build_index(
         self,
@@ -89,48 +357,673 @@ class IndexStore:
         vectors: List[List[float]],
         metadata: List[Dict[str, Any]],
         texts: List[str],
+        config: Optional[Dict[str, Any]] = None,
+        tune: bool = False,
+        target_recall: float = 0.95,
+        encoding: Optional[str] = None,
+        rerank: Optional[bool] = None,
+        shards: int = 1,
+        shard_by: str = "path",
     ) -> None:
-        if not vectors:
+        """Build and persist an index.
+
+        ``config`` pins an ANN backend and parameters; ``tune`` sweeps configurations
+        on a sample and keeps the cheapest one reaching ``target_recall``@10, then
+        raises IVF ``nprobe`` until the built index meets it too. Otherwise the
+        backend is chosen from the corpus size. The measured recall is recorded
+        in the manifest.
+
+        ``encoding`` stores vectors as ``float32``, ``float16``, ``int8`` or IVF-``pq``.
+        Compressed encodings keep the exact vectors in a memory-mapped ``vectors.npy``
+        when ``rerank`` is set and re-score the top candidates against them.
+
+        With ``shards`` > 1 the corpus is partitioned by ``shard_by`` (``path`` or
+        ``source``) and each shard is built in its own process.
+        """
+        if len(vectors) == 0:
             raise ValueError("No vectors to index")
-        dim = len(vectors[0])
-        vector_array = self._normalize(np.array(vectors, dtype="float32"))
-        if hnswlib is not None:
-            index = hnswlib.Index(space="cosine", dim=dim)
-            index.init_index(max_elements=len(vector_array), ef_construction=200, M=16)
-            index.add_items(vector_array, list(range(len(vector_array))))
-            index.set_ef(50)
-            backend = "hnsw"
+        if shards > 1:
+            options = {
+                "config": config,
+                "tune": tune,
+                "target_recall": target_recall,
+                "encoding": encoding,
+                "rerank": rerank,
+            }
+            self._build_sharded(index_key, vectors, metadata, texts, shards, shard_by, options)
+            return
+        encoding = encoding or (config or {}).get("encoding", "float32")
+        rerank = (config or {}).get("rerank", True) if rerank is None else rerank
+        vector_array = self._normalize(np.asarray(vectors, dtype="float32"))
+        tuning = None
+        if tune:
+            config, tuning = ann.autotune(vector_array, target_recall=target_recall)
+        elif config is None:
+            config = ann.default_config(len(vector_array))
+        config = ann.with_encoding(config, encoding)
+        index = ann.build(config, vector_array)
+        dim = vector_array.shape[1]
+        reranked = encoding != "float32" and rerank
+        if tune:
+            recall = ann.calibrate(index, config, vector_array, target_recall, reranked=reranked)
         else:
-            if faiss is None:
-                raise RuntimeError("faiss-cpu is not installed")
-            index = faiss.IndexFlatIP(dim)
-            index.add(vector_array)
-            backend = "faiss"
-        self.save(index_key, index, metadata, texts, backend, dim)
-
-    def search(self, index_key: str, query_vector: List[float], top_k: int = 5) -> List[SearchResult]:
-        index, metadata, texts, backend, dim = self.load(index_key)
-        query = self._normalize(np.array([query_vector], dtype="float32"))
-        if backend == "hnsw":
-            indices, distances = index.knn_query(query, k=top_k)
-            scores = 1 - distances
+            recall = ann.measure_recall(index, config, vector_array)
+        manifest = ann.as_manifest(config, dim, tuning)
+        manifest["recall"] = recall
+        if encoding != "float32":
+            manifest["rerank"] = rerank
+        exact = vector_array if manifest.get("rerank") else None
+        self.save(index_key, index, metadata, texts, config["backend"], dim, manifest, exact)
+
+    def _build_sharded(
+        self,
+        index_key: str,
+        vectors: List[List[float]],
+        metadata: List[Dict[str, Any]],
+        texts: List[str],
+        shards: int,
+        shard_by: str,
+        options: Dict[str, Any],
+    ) -> None:
+        if shard_by not in SHARD_PARTITIONS:
+            raise ValueError(f"Unknown shard partition: {shard_by}")
+        vector_array = np.asarray(vectors, dtype="float32")
+        groups: Dict[int, List[int]] = {}
+        for row, meta in enumerate(metadata):
+            groups.setdefault(shard_of(meta, shards, shard_by), []).append(row)
+        names = [f"{shard:03d}" for shard in range(shards)]
+        jobs = [
+            (
+                str(self.base_path),
+                f"{index_key}/{SHARDS_DIR}/{names[shard]}",
+                vector_array[rows],
+                [metadata[row] for row in rows],
+                [texts[row] for row in rows],
+                options,
+            )
+            for shard, rows in sorted(groups.items())
+        ]
+        index_dir = self._index_dir(index_key)
+        with _write_lock(index_dir):
+            workers = max(1, min(len(jobs), os.cpu_count() or 1))
+            # Never fork the (multithreaded) API process: spawned workers start clean.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                list(pool.map(_build_shard, *zip(*jobs)))
+            index_dir.mkdir(parents=True, exist_ok=True)
+            with atomic_path(index_dir / SHARDS_FILE) as tmp_path:
+                layout = {"shard_by": shard_by, "shards": names, "rows": len(metadata)}
+                tmp_path.write_text(json.dumps(layout, indent=2))
+            for shard in range(shards):
+                if shard not in groups:
+                    self._unpublish(f"{index_key}/{SHARDS_DIR}/{names[shard]}")
+            unsharded = (index_dir / generations.CURRENT_FILE, index_dir / "index.bin")
+            if any(path.exists() for path in unsharded):
+                self._unpublish(index_key)
+
+    def _shard_manifest(self, index_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((self._index_dir(index_key) / SHARDS_FILE).read_text())
+        except FileNotFoundError:
+            return None
+
+    def _shard_keys(self, index_key: str) -> List[str]:
+        manifest = self._shard_manifest(index_key)
+        if manifest is None:
+            return []
+        return [f"{index_key}/{SHARDS_DIR}/{name}" for name in manifest["shards"]]
+
+    def _fan_out(self, shard_keys: List[str], run: Callable[[str], Any]) -> List[Any]:
+        """Run ``run`` on every shard concurrently, skipping shards that hold no index."""
+
+        def guarded(shard_key: str) -> Any:
+            try:
+                return run(shard_key)
+            except FileNotFoundError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=len(shard_keys), thread_name_prefix="shard") as pool:
+            return [result for result in pool.map(guarded, shard_keys) if result is not None]
+
+    @staticmethod
+    def _merge_top_k(per_shard: List[List[SearchResult]], top_k: int) -> List[SearchResult]:
+        merged = [result for results in per_shard for result in results]
+        merged.sort(key=lambda result: result.score, reverse=True)
+        return merged[:top_k]
+
+    def _drop_shards(self, index_key: str) -> None:
+        shard_keys = self._shard_keys(index_key)
+        if not shard_keys:
+            return
+        (self._index_dir(index_key) / SHARDS_FILE).unlink(missing_ok=True)
+        for shard_key in shard_keys:
+            self._unpublish(shard_key)
+
+    def tune(self, index_key: str, target_recall: float = 0.95) -> Dict[str, Any]:
+        """Autotune an existing index in place and return the tuning report."""
+        shard_keys = self._shard_keys(index_key)
+        if shard_keys:
+            reports = self._fan_out(shard_keys, lambda key: (key, self.tune(key, target_recall)))
+            return {"shards": dict(reports)}
+        index_dir = self._index_dir(index_key)
+        with _write_lock(index_dir):
+            loaded = self._load(index_key, ())
+            live = [row for row in range(len(loaded.texts)) if row not in loaded.tombstones]
+            self.build_index(
+                index_key,
+                self._stored_vectors(loaded, live),
+                [loaded.metadata[row] for row in live],
+                [loaded.texts[row] for row in live],
+                tune=True,
+                target_recall=target_recall,
+                encoding=loaded.manifest.get("encoding"),
+                rerank=loaded.manifest.get("rerank"),
+            )
+            return self._read_manifest(self._data_dir(index_key))["tuning"]
+
+    def chunk_ids(self, index_key: str) -> List[str]:
+        """Return the stable ids of live chunks, or an empty list if not indexed."""
+        shard_keys = self._shard_keys(index_key)
+        if shard_keys:
+            return [chunk_id for shard_key in shard_keys for chunk_id in self.chunk_ids(shard_key)]
+        if not (self._data_dir(index_key) / "index.bin").exists():
+            return []
+        with self._reading(index_key) as loaded:
+            return list(self._live_rows(loaded))
+
+    def chunk_metadata(self, index_key: str) -> Dict[str, Dict[str, Any]]:
+        """Return the metadata of live chunks by stable id, or an empty dict if not indexed."""
+        shard_keys = self._shard_keys(index_key)
+        if shard_keys:
+            merged: Dict[str, Dict[str, Any]] = {}
+            for shard_key in shard_keys:
+                merged.update(self.chunk_metadata(shard_key))
+            return merged
+        if not (self._data_dir(index_key) / "index.bin").exists():
+            return {}
+        with self._reading(index_key) as loaded:
+            live = self._live_rows(loaded)
+            return {chunk_id: loaded.metadata[row] for chunk_id, row in live.items()}
+
+    def upsert(
+        self,
+        index_key: str,
+        ids: List[str],
+        vectors: List[List[float]],
+        metadata: List[Dict[str, Any]],
+        texts: List[str],
+    ) -> None:
+        """Insert or replace chunks by stable id without rebuilding the index.
+
+        New rows are appended to the graph and chunk store; replaced rows are
+        tombstoned until the next compaction.
+        """
+        self.apply(index_key, ids, vectors, metadata, texts)
+
+    def delete(self, index_key: str, ids: List[str]) -> int:
+        """Tombstone chunks by stable id and return how many were removed."""
+        return self.apply(index_key, [], [], [], [], deleted=ids)["deleted"]
+
+    def update_metadata(
+        self, index_key: str, ids: List[str], metadata: List[Dict[str, Any]]
+    ) -> int:
+        """Replace the metadata of live chunks by stable id and return how many changed.
+
+        Vectors, texts and the lexical index are reused as they are, so nothing
+        is re-embedded; the filter postings are rebuilt for the new values.
+        """
+        return self.apply(index_key, [], [], [], [], retagged=dict(zip(ids, metadata)))["retagged"]
+
+    def apply(
+        self,
+        index_key: str,
+        ids: List[str],
+        vectors: List[List[float]],
+        metadata: List[Dict[str, Any]],
+        texts: List[str],
+        deleted: Sequence[str] = (),
+        retagged: Optional[Mapping[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, int]:
+        """Upsert, delete and retag chunks by stable id in a single published generation.
+
+        Readers see either none or all of the changes. On a sharded index each
+        shard publishes its own part; with ``shard_by="path"`` all chunks of a
+        file share a shard, so a file is never seen half-updated.
+        Returns the number of chunks upserted, deleted and retagged.
+        """
+        metadata = [{**meta, "chunk_id": chunk_id} for chunk_id, meta in zip(ids, metadata)]
+        retagged = {
+            chunk_id: {**meta, "chunk_id": chunk_id} for chunk_id, meta in (retagged or {}).items()
+        }
+        counts = {"upserted": 0, "deleted": 0, "retagged": 0}
+        if not (ids or deleted or retagged):
+            return counts
+        shard_manifest = self._shard_manifest(index_key)
+        if shard_manifest is not None:
+            names = shard_manifest["shards"]
+            shard_by = shard_manifest["shard_by"]
+            rows: Dict[int, List[int]] = {shard: [] for shard in range(len(names)) if deleted}
+            for row, meta in enumerate(metadata):
+                rows.setdefault(shard_of(meta, len(names), shard_by), []).append(row)
+            retags: Dict[int, Dict[str, Dict[str, Any]]] = {}
+            for chunk_id, meta in retagged.items():
+                retags.setdefault(shard_of(meta, len(names), shard_by), {})[chunk_id] = meta
+            for shard in sorted(set(rows) | set(retags)):
+                shard_rows = rows.get(shard, [])
+                shard_counts = self.apply(
+                    f"{index_key}/{SHARDS_DIR}/{names[shard]}",
+                    [ids[row] for row in shard_rows],
+                    [vectors[row] for row in shard_rows],
+                    [metadata[row] for row in shard_rows],
+                    [texts[row] for row in shard_rows],
+                    deleted=deleted,
+                    retagged=retags.get(shard),
+                )
+                for name, count in shard_counts.items():
+                    counts[name] += count
+            return counts
+        index_dir = self._index_dir(index_key)
+        with _write_lock(index_dir):
+            data_dir = self._data_dir(index_key)
+            if not (data_dir / "index.bin").exists():
+                if ids:
+                    self.build_index(index_key, vectors, metadata, texts)
+                return {**counts, "upserted": len(ids)}
+            loaded = self._load(index_key, (), data_dir)
+            live_rows = self._live_rows(loaded)
+            replaced = {live_rows[chunk_id] for chunk_id in ids if chunk_id in live_rows}
+            removed = {live_rows[chunk_id] for chunk_id in deleted if chunk_id in live_rows}
+            removed -= replaced
+            updates = {
+                live_rows[chunk_id]: meta
+                for chunk_id, meta in retagged.items()
+                if chunk_id in live_rows and live_rows[chunk_id] not in replaced | removed
+            }
+            if not (ids or removed or updates):
+                return counts
+            start = len(loaded.texts)
+            gen_dir = generations.create(index_dir, data_dir, self._DATA_FILES)
+            index = loaded.index
+            hnsw = ann.uses_hnswlib(loaded.manifest)
+            if ids:
+                vector_array = self._normalize(np.array(vectors, dtype="float32"))
+                if hnsw:
+                    needed = start + len(vector_array)
+                    if needed > index.get_max_elements():
+                        index.resize_index(max(needed, int(index.get_max_elements() * 1.5)))
+                    index.add_items(vector_array, list(range(start, needed)))
+                else:
+                    index.add(vector_array)
+                if loaded.vectors is not None:
+                    self._write_vectors(gen_dir, np.concatenate([loaded.vectors, vector_array]))
+            if hnsw:
+                for row in replaced | removed:
+                    index.mark_deleted(row)
+            if ids or (hnsw and removed):
+                self._write_index(gen_dir, index, loaded.manifest)
+            if (ids or updates) and not ChunkStore.exists(gen_dir):
+                ChunkStore.write(gen_dir, list(loaded.texts), list(loaded.metadata))
+                for name in self._LEGACY_CHUNK_FILES:
+                    (gen_dir / name).unlink(missing_ok=True)
+            if ids:
+                ChunkStore.append(gen_dir, texts, metadata)
+                if LexicalIndex.exists(gen_dir):
+                    LexicalIndex.append(gen_dir, texts)
+                else:
+                    LexicalIndex.write(gen_dir, ChunkStore(gen_dir).texts)
+            if updates:
+                ChunkStore.update(gen_dir, list(updates), list(updates.values()))
+                FilterIndex.write(gen_dir, ChunkStore(gen_dir))
+            elif ids:
+                FilterIndex.append(gen_dir, ChunkStore(gen_dir), start)
+            tombstones = set(loaded.tombstones) | replaced | removed
+            self._write_tombstones(gen_dir, tombstones)
+            self._publish(index_key, gen_dir)
+            if len(tombstones) > COMPACT_RATIO * (start + len(ids)):
+                self.compact(index_key)
+            return {"upserted": len(ids), "deleted": len(removed), "retagged": len(updates)}
+
+    def compact(self, index_key: str) -> None:
+        """Rebuild the index from live rows, dropping tombstoned chunks."""
+        shard_keys = self._shard_keys(index_key)
+        if shard_keys:
+            self._fan_out(shard_keys, self.compact)
+            return
+        index_dir = self._index_dir(index_key)
+        with _write_lock(index_dir):
+            loaded = self._load(index_key, ())
+            if not loaded.tombstones:
+                return
+            live = [row for row in range(len(loaded.texts)) if row not in loaded.tombstones]
+            if not live:
+                self._unpublish(index_key)
+                return
+            self.build_index(
+                index_key,
+                self._stored_vectors(loaded, live),
+                [loaded.metadata[row] for row in live],
+                [loaded.texts[row] for row in live],
+                config=loaded.manifest,
+            )
+
+    def search(
+        self,
+        index_key: str,
+        query_vector: List[float],
+        top_k: int = 5,
+        where: Optional[MetadataFilter] = None,
+    ) -> List[SearchResult]:
+        return self.search_many(index_key, [query_vector], top_k=top_k, where=where)[0]
+
+    def search_many(
+        self,
+        index_key: str,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 5,
+        where: Optional[MetadataFilter] = None,
+    ) -> List[List[SearchResult]]:
+        """Search a batch of query vectors with a single k-NN call.
+
+        ``where`` is evaluated against the precomputed filter postings and applied
+        inside the ANN search, so filtered queries still return a full top-k.
+        """
+        if len(query_vectors) == 0:
+            return []
+        shard_keys = self._shard_keys(index_key)
+        if shard_keys:
+            per_shard = self._fan_out(
+                shard_keys,
+                lambda key: self.search_many(key, query_vectors, top_k=top_k, where=where),
+            )
+            return [
+                self._merge_top_k([results[query] for results in per_shard], top_k)
+                for query in range(len(query_vectors))
+            ]
+        with self._reading(index_key) as loaded:
+            return self._search_loaded(loaded, query_vectors, top_k, where)
+
+    def _search_loaded(
+        self,
+        loaded: LoadedIndex,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int,
+        where: Optional[MetadataFilter],
+    ) -> List[List[SearchResult]]:
+        index = loaded.index
+        queries = self._normalize(np.asarray(query_vectors, dtype="float32"))
+        allowed = self._allowed_rows(loaded, where)
+        if allowed is not None:
+            live_count = int(allowed.sum())
         else:
-            scores, indices = index.search(query, top_k)
+            live_count = len(loaded.texts) - len(loaded.tombstones)
+        if live_count <= 0:
+            return [[] for _ in range(len(queries))]
+
+        fetch = top_k * ann.RERANK_FACTOR if loaded.vectors is not None else top_k
+        if ann.uses_hnswlib(loaded.manifest) or allowed is not None:
+            k = min(fetch, live_count)
+        else:
+            k = min(fetch + len(loaded.tombstones), index.ntotal)
+        scores, indices = ann.search(index, loaded.manifest, queries, k, allowed)
+        if loaded.vectors is not None:
+            scores, indices = ann.rerank(loaded.vectors, queries, indices)
+        return [
+            self._to_results(loaded, row_scores, row_indices, top_k, dense=True)
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+    def search_lexical(
+        self,
+        index_key: str,
+        query_text: str,
+        top_k: int = 5,
+        where: Optional[MetadataFilter] = None,
+    ) -> List[SearchResult]:
+        """Rank chunks by BM25 against the persisted inverted index (raw BM25 scores)."""
+        shard_keys = self._shard_keys(index_key)
+        if shard_keys:
+            per_shard = self._fan_out(
+                shard_keys,
+                lambda key: self.search_lexical(key, query_text, top_k=top_k, where=where),
+            )
+            return self._merge_top_k(per_shard, top_k)
+        with self._reading(index_key) as loaded:
+            if loaded.lexical is None:
+                return []
+            allowed = self._allowed_rows(loaded, where)
+            if allowed is None and loaded.tombstones:
+                allowed = np.ones(len(loaded.texts), dtype=bool)
+                allowed[list(loaded.tombstones)] = False
+            scores = loaded.lexical.scores(query_text)
+            rows = top_rows(scores, allowed, top_k)
+            return self._to_results(loaded, scores[rows], rows, top_k)
+
+    def search_hybrid(
+        self,
+        index_key: str,
+        query_text: str,
+        query_vector: Optional[List[float]] = None,
+        top_k: int = 5,
+        where: Optional[MetadataFilter] = None,
+        alpha: float = HYBRID_ALPHA,
+    ) -> List[SearchResult]:
+        """Fuse BM25 and vector scores as ``alpha * dense + (1 - alpha) * lexical``.
+
+        Both candidate lists are min-max normalized before fusion. Without a
+        ``query_vector`` the search is lexical only and never touches the ANN index.
+        On a sharded index the raw candidates of every shard are merged first and
+        fused once, so scores are normalized over the whole corpus.
+        """
+        candidates = top_k * HYBRID_CANDIDATE_FACTOR
+        lexical = self.search_lexical(index_key, query_text, top_k=candidates, where=where)
+        dense: List[SearchResult] = []
+        if query_vector is not None:
+            dense = self.search(index_key, query_vector, top_k=candidates, where=where)
+        return self._fuse(dense, lexical, top_k, alpha)
+
+    @staticmethod
+    def _fuse(
+        dense: List[SearchResult], lexical: List[SearchResult], top_k: int, alpha: float
+    ) -> List[SearchResult]:
+        fused: Dict[Any, tuple[float, SearchResult]] = {}
+        weights = (alpha, 1 - alpha) if dense else (0.0, 1.0)
+        for weight, results in zip(weights, (dense, lexical)):
+            if not results:
+                continue
+            scores = [result.score for result in results]
+            low, span = min(scores), max(scores) - min(scores)
+            for result in results:
+                key = result.metadata.get("chunk_id") or (result.metadata.get("path"), result.text)
+                normalized = (result.score - low) / span if span else 1.0
+                previous = fused.get(key)
+                total = weight * normalized + (previous[0] if previous else 0.0)
+                fused[key] = (total, previous[1] if previous else result)
+        ranked = sorted(fused.values(), key=lambda item: item[0], reverse=True)[:top_k]
+        for score, result in ranked:
+            result.score = float(score)
+        return [result for _, result in ranked]
+
+    def search_federated(
+        self,
+        index_keys: Sequence[str],
+        query_vector: Optional[List[float]],
+        top_k: int = 5,
+        where: Optional[MetadataFilter | Mapping[str, MetadataFilter]] = None,
+        query_text: Optional[str] = None,
+    ) -> List[SearchResult]:
+        """Search several indexes concurrently and merge them with reciprocal-rank fusion.
+
+        Scores are min-max normalized per index and only break RRF ties; each result
+        keeps its per-index score and the key of the index it came from. Passing
+        ``query_text`` runs a hybrid search in each index. ``where`` is either one
+        filter for every index or a filter per index key (keys it omits are not
+        filtered). Missing indexes are skipped.
+        """
+        keys = list(dict.fromkeys(index_keys))
+        if not keys:
+            return []
+
+        def run(index_key: str) -> List[SearchResult]:
+            key_where = where.get(index_key) if isinstance(where, Mapping) else where
+            try:
+                if query_text is not None:
+                    return self.search_hybrid(
+                        index_key, query_text, query_vector, top_k=top_k, where=key_where
+                    )
+                return self.search(index_key, query_vector, top_k=top_k, where=key_where)
+            except FileNotFoundError:
+                return []
+
+        with ThreadPoolExecutor(max_workers=len(keys), thread_name_prefix="federated") as pool:
+            per_index = list(pool.map(run, keys))
+
+        fused: List[tuple[float, float, SearchResult]] = []
+        for index_key, results in zip(keys, per_index):
+            if not results:
+                continue
+            scores = [result.score for result in results]
+            low, span = min(scores), max(scores) - min(scores)
+            for rank, result in enumerate(results):
+                normalized = (result.score - low) / span if span else 1.0
+                result.index_key = index_key
+                fused.append((1.0 / (RRF_K + rank + 1), normalized, result))
+        fused.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [result for _, _, result in fused[:top_k]]
+
+    @staticmethod
+    def _allowed_rows(loaded: LoadedIndex, where: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        if where is None or where.is_empty():
+            return None
+        if loaded.filters is not None:
+            allowed = loaded.filters.mask(where)
+        else:
+            prefix = (where.path_prefix or "").lstrip("/")
+            allowed = np.array(
+                [
+                    (not where.commit or meta.get("commit") == where.commit)
+                    and (not where.source_type or meta.get("type") == where.source_type)
+                    and str(meta.get("path") or "").startswith(prefix)
+                    for meta in loaded.metadata
+                ],
+                dtype=bool,
+            )
+        if loaded.tombstones:
+            allowed[list(loaded.tombstones)] = False
+        return allowed
+
+    @staticmethod
+    def _to_results(
+        loaded: LoadedIndex,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        top_k: int,
+        dense: bool = False,
+    ) -> List[SearchResult]:
         results: List[SearchResult] = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < 0 or idx >= len(texts):
+        for score, idx in zip(scores, indices):
+            if idx < 0 or idx >= len(loaded.texts) or int(idx) in loaded.tombstones:
                 continue
+            if len(results) == top_k:
+                break
             results.append(
                 SearchResult(
                     score=float(score),
-                    text=texts[idx],
-                    metadata=metadata[idx],
+                    text=loaded.texts[idx],
+                    metadata=loaded.metadata[idx],
+                    dense_score=float(score) if dense else None,
                 )
             )
         return results
 
+    def _publish(self, index_key: str, gen_dir: Path) -> None:
+        index_dir = self._index_dir(index_key)
+        generations.publish(index_dir, gen_dir)
+        self.cache.invalidate(index_key)
+        generations.sweep(index_dir, self._FLAT_FILES)
+
+    def _unpublish(self, index_key: str) -> None:
+        index_dir = self._index_dir(index_key)
+        flat = generations.current(index_dir) == index_dir
+        generations.unpublish(index_dir)
+        self.cache.invalidate(index_key)
+        if flat:
+            generations.retire(index_dir, self._FLAT_FILES)
+        generations.sweep(index_dir)
+
+    @staticmethod
+    def _write_index(index_dir: Path, index: Any, manifest: Dict[str, Any]) -> None:
+        if not ann.uses_hnswlib(manifest) and faiss is None:
+            raise RuntimeError("faiss-cpu is not installed")
+        with atomic_path(index_dir / "index.bin") as tmp_path:
+            if ann.uses_hnswlib(manifest):
+                index.save_index(str(tmp_path))
+            else:
+                faiss.write_index(index, str(tmp_path))
+        with atomic_path(index_dir / "backend.txt") as tmp_path:
+            tmp_path.write_text(f"{manifest['backend']}:{manifest['dim']}")
+        with atomic_path(index_dir / MANIFEST_FILE) as tmp_path:
+            tmp_path.write_text(json.dumps(manifest, indent=2))
+
+    @staticmethod
+    def _write_vectors(index_dir: Path, vectors: Optional[np.ndarray]) -> None:
+        path = index_dir / VECTORS_FILE
+        if vectors is None:
+            path.unlink(missing_ok=True)
+            return
+        with atomic_path(path) as tmp_path, open(tmp_path, "wb") as handle:
+            np.save(handle, np.asarray(vectors, dtype="float32"))
+
+    @staticmethod
+    def _stored_vectors(loaded: LoadedIndex, rows: List[int]) -> np.ndarray:
+        if loaded.vectors is not None:
+            return np.asarray(loaded.vectors[rows])
+        return ann.stored_vectors(loaded.index, loaded.manifest, rows)
+
+    @staticmethod
+    def _read_manifest(index_dir: Path) -> Dict[str, Any]:
+        manifest_path = index_dir / MANIFEST_FILE
+        if manifest_path.exists():
+            return json.loads(manifest_path.read_text())
+        backend, dim_text = (index_dir / "backend.txt").read_text().strip().split(":", 1)
+        params = dict(ann.DEFAULT_HNSW_PARAMS) if backend == "hnsw" else {}
+        return ann.as_manifest({"backend": backend, "params": params}, int(dim_text))
+
+    @staticmethod
+    def _write_tombstones(index_dir: Path, tombstones: set[int]) -> None:
+        path = index_dir / TOMBSTONES_FILE
+        if not tombstones:
+            path.unlink(missing_ok=True)
+            return
+        with atomic_path(path) as tmp_path, open(tmp_path, "wb") as handle:
+            np.save(handle, np.array(sorted(tombstones), dtype="int64"))
+
+    @staticmethod
+    def _live_rows(loaded: LoadedIndex) -> Dict[str, int]:
+        if not ChunkStore.exists(loaded.directory):
+            ids = [meta.get("chunk_id") for meta in loaded.metadata]
+        else:
+            codes, values = ChunkStore(loaded.directory).column("chunk_id")
+            ids = [values[int(code)] if code >= 0 else None for code in codes]
+        return {
+            chunk_id: row
+            for row, chunk_id in enumerate(ids)
+            if chunk_id is not None and row not in loaded.tombstones
+        }
+
     @staticmethod
     def _normalize(vectors: np.ndarray) -> np.ndarray:
         norms = np.linalg.norm(vectors, axis=1, keepdims=True)
         norms[norms == 0] = 1
         return vectors / norms
+
+
+def _build_shard(
+    base_path: str,
+    shard_key: str,
+    vectors: np.ndarray,
+    metadata: List[Dict[str, Any]],
+    texts: List[str],
+    options: Dict[str, Any],
+) -> None:
+    """Process-pool entry point building one shard."""
+    IndexStore(base_path).build_index(shard_key, vectors, metadata, texts, **options)
@@ -0,0 +1,209 @@
+"""Persisted BM25 inverted index with delta-encoded postings."""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from domain.chunk_store import NPY_LOCK, atomic_path
+
+LEXICAL_FILE = "lexical.npz"
+LEXICAL_TERMS_FILE = "lexical.terms.json"
+_ARRAYS = ("offsets", "deltas", "freqs", "doc_lengths")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_IDENTIFIER = re.compile(r"[A-Za-z0-9_]+(?:[.\-/:][A-Za-z0-9_]+)*")
+_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_IDENTIFIER_HINT = re.compile(r"[_.\-/:]|\d|[a-z][A-Z]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, keeping whole identifiers and their parts.
+
+    ``PAY-123`` yields ``pay-123``, ``pay`` and ``123``; ``getFileContent`` yields
+    the identifier plus ``get``, ``file`` and ``content``.
+    """
+    terms: List[str] = []
+    for match in _IDENTIFIER.finditer(text):
+        token = match.group(0)
+        terms.append(token.lower())
+        parts = [part for piece in re.split(r"[_.\-/:]+", token) for part in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+    return terms
+
+
+def is_identifier_query(text: str, max_terms: int = 3) -> bool:
+    """True for short queries made only of identifiers (function names, config keys, issue keys)."""
+    tokens = text.strip().split()
+    if not tokens or len(tokens) > max_terms:
+        return False
+    return all(
+        _IDENTIFIER.fullmatch(token.strip("`'\"?")) and _IDENTIFIER_HINT.search(token)
+        for token in tokens
+    )
+
+
+class LexicalIndex:
+    """BM25 over chunk texts.
+
+    Postings for term ``t`` live in ``[offsets[t], offsets[t + 1])``; document ids
+    are stored as gaps from the previous posting of the same term.
+    """
+
+    FILES = (LEXICAL_FILE, LEXICAL_TERMS_FILE)
+
+    def __init__(self, directory: Path) -> None:
+        directory = Path(directory)
+        with NPY_LOCK, np.load(directory / LEXICAL_FILE) as archive:
+            arrays = {name: archive[name] for name in _ARRAYS}
+        self._assign(arrays, json.loads((directory / LEXICAL_TERMS_FILE).read_text()))
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "LexicalIndex":
+        """Build an in-memory index for ``texts`` without persisting it."""
+        index = cls.__new__(cls)
+        index._assign(*_build([], _empty_pairs(), np.zeros(0, dtype="uint32"), texts))
+        return index
+
+    def _assign(self, arrays: Dict[str, np.ndarray], terms: List[str]) -> None:
+        self.offsets = arrays["offsets"]
+        self.deltas = arrays["deltas"]
+        self.freqs = arrays["freqs"]
+        self.doc_lengths = arrays["doc_lengths"]
+        self.term_ids: Dict[str, int] = {term: term_id for term_id, term in enumerate(terms)}
+        self.avg_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        return all((Path(directory) / name).exists() for name in cls.FILES)
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return np.zeros(0, dtype="int64"), np.zeros(0, dtype="uint16")
+        start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+        return np.cumsum(self.deltas[start:end], dtype="int64"), self.freqs[start:end]
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return a dense BM25 score per row for ``query``."""
+        rows = len(self.doc_lengths)
+        scores = np.zeros(rows, dtype="float32")
+        if not rows:
+            return scores
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term, weight in Counter(tokenize(query)).items():
+            docs, freqs = self.postings(term)
+            if not len(docs):
+                continue
+            idf = math.log(1 + (rows - len(docs) + 0.5) / (len(docs) + 0.5))
+            tf = freqs.astype("float32")
+            scores[docs] += weight * idf * tf * (BM25_K1 + 1) / (tf + norm[docs])
+        return scores
+
+    @staticmethod
+    def write(directory: Path, texts: Iterable[str]) -> None:
+        """Build the index for ``texts`` (row ids follow iteration order)."""
+        _write(Path(directory), [], _empty_pairs(), np.zeros(0, dtype="uint32"), texts)
+
+    @classmethod
+    def append(cls, directory: Path, texts: Iterable[str]) -> None:
+        """Add ``texts`` as rows after the existing ones without re-tokenizing old rows."""
+        directory = Path(directory)
+        existing = cls(directory)
+        terms = [""] * len(existing.term_ids)
+        for term, term_id in existing.term_ids.items():
+            terms[term_id] = term
+        counts = np.diff(existing.offsets).astype("int64")
+        term_ids = np.repeat(np.arange(len(terms), dtype="int64"), counts)
+        segment_starts = np.repeat(existing.offsets[:-1].astype("int64"), counts)
+        totals = np.cumsum(existing.deltas, dtype="int64")
+        before = np.concatenate([[0], totals])[segment_starts]
+        docs = totals - before
+        pairs = (term_ids, docs, existing.freqs.astype("int64"))
+        _write(directory, terms, pairs, existing.doc_lengths, texts)
+
+
+def _empty_pairs() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    empty = np.zeros(0, dtype="int64")
+    return empty, empty, empty
+
+
+def _write(
+    directory: Path,
+    terms: List[str],
+    pairs: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    doc_lengths: np.ndarray,
+    texts: Iterable[str],
+) -> None:
+    arrays, terms = _build(terms, pairs, doc_lengths, texts)
+    with atomic_path(directory / LEXICAL_FILE) as tmp_path, open(tmp_path, "wb") as handle:
+        np.savez_compressed(handle, **arrays)
+    with atomic_path(directory / LEXICAL_TERMS_FILE) as tmp_path:
+        tmp_path.write_text(json.dumps(terms))
+
+
+def _build(
+    terms: List[str],
+    pairs: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    doc_lengths: np.ndarray,
+    texts: Iterable[str],
+) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    lookup = {term: term_id for term_id, term in enumerate(terms)}
+    new_terms: List[int] = []
+    new_docs: List[int] = []
+    new_freqs: List[int] = []
+    lengths: List[int] = []
+    row = len(doc_lengths)
+    for text in texts:
+        counts = Counter(tokenize(text))
+        lengths.append(sum(counts.values()))
+        for term, freq in counts.items():
+            term_id = lookup.get(term)
+            if term_id is None:
+                term_id = len(terms)
+                lookup[term] = term_id
+                terms.append(term)
+            new_terms.append(term_id)
+            new_docs.append(row)
+            new_freqs.append(min(freq, np.iinfo("uint16").max))
+        row += 1
+
+    term_ids = np.concatenate([pairs[0], np.asarray(new_terms, dtype="int64")])
+    docs = np.concatenate([pairs[1], np.asarray(new_docs, dtype="int64")])
+    freqs = np.concatenate([pairs[2], np.asarray(new_freqs, dtype="int64")])
+    order = np.lexsort((docs, term_ids))
+    term_ids, docs, freqs = term_ids[order], docs[order], freqs[order]
+    offsets = np.zeros(len(terms) + 1, dtype="uint64")
+    np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+    deltas = docs.copy()
+    starts = np.zeros(len(docs), dtype=bool)
+    starts[offsets[:-1][np.diff(offsets) > 0].astype("int64")] = True
+    deltas[1:][~starts[1:]] = docs[1:][~starts[1:]] - docs[:-1][~starts[1:]]
+
+    arrays = {
+        "offsets": offsets,
+        "deltas": deltas.astype("uint32"),
+        "freqs": freqs.astype("uint16"),
+        "doc_lengths": np.concatenate(
+            [doc_lengths, np.asarray(lengths, dtype="uint32")]
+        ).astype("uint32"),
+    }
+    return arrays, terms
+
+
+def top_rows(scores: np.ndarray, allowed: Optional[np.ndarray], k: int) -> np.ndarray:
+    """Return up to ``k`` row ids with positive score, best first."""
+    if allowed is not None:
+        scores = np.where(allowed, scores, 0)
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
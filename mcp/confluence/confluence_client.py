@@ -2,17 +2,32 @@
 
 from __future__ import annotations
 
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 import requests
 
+from mcp.transport.http_cache import HttpCache
+from mcp.transport.scheduler import RateLimitScheduler
+
+# Confluence caps page size lower when bodies are expanded.
+BODY_PAGE_SIZE = 50
+VERSION_PAGE_SIZE = 200
+
 
 class ConfluenceClient:
     """Minimal Confluence REST client with retry/backoff."""
 
-    def __init__(self, base_url: str | None, token: str | None) -> None:
+    def __init__(
+        self,
+        base_url: str | None,
+        token: str | None,
+        cache: Optional[HttpCache] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/") if base_url else None
+        self.cache = cache
+        self.scheduler = scheduler or RateLimitScheduler()
         self.session = requests.Session()
         if token:
             self.session.headers.update({"Authorization": f"Bearer {token}"})
@@ -22,24 +37,69 @@ class ConfluenceClient:
         if not self.base_url:
             return []
         url = f"{self.base_url}{path}"
-        for attempt in range(3):
-            response = self.session.request(method, url, params=params, timeout=20)
-            if response.status_code in {429, 500, 502, 503, 504} and attempt < 2:
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            response.raise_for_status()
-            return response.json()
+        response = self.scheduler.send(self.session, url, lambda: self._send(method, url, params))
         response.raise_for_status()
+        return response.json()
+
+    def _send(
+        self, method: str, url: str, params: Optional[Dict[str, Any]] = None
+    ) -> requests.Response:
+        if method == "GET" and self.cache is not None:
+            return self.cache.get(self.session, url, params=params, timeout=20)
+        return self.session.request(method, url, params=params, timeout=20)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return conditional-request cache counters, or an empty dict when caching is off."""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Return the scheduler's last known quota and parallelism per host."""
+        return self.scheduler.stats()
 
     def list_pages(self, space_key: str) -> List[Dict[str, Any]]:
-        data = self._request(
-            "GET",
-            "/rest/api/content",
-            params={"spaceKey": space_key, "limit": 50, "expand": "body.storage,version"},
-        )
-        pages = data.get("results", []) if isinstance(data, dict) else []
+        pages = self._list_content(space_key, "body.storage,version", BODY_PAGE_SIZE)
         return [self._page_to_meta(page) for page in pages]
 
+    def list_page_versions(self, space_key: str) -> Dict[str, int]:
+        """Return ``{page_id: version number}`` for every page in a space, without bodies."""
+        pages = self._list_content(space_key, "version", VERSION_PAGE_SIZE)
+        return {str(page.get("id")): page.get("version", {}).get("number") for page in pages}
+
+    def get_pages(self, page_ids: List[str]) -> Dict[str, Any]:
+        """Fetch page bodies concurrently, in ``page_ids`` order, collecting per-page failures."""
+        pages: List[Dict[str, Any]] = []
+        failures: List[Dict[str, str]] = []
+        if not page_ids:
+            return {"pages": pages, "failed": failures}
+        workers = min(len(page_ids), self.scheduler.max_concurrency)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="confluence-page") as pool:
+            futures = [pool.submit(self.get_page_content, page_id) for page_id in page_ids]
+            for page_id, future in zip(page_ids, futures):
+                try:
+                    pages.append(future.result())
+                except requests.RequestException as exc:
+                    failures.append({"id": page_id, "error": str(exc)})
+        return {"pages": pages, "failed": failures}
+
+    def _list_content(self, space_key: str, expand: str, limit: int) -> List[Dict[str, Any]]:
+        """Page through a space's pages until a short page comes back."""
+        results: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            params = {
+                "spaceKey": space_key,
+                "type": "page",
+                "start": start,
+                "limit": limit,
+                "expand": expand,
+            }
+            data = self._request("GET", "/rest/api/content", params=params)
+            batch = data.get("results", []) if isinstance(data, dict) else []
+            results.extend(batch)
+            if not batch or not data.get("_links", {}).get("next"):
+                return results
+            start += len(batch)
+
     def get_page_content(self, page_id: str) -> Dict[str, Any]:
         page = self._request("GET", f"/rest/api/content/{page_id}", params={"expand": "body.storage,version"})
         return self._page_to_meta(page)
@@ -50,5 +110,6 @@ class ConfluenceClient:
             "id": page.get("id"),
             "title": page.get("title"),
             "body": body.get("value"),
+            "version": page.get("version", {}).get("number") if isinstance(page, dict) else None,
             "url": f"{self.base_url}/pages/viewpage.action?pageId={page.get('id')}" if self.base_url else None,
         }
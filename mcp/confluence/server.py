@@ -6,13 +6,28 @@ from typing import Any, Dict, List
 
 from apps.api.config import CONFIG
 from mcp.confluence.confluence_client import ConfluenceClient
+from mcp.transport.http_cache import http_cache
+from mcp.transport.scheduler import rate_limit_scheduler
 
 
 class ConfluenceMCPServer:
     """Provides declarative, read-only Confluence tools."""
 
     def __init__(self) -> None:
-        self._client = ConfluenceClient(CONFIG.confluence_base_url, CONFIG.confluence_token)
+        self._client = ConfluenceClient(
+            CONFIG.confluence_base_url,
+            CONFIG.confluence_token,
+            cache=http_cache(
+                CONFIG.http_cache_path, CONFIG.http_cache_max_age, CONFIG.http_cache_max_bytes
+            ),
+            scheduler=rate_limit_scheduler(
+                CONFIG.mcp_rate_limit_rps,
+                CONFIG.mcp_rate_limit_burst,
+                CONFIG.mcp_max_concurrency,
+                CONFIG.mcp_rate_limit_reserve,
+                CONFIG.mcp_max_retries,
+            ),
+        )
 
     def handle(self, tool_name: str, payload: Dict[str, Any]) -> Any:
         """Handle MCP tool requests."""
@@ -20,6 +35,14 @@ class ConfluenceMCPServer:
             return self.list_pages(payload.get("space_key"))
         if tool_name == "get_page_content":
             return self.get_page_content(payload.get("page_id"))
+        if tool_name == "list_page_versions":
+            return self.list_page_versions(payload.get("space_key"))
+        if tool_name == "get_pages":
+            return self.get_pages(payload.get("page_ids") or [])
+        if tool_name == "cache_stats":
+            return self._client.cache_stats()
+        if tool_name == "rate_limit_stats":
+            return self._client.rate_limit_stats()
         raise ValueError(f"Unknown Confluence tool: {tool_name}")
 
     def list_pages(self, space_key: str | None) -> List[Dict[str, Any]]:
@@ -28,6 +51,16 @@ class ConfluenceMCPServer:
             return []
         return self._client.list_pages(space_key)
 
+    def list_page_versions(self, space_key: str | None) -> Dict[str, int]:
+        """Return the current version number of every page in a space."""
+        if not space_key:
+            return {}
+        return self._client.list_page_versions(space_key)
+
+    def get_pages(self, page_ids: List[str]) -> Dict[str, Any]:
+        """Return the bodies of the given pages and any per-page failures."""
+        return self._client.get_pages(page_ids)
+
     def get_page_content(self, page_id: str | None) -> Dict[str, Any]:
         """Return a Confluence page."""
         if not page_id:
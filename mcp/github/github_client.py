@@ -2,19 +2,40 @@
 
 from __future__ import annotations
 
+import base64
 import logging
-import time
-from typing import Any, Dict, List, Optional
+import tarfile
+from typing import Any, Dict, Iterable, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from mcp.transport.http_cache import HttpCache
+from mcp.transport.scheduler import RateLimitScheduler
+
+# The compare API lists at most this many changed files.
+COMPARE_FILE_LIMIT = 300
 
 
 class GitHubClient:
     """Minimal GitHub REST client with retry and metadata enrichment."""
 
-    def __init__(self, token: Optional[str] = None) -> None:
-        self.base_url = "https://api.github.com"
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        pool_size: int = 10,
+        base_url: str = "https://api.github.com",
+        cache: Optional[HttpCache] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.scheduler = scheduler or RateLimitScheduler()
         self.session = requests.Session()
+        # One pooled connection per concurrent fetch worker.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         if token:
             self.session.headers.update({"Authorization": f"token {token}"})
         self.session.headers.update({"Accept": "application/vnd.github+json"})
@@ -24,16 +45,25 @@ class GitHubClient:
 
     def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
         url = f"{self.base_url}{path}"
-        retries = 3
-        for attempt in range(retries):
-            response = self.session.request(method, url, params=params, timeout=20)
-            self.logger.info("GitHub request %s %s -> %s", method, path, response.status_code)
-            if response.status_code in {429, 500, 502, 503, 504} and attempt < retries - 1:
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            response.raise_for_status()
-            return response.json()
+        response = self.scheduler.send(self.session, url, lambda: self._send(method, url, params))
+        self.logger.info("GitHub request %s %s -> %s", method, path, response.status_code)
         response.raise_for_status()
+        return response.json()
+
+    def _send(
+        self, method: str, url: str, params: Optional[Dict[str, Any]] = None
+    ) -> requests.Response:
+        if method == "GET" and self.cache is not None:
+            return self.cache.get(self.session, url, params=params, timeout=20)
+        return self.session.request(method, url, params=params, timeout=20)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return conditional-request cache counters, or an empty dict when caching is off."""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Return the scheduler's last known quota and parallelism per host."""
+        return self.scheduler.stats()
 
     def list_repos(self, owner: Optional[str] = None, repo_type: str = "all") -> List[Dict[str, Any]]:
         """List repositories for a user or organization."""
@@ -98,7 +128,9 @@ class GitHubClient:
         download_url = item.get("download_url")
         text = ""
         if download_url:
-            raw_resp = self.session.get(download_url, timeout=20)
+            raw_resp = self.scheduler.send(
+                self.session, download_url, lambda: self._send("GET", download_url)
+            )
             raw_resp.raise_for_status()
             text = raw_resp.text
 
@@ -125,3 +157,98 @@ class GitHubClient:
     def get_file_at_commit(self, owner: str, repo: str, path: str, commit_id: str) -> Dict[str, Any]:
         """Return raw file content at a specific commit."""
         return self.get_file_content(owner, repo, path, ref=commit_id)
+
+    def get_repo_tree(self, owner: str, repo: str, ref: Optional[str] = None) -> Dict[str, Any]:
+        """Resolve ``ref`` (default branch head) to a commit and list its whole tree.
+
+        Trees too large for one recursive listing are listed subtree by subtree;
+        ``truncated`` is only set if a single directory still exceeds GitHub's limit.
+        """
+        if not ref:
+            ref = self._request("GET", f"/repos/{owner}/{repo}").get("default_branch") or "HEAD"
+        commit = self._request("GET", f"/repos/{owner}/{repo}/commits/{ref}")
+        items: List[Dict[str, Any]] = []
+        truncated = self._list_tree(owner, repo, commit["commit"]["tree"]["sha"], "", items)
+        if truncated:
+            self.logger.warning("GitHub tree for %s/%s@%s is truncated", owner, repo, ref)
+        return {"ref": ref, "commit": commit["sha"], "truncated": truncated, "items": items}
+
+    def _list_tree(
+        self, owner: str, repo: str, sha: str, prefix: str, items: List[Dict[str, Any]]
+    ) -> bool:
+        """Append the blobs under tree ``sha`` to ``items``; return True if any were left out."""
+        path = f"/repos/{owner}/{repo}/git/trees/{sha}"
+        tree = self._request("GET", path, params={"recursive": "1"})
+        if not tree.get("truncated"):
+            items.extend(
+                {"path": prefix + item["path"], "sha": item["sha"], "size": item.get("size")}
+                for item in tree.get("tree", [])
+                if item.get("type") == "blob"
+            )
+            return False
+        level = self._request("GET", path)
+        truncated = bool(level.get("truncated"))
+        for item in level.get("tree", []):
+            if item.get("type") == "blob":
+                items.append(
+                    {"path": prefix + item["path"], "sha": item["sha"], "size": item.get("size")}
+                )
+            elif item.get("type") == "tree":
+                subtree = f"{prefix}{item['path']}/"
+                truncated = self._list_tree(owner, repo, item["sha"], subtree, items) or truncated
+        return truncated
+
+    def get_blob(self, owner: str, repo: str, sha: str) -> str:
+        """Return a blob's content decoded as UTF-8."""
+        blob = self._request("GET", f"/repos/{owner}/{repo}/git/blobs/{sha}")
+        if blob.get("encoding") == "base64":
+            return base64.b64decode(blob.get("content", "")).decode("utf-8", errors="replace")
+        return blob.get("content", "")
+
+    def get_archive(
+        self, owner: str, repo: str, commit: str, paths: Iterable[str]
+    ) -> Dict[str, str]:
+        """Stream the tarball of ``commit`` once and return the text of ``paths``."""
+        wanted = set(paths)
+        url = f"{self.base_url}/repos/{owner}/{repo}/tarball/{commit}"
+        files: Dict[str, str] = {}
+        response = self.scheduler.send(
+            self.session, url, lambda: self.session.get(url, stream=True, timeout=60)
+        )
+        with response:
+            self.logger.info("GitHub request GET %s -> %s", url, response.status_code)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+                for member in archive:
+                    # Members are prefixed with a "<owner>-<repo>-<sha>/" directory.
+                    path = member.name.split("/", 1)[-1]
+                    if not member.isfile() or path not in wanted:
+                        continue
+                    handle = archive.extractfile(member)
+                    if handle is not None:
+                        files[path] = handle.read().decode("utf-8", errors="replace")
+        return files
+
+    def compare_commits(self, owner: str, repo: str, base: str, head: str) -> Dict[str, Any]:
+        """Return the files changed between ``base`` and ``head``.
+
+        ``complete`` is false when GitHub truncated the file list or ``head``
+        does not descend from ``base`` (e.g. after a force push), in which case
+        the diff cannot be applied on top of ``base``.
+        """
+        data = self._request("GET", f"/repos/{owner}/{repo}/compare/{base}...{head}")
+        files = data.get("files") or []
+        applicable = data.get("status") in {"ahead", "identical"}
+        return {
+            "status": data.get("status"),
+            "complete": applicable and len(files) < COMPARE_FILE_LIMIT,
+            "files": [
+                {
+                    "path": item.get("filename"),
+                    "status": item.get("status"),
+                    "previous_path": item.get("previous_filename"),
+                }
+                for item in files
+            ],
+        }
@@ -6,13 +6,29 @@ from typing import Any, Dict
 
 from apps.api.config import CONFIG
 from mcp.github.github_client import GitHubClient
+from mcp.transport.http_cache import http_cache
+from mcp.transport.scheduler import rate_limit_scheduler
 
 
 class GitHubMCPServer:
     """Declarative GitHub MCP tools."""
 
     def __init__(self) -> None:
-        self.client = GitHubClient(CONFIG.github_token)
+        self.client = GitHubClient(
+            CONFIG.github_token,
+            pool_size=max(10, CONFIG.ingest_concurrency),
+            base_url=CONFIG.github_api_url,
+            cache=http_cache(
+                CONFIG.http_cache_path, CONFIG.http_cache_max_age, CONFIG.http_cache_max_bytes
+            ),
+            scheduler=rate_limit_scheduler(
+                CONFIG.mcp_rate_limit_rps,
+                CONFIG.mcp_rate_limit_burst,
+                CONFIG.mcp_max_concurrency,
+                CONFIG.mcp_rate_limit_reserve,
+                CONFIG.mcp_max_retries,
+            ),
+        )
 
     def handle(self, tool_name: str, payload: Dict[str, Any]) -> Any:
         if tool_name == "list_repos":
@@ -38,6 +54,22 @@ class GitHubMCPServer:
                 payload["path"],
                 payload["commit_id"],
             )
+        if tool_name == "get_repo_tree":
+            return self.client.get_repo_tree(payload["owner"], payload["repo"], payload.get("ref"))
+        if tool_name == "get_blob":
+            return self.client.get_blob(payload["owner"], payload["repo"], payload["sha"])
+        if tool_name == "cache_stats":
+            return self.client.cache_stats()
+        if tool_name == "rate_limit_stats":
+            return self.client.rate_limit_stats()
+        if tool_name == "compare_commits":
+            return self.client.compare_commits(
+                payload["owner"], payload["repo"], payload["base"], payload["head"]
+            )
+        if tool_name == "get_archive":
+            return self.client.get_archive(
+                payload["owner"], payload["repo"], payload["commit"], payload["paths"]
+            )
         raise ValueError(f"Unknown GitHub tool: {tool_name}")
 
     def list_repos(self, owner: str | None = None, repo_type: str = "all") -> Any:
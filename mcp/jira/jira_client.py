@@ -2,52 +2,139 @@
 
 from __future__ import annotations
 
-import time
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 import requests
 
+from mcp.transport.http_cache import HttpCache
+from mcp.transport.scheduler import RateLimitScheduler
+
+PAGE_SIZE = 100
+# Only the fields that end up in the index.
+INDEX_FIELDS = "summary,description,updated"
+# Jira compares ``updated`` at minute precision in the user's time zone, so
+# incremental queries use a relative window widened by this margin.
+SYNC_MARGIN_MINUTES = 5
+JIRA_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def parse_updated(value: str) -> datetime:
+    """Parse Jira's ``2024-01-31T09:15:00.000+0000`` timestamps."""
+    return datetime.strptime(value, JIRA_TIME_FORMAT)
+
 
 class JiraClient:
     """Minimal Jira REST client with retry/backoff."""
 
-    def __init__(self, base_url: str | None, token: str | None) -> None:
+    def __init__(
+        self,
+        base_url: str | None,
+        token: str | None,
+        cache: Optional[HttpCache] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/") if base_url else None
+        self.cache = cache
+        self.scheduler = scheduler or RateLimitScheduler()
         self.session = requests.Session()
         if token:
             self.session.headers.update({"Authorization": f"Bearer {token}"})
         self.session.headers.update({"Accept": "application/json"})
 
-    def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    def _request(
+        self, method: str, path: str, params: Optional[Dict[str, Any]] = None, cache: bool = True
+    ) -> Any:
         if not self.base_url:
             return []
         url = f"{self.base_url}{path}"
-        for attempt in range(3):
-            response = self.session.request(method, url, params=params, timeout=20)
-            if response.status_code in {429, 500, 502, 503, 504} and attempt < 2:
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            response.raise_for_status()
-            return response.json()
+        response = self.scheduler.send(
+            self.session, url, lambda: self._send(method, url, params, cache)
+        )
         response.raise_for_status()
+        return response.json()
+
+    def _send(
+        self, method: str, url: str, params: Optional[Dict[str, Any]] = None, cache: bool = True
+    ) -> requests.Response:
+        if method == "GET" and self.cache is not None:
+            return self.cache.get(self.session, url, params=params, timeout=20, store=cache)
+        return self.session.request(method, url, params=params, timeout=20)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return conditional-request cache counters, or an empty dict when caching is off."""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Return the scheduler's last known quota and parallelism per host."""
+        return self.scheduler.stats()
 
     def list_issues(self, project_key: str) -> List[Dict[str, Any]]:
-        data = self._request(
-            "GET",
-            "/rest/api/3/search",
-            params={"jql": f"project={project_key}", "maxResults": 50},
-        )
-        issues = data.get("issues", []) if isinstance(data, dict) else []
-        return [self._issue_to_meta(issue) for issue in issues]
+        return self._search(f"project={project_key}")
+
+    def sync_issues(self, project_key: str, updated_since: Optional[str] = None) -> Dict[str, Any]:
+        """Return every issue of a project, or only those updated at or after ``updated_since``.
+
+        ``updated_since`` is the ``last_updated`` cursor of a previous sync: the
+        time that sync started. Issues edited while a sync runs are therefore
+        fetched again by the next one, whichever page they were on. Pages are
+        ordered by key, which edits do not change, so concurrent windows do not
+        shift under them.
+        """
+        started = datetime.now(timezone.utc)
+        jql = f'project = "{project_key}"'
+        if updated_since:
+            elapsed = datetime.now(timezone.utc) - parse_updated(updated_since)
+            minutes = max(0, math.ceil(elapsed.total_seconds() / 60)) + SYNC_MARGIN_MINUTES
+            jql += f" AND updated >= -{minutes}m"
+        # A relative window never produces the same request twice, so it is not cached.
+        issues = self._search(f"{jql} ORDER BY key ASC", cache=not updated_since)
+        return {"issues": issues, "last_updated": started.strftime(JIRA_TIME_FORMAT)}
+
+    def _search(
+        self, jql: str, max_results: Optional[int] = None, cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Page through a JQL search, fetching the remaining ``startAt`` windows concurrently."""
+        page_size = min(PAGE_SIZE, max_results or PAGE_SIZE)
+
+        def page(start_at: int) -> Dict[str, Any]:
+            params = {
+                "jql": jql,
+                "startAt": start_at,
+                "maxResults": page_size,
+                "fields": INDEX_FIELDS,
+            }
+            data = self._request("GET", "/rest/api/3/search", params=params, cache=cache)
+            return data if isinstance(data, dict) else {}
+
+        first = page(0)
+        total = first.get("total", 0)
+        if max_results is not None:
+            total = min(total, max_results)
+        # The server may cap maxResults below what we asked for.
+        step = first.get("maxResults") or page_size
+        pages = [first]
+        starts = range(step, total, step) if first.get("issues") else range(0)
+        if starts:
+            workers = min(len(starts), self.scheduler.max_concurrency)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jira-page") as pool:
+                pages.extend(pool.map(page, starts))
+        issues: Dict[str, Dict[str, Any]] = {}
+        for data in pages:
+            for issue in data.get("issues", []):
+                # Windows fetched while issues change can overlap.
+                issues.setdefault(issue.get("key"), self._issue_to_meta(issue))
+        results = list(issues.values())
+        return results[:max_results] if max_results is not None else results
 
     def get_issue(self, issue_key: str) -> Dict[str, Any]:
         issue = self._request("GET", f"/rest/api/3/issue/{issue_key}")
         return self._issue_to_meta(issue)
 
-    def search_issues(self, jql: str) -> List[Dict[str, Any]]:
-        data = self._request("GET", "/rest/api/3/search", params={"jql": jql, "maxResults": 50})
-        issues = data.get("issues", []) if isinstance(data, dict) else []
-        return [self._issue_to_meta(issue) for issue in issues]
+    def search_issues(self, jql: str, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._search(jql, max_results)
 
     def _issue_to_meta(self, issue: Dict[str, Any]) -> Dict[str, Any]:
         fields = issue.get("fields", {}) if isinstance(issue, dict) else {}
@@ -55,5 +142,6 @@ class JiraClient:
             "key": issue.get("key"),
             "summary": fields.get("summary"),
             "description": fields.get("description"),
+            "updated": fields.get("updated"),
             "url": f"{self.base_url}/browse/{issue.get('key')}" if self.base_url else None,
         }
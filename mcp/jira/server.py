@@ -6,13 +6,28 @@ from typing import Any, Dict, List
 
 from apps.api.config import CONFIG
 from mcp.jira.jira_client import JiraClient
+from mcp.transport.http_cache import http_cache
+from mcp.transport.scheduler import rate_limit_scheduler
 
 
 class JiraMCPServer:
     """Provides declarative, read-only Jira tools."""
 
     def __init__(self) -> None:
-        self._client = JiraClient(CONFIG.jira_base_url, CONFIG.jira_token)
+        self._client = JiraClient(
+            CONFIG.jira_base_url,
+            CONFIG.jira_token,
+            cache=http_cache(
+                CONFIG.http_cache_path, CONFIG.http_cache_max_age, CONFIG.http_cache_max_bytes
+            ),
+            scheduler=rate_limit_scheduler(
+                CONFIG.mcp_rate_limit_rps,
+                CONFIG.mcp_rate_limit_burst,
+                CONFIG.mcp_max_concurrency,
+                CONFIG.mcp_rate_limit_reserve,
+                CONFIG.mcp_max_retries,
+            ),
+        )
 
     def handle(self, tool_name: str, payload: Dict[str, Any]) -> Any:
         """Handle MCP tool requests."""
@@ -22,6 +37,12 @@ class JiraMCPServer:
             return self.get_issue(payload.get("issue_key"))
         if tool_name == "search_issues":
             return self.search_issues(payload.get("query"))
+        if tool_name == "sync_issues":
+            return self.sync_issues(payload.get("project_key"), payload.get("updated_since"))
+        if tool_name == "cache_stats":
+            return self._client.cache_stats()
+        if tool_name == "rate_limit_stats":
+            return self._client.rate_limit_stats()
         raise ValueError(f"Unknown Jira tool: {tool_name}")
 
     def list_issues(self, project_key: str | None) -> List[Dict[str, Any]]:
@@ -30,6 +51,12 @@ class JiraMCPServer:
             return []
         return self._client.list_issues(project_key)
 
+    def sync_issues(self, project_key: str | None, updated_since: str | None) -> Dict[str, Any]:
+        """Return a project's issues, or only those updated since the last sync."""
+        if not project_key:
+            return {"issues": [], "last_updated": None}
+        return self._client.sync_issues(project_key, updated_since)
+
     def get_issue(self, issue_key: str | None) -> Dict[str, Any]:
         """Return a Jira issue."""
         if not issue_key:
@@ -0,0 +1,124 @@
+"""Read-only access to local clones and bare repositories through git plumbing."""
+
+from __future__ import annotations
+
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+STATUSES = {
+    "A": "added",
+    "M": "modified",
+    "D": "removed",
+    "R": "renamed",
+    "C": "copied",
+    "T": "modified",
+}
+
+
+class LocalGitClient:
+    """Reads trees, diffs and blobs of repositories under the allowed roots.
+
+    Blob contents are streamed from a single ``git cat-file --batch`` process,
+    so a full ingest is bounded by disk speed rather than per-file process or
+    HTTP overhead.
+    """
+
+    def __init__(self, roots: Iterable[str]) -> None:
+        self.roots = [Path(root).resolve() for root in roots if root]
+
+    def get_repo_tree(self, path: str, ref: Optional[str] = None) -> Dict[str, Any]:
+        """Resolve ``ref`` (default ``HEAD``) to a commit and list every blob in its tree."""
+        repo = self._repo(path)
+        revision = f"{ref or 'HEAD'}^{{commit}}"
+        commit = self._git(repo, "rev-parse", "--verify", revision).decode().strip()
+        items: List[Dict[str, Any]] = []
+        listing = self._git(repo, "ls-tree", "-r", "-z", "-l", "--full-tree", commit)
+        for entry in listing.split(b"\0"):
+            if not entry:
+                continue
+            meta, item_path = entry.split(b"\t", 1)
+            _, kind, sha, size = meta.decode().split()
+            if kind == "blob":
+                name = item_path.decode("utf-8", errors="replace")
+                items.append({"path": name, "sha": sha, "size": int(size)})
+        return {"ref": ref or "HEAD", "commit": commit, "truncated": False, "items": items}
+
+    def compare_commits(self, path: str, base: str, head: str) -> Dict[str, Any]:
+        """Return the files changed between two commits, shaped like the GitHub compare tool."""
+        repo = self._repo(path)
+        ahead = subprocess.run(
+            ["git", "-C", str(repo), "merge-base", "--is-ancestor", base, head], capture_output=True
+        ).returncode == 0
+        status = "identical" if base == head else ("ahead" if ahead else "diverged")
+        diff = self._git(repo, "diff", "--name-status", "-z", "-M", base, head)
+        fields = diff.decode().split("\0")
+        files: List[Dict[str, Any]] = []
+        position = 0
+        while position < len(fields) and fields[position]:
+            code = fields[position]
+            if code[0] in "RC":
+                previous, current = fields[position + 1], fields[position + 2]
+                position += 3
+            else:
+                previous, current = None, fields[position + 1]
+                position += 2
+            status_name = STATUSES.get(code[0], "modified")
+            files.append({"path": current, "status": status_name, "previous_path": previous})
+        return {"status": status, "complete": status in {"ahead", "identical"}, "files": files}
+
+    def get_archive(self, path: str, commit: str, paths: Iterable[str]) -> Dict[str, str]:
+        """Return the text of ``paths`` at ``commit``, read in one ``cat-file --batch`` pass."""
+        repo = self._repo(path)
+        wanted = [item for item in paths if "\n" not in item]
+        process = subprocess.Popen(
+            ["git", "-C", str(repo), "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+        def feed() -> None:
+            # Written from a thread so a full stdout pipe cannot deadlock us.
+            try:
+                for item in wanted:
+                    process.stdin.write(f"{commit}:{item}\n".encode("utf-8"))
+            finally:
+                process.stdin.close()
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        files: Dict[str, str] = {}
+        try:
+            for item in wanted:
+                header = process.stdout.readline().split()
+                if len(header) != 3:
+                    # "<object> missing" or "ambiguous": nothing follows the header.
+                    continue
+                content = process.stdout.read(int(header[2]) + 1)[:-1]
+                if header[1] == b"blob":
+                    files[item] = content.decode("utf-8", errors="replace")
+        finally:
+            writer.join()
+            process.stdout.close()
+            process.wait()
+        return files
+
+    def _repo(self, path: str) -> Path:
+        if not self.roots:
+            raise ValueError("Local git ingestion is disabled; set LOCAL_GIT_ROOTS")
+        repo = Path(path).resolve()
+        if not any(repo == root or root in repo.parents for root in self.roots):
+            raise ValueError(f"Repository path is outside LOCAL_GIT_ROOTS: {path}")
+        if not repo.is_dir():
+            raise FileNotFoundError(f"Repository not found: {path}")
+        return repo
+
+    @staticmethod
+    def _git(repo: Path, *args: str) -> bytes:
+        result = subprocess.run(["git", "-C", str(repo), *args], capture_output=True)
+        if result.returncode != 0:
+            error = result.stderr.decode(errors="replace").strip()
+            raise RuntimeError(f"git {args[0]} failed: {error}")
+        return result.stdout
@@ -0,0 +1,25 @@
+"""Local git MCP server (read-only)."""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict
+
+from apps.api.config import CONFIG
+from mcp.local_git.git_client import LocalGitClient
+
+
+class LocalGitMCPServer:
+    """Declarative tools over local clones, shaped like the GitHub tree tools."""
+
+    def __init__(self) -> None:
+        self.client = LocalGitClient(CONFIG.local_git_roots.split(os.pathsep))
+
+    def handle(self, tool_name: str, payload: Dict[str, Any]) -> Any:
+        if tool_name == "get_repo_tree":
+            return self.client.get_repo_tree(payload["path"], payload.get("ref"))
+        if tool_name == "compare_commits":
+            return self.client.compare_commits(payload["path"], payload["base"], payload["head"])
+        if tool_name == "get_archive":
+            return self.client.get_archive(payload["path"], payload["commit"], payload["paths"])
+        raise ValueError(f"Unknown local git tool: {tool_name}")
@@ -0,0 +1,234 @@
+"""Persistent conditional-request (ETag / Last-Modified) cache for MCP HTTP clients."""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import requests
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction frees down to this share of ``max_bytes`` so it does not run on every store.
+EVICT_TO = 0.9
+# Bodies above this share of ``max_bytes`` are not stored, so one download cannot flush the cache.
+MAX_ENTRY_SHARE = 0.25
+
+
+def _freshness(response: requests.Response, limit: float) -> float:
+    """Seconds the response may be reused without revalidation, capped at ``limit``."""
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    if limit <= 0 or "no-cache" in cache_control or "no-store" in cache_control:
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    return min(float(match.group(1)), limit) if match else 0.0
+
+
+class HttpCache:
+    """SQLite store of GET response bodies and their validators.
+
+    Stored responses are revalidated with ``If-None-Match`` /
+    ``If-Modified-Since`` so unchanged resources come back as ``304``, which
+    GitHub does not count against the rate limit. With ``max_age`` > 0 they
+    are also reused without a request while ``Cache-Control: max-age`` (capped
+    at ``max_age`` seconds) says they are fresh. Keys include the session's
+    credentials, so tokens never share entries.
+
+    Stored bodies are bounded by ``max_bytes``; the least recently used
+    entries are evicted first.
+    """
+
+    def __init__(self, path: str, max_age: float = 0.0, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key BLOB PRIMARY KEY, etag TEXT, last_modified TEXT, expires REAL NOT NULL, "
+            "encoding TEXT, body BLOB NOT NULL, size INTEGER NOT NULL DEFAULT 0, "
+            "used REAL NOT NULL DEFAULT 0) WITHOUT ROWID"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "size" not in columns:
+            # Caches written before eviction existed.
+            self._conn.execute("ALTER TABLE responses ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("ALTER TABLE responses ADD COLUMN used REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE responses SET size = length(body)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+        self._conn.commit()
+        self._bytes = self._total_bytes()
+        self._lock = threading.Lock()
+        self._counts: collections.Counter = collections.Counter()
+        if self._bytes > self.max_bytes:
+            with self._lock:
+                self._evict()
+
+    def get(
+        self,
+        session: requests.Session,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 20,
+        store: bool = True,
+    ) -> requests.Response:
+        """GET ``url`` through the cache; a revalidated ``304`` is returned as the stored ``200``.
+
+        ``store=False`` is for requests whose key can never repeat (e.g. a
+        query embedding the current time); they bypass the cache entirely.
+        """
+        host = urlsplit(url).netloc
+        if not store:
+            self._count(host, "bypassed")
+            return session.get(url, params=params, timeout=timeout)
+        key = self._key(session, url, params)
+        entry = self._load(key)
+        if entry is not None and entry[2] > time.time():
+            self._count(host, "hits")
+            self._touch(key, entry[2])
+            return self._replay(url, entry)
+        headers = {}
+        if entry is not None:
+            etag, last_modified = entry[0], entry[1]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = session.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry is not None:
+            self._count(host, "not_modified")
+            self._touch(key, time.time() + _freshness(response, self.max_age))
+            return self._replay(url, entry, response)
+        self._count(host, "misses")
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        fresh_for = _freshness(response, self.max_age)
+        if response.status_code == 200 and (etag or last_modified or fresh_for):
+            self._store(key, etag, last_modified, time.time() + fresh_for, response)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit / 304 / miss counts overall and per host."""
+        with self._lock:
+            counts = dict(self._counts)
+        totals: collections.Counter = collections.Counter()
+        by_host: Dict[str, Dict[str, int]] = {}
+        for (host, outcome), count in counts.items():
+            totals[outcome] += count
+            by_host.setdefault(host, {})[outcome] = count
+        return {
+            "hits": totals["hits"],
+            "not_modified": totals["not_modified"],
+            "misses": totals["misses"],
+            "bypassed": totals["bypassed"],
+            "bytes": self._bytes,
+            "by_host": by_host,
+        }
+
+    @staticmethod
+    def _key(session: requests.Session, url: str, params: Optional[Dict[str, Any]]) -> bytes:
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        credentials = session.headers.get("Authorization", "")
+        accept = session.headers.get("Accept", "")
+        return hashlib.sha256(f"{credentials}\n{accept}\n{url}?{query}".encode("utf-8")).digest()
+
+    @staticmethod
+    def _replay(
+        url: str, entry: Tuple[Any, ...], response: Optional[requests.Response] = None
+    ) -> requests.Response:
+        replayed = response if response is not None else requests.Response()
+        replayed.status_code = 200
+        replayed.url = replayed.url or url
+        replayed.encoding = entry[3]
+        replayed._content = entry[4]
+        return replayed
+
+    def _count(self, host: str, outcome: str) -> None:
+        with self._lock:
+            self._counts[(host, outcome)] += 1
+
+    def _load(self, key: bytes) -> Optional[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, expires, encoding, body FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+    def _store(
+        self,
+        key: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        expires: float,
+        response: requests.Response,
+    ) -> None:
+        body = response.content
+        if len(body) > self.max_bytes * MAX_ENTRY_SHARE:
+            return
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    etag,
+                    last_modified,
+                    expires,
+                    response.encoding,
+                    body,
+                    len(body),
+                    time.time(),
+                ),
+            )
+            self._bytes += len(body) - (previous[0] if previous else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _touch(self, key: bytes, expires: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires = ?, used = ? WHERE key = ?",
+                (expires, time.time(), key),
+            )
+            self._conn.commit()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is under ``EVICT_TO`` of budget."""
+        # Other processes share the file, so start from the real total.
+        self._bytes = self._total_bytes()
+        excess = self._bytes - int(self.max_bytes * EVICT_TO)
+        if excess <= 0:
+            return
+        victims, freed = [], 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY used"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._conn.commit()
+        self._bytes -= freed
+
+
+@lru_cache(maxsize=None)
+def http_cache(
+    path: Optional[str], max_age: float = 0.0, max_bytes: int = DEFAULT_MAX_BYTES
+) -> Optional[HttpCache]:
+    """Return the process-wide cache for ``path``, or None when caching is disabled."""
+    return HttpCache(path, max_age, max_bytes) if path else None
@@ -0,0 +1,231 @@
+"""Rate-limit-aware request scheduling shared by the MCP HTTP clients."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import random
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def _reset_epoch(value: str) -> Optional[float]:
+    """Parse ``X-RateLimit-Reset`` as epoch seconds (GitHub) or an ISO timestamp (Atlassian)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _rate_limited(response: requests.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    # GitHub answers exhausted primary and secondary limits with 403.
+    return response.status_code == 403 and (
+        response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+    )
+
+
+class _Budget:
+    """Token bucket plus server-reported quota for one host and credential."""
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, reserve: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.reserve = reserve
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.in_flight = 0
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; return the seconds spent queued."""
+        started = time.monotonic()
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_seconds(now)
+                if wait <= 0:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    return now - started
+                self.condition.wait(timeout=wait if math.isfinite(wait) else None)
+
+    def release(self) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def observe(self, response: requests.Response, attempt: int) -> float:
+        """Record quota headers and return how long the host asked us to back off."""
+        headers = response.headers
+        backoff = 0.0
+        with self.condition:
+            if headers.get("X-RateLimit-Limit", "").isdigit():
+                self.limit = int(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Remaining", "").isdigit():
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Reset"):
+                reset = _reset_epoch(headers["X-RateLimit-Reset"])
+                if reset is not None:
+                    self.reset_at = time.monotonic() + max(0.0, reset - time.time())
+            if _rate_limited(response) or response.status_code in RETRYABLE_STATUS:
+                backoff = _retry_after(response)
+                if backoff is None and self.remaining == 0 and self.reset_at is not None:
+                    backoff = self.reset_at - time.monotonic()
+                if backoff is None:
+                    backoff = min(MAX_BACKOFF_SECONDS, 1.5 * 2**attempt) * random.uniform(0.5, 1.0)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + backoff)
+            self.condition.notify_all()
+        return backoff
+
+    def concurrency(self) -> int:
+        """Scale parallelism down as the remaining quota approaches the reserve."""
+        if self.remaining is None or not self.limit:
+            return self.max_concurrency
+        reserve = self._reserve()
+        share = max(0, self.remaining - reserve) / max(1, self.limit - reserve)
+        return max(1, math.ceil(self.max_concurrency * share))
+
+    def _wait_seconds(self, now: float) -> float:
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.remaining is not None and self.remaining <= self._reserve():
+            if self.reset_at is not None and now < self.reset_at:
+                return self.reset_at - now
+            # The window has reset; the next response reports the new quota.
+            self.remaining = None
+        if self.in_flight >= self.concurrency():
+            return math.inf
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self._rate(now))
+        self.refilled = now
+        if self.tokens < 1:
+            return (1 - self.tokens) / self._rate(now)
+        return 0.0
+
+    def _reserve(self) -> int:
+        # Small quotas (e.g. search endpoints) keep a proportionally small reserve.
+        return min(self.reserve, self.limit // 10) if self.limit else self.reserve
+
+    def _rate(self, now: float) -> float:
+        """Configured rate, slowed so the remaining quota lasts until the window resets."""
+        if self.remaining is None or self.reset_at is None or self.reset_at <= now:
+            return self.rate
+        spendable = max(1, self.remaining - self._reserve())
+        return max(min(self.rate, spendable / (self.reset_at - now)), 1e-3)
+
+
+class RateLimitScheduler:
+    """Paces requests per (host, credential) and retries rate-limited or failed ones.
+
+    Each budget is a token bucket refilled at ``rate`` requests per second. It
+    is slowed down to spread the quota reported by ``X-RateLimit-Remaining``
+    over the time left until ``X-RateLimit-Reset``. Parallelism shrinks as that
+    quota nears ``reserve``. Once the quota is spent, or a ``Retry-After`` is
+    received, requests wait in the queue instead of failing.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 20,
+        max_concurrency: int = 8,
+        reserve: int = 20,
+        max_retries: int = 5,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self._budgets: Dict[Tuple[str, bytes], _Budget] = {}
+        self._lock = threading.Lock()
+
+    def send(
+        self, session: requests.Session, url: str, issue: Callable[[], requests.Response]
+    ) -> requests.Response:
+        """Run ``issue`` under the budget of ``url``'s host and ``session``'s credentials."""
+        budget = self._budget(session, url)
+        attempt = 0
+        while True:
+            budget.acquire()
+            response = None
+            try:
+                response = issue()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+            finally:
+                budget.release()
+            if response is None:
+                time.sleep(min(MAX_BACKOFF_SECONDS, 1.5 * 2**attempt) * random.uniform(0.5, 1.0))
+                attempt += 1
+                continue
+            retrying = _rate_limited(response) or response.status_code in RETRYABLE_STATUS
+            budget.observe(response, attempt)
+            if not retrying or attempt >= self.max_retries:
+                return response
+            attempt += 1
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Return the last reported quota and current parallelism per host."""
+        with self._lock:
+            budgets = list(self._budgets.items())
+        return {
+            host: {
+                "limit": budget.limit,
+                "remaining": budget.remaining,
+                "concurrency": budget.concurrency(),
+                "in_flight": budget.in_flight,
+            }
+            for (host, _), budget in budgets
+        }
+
+    def _budget(self, session: requests.Session, url: str) -> _Budget:
+        authorization = session.headers.get("Authorization", "")
+        credentials = hashlib.sha256(authorization.encode("utf-8")).digest()
+        key = (urlsplit(url).netloc, credentials)
+        with self._lock:
+            budget = self._budgets.get(key)
+            if budget is None:
+                budget = _Budget(self.rate, self.burst, self.max_concurrency, self.reserve)
+                self._budgets[key] = budget
+            return budget
+
+
+@lru_cache(maxsize=None)
+def rate_limit_scheduler(
+    rate: float, burst: int, max_concurrency: int, reserve: int, max_retries: int
+) -> RateLimitScheduler:
+    """Return the process-wide scheduler shared by every MCP client."""
+    return RateLimitScheduler(rate, burst, max_concurrency, reserve, max_retries)
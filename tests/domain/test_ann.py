@@ -0,0 +1,33 @@
+"""IVF parameters tuned on a sample must hold on the full corpus."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from domain import ann
+
+
+def _vectors(rows: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((rows, dim)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_build_scales_tuned_nprobe_with_nlist():
+    vectors = _vectors(20000)
+    params = {"nlist_factor": 1, "nprobe": 2, "nprobe_fraction": 0.1}
+    config = {"backend": "ivf", "params": params}
+    ann.build(config, vectors)
+    assert params["nlist"] == ann.ivf_nlist(len(vectors), 1)
+    assert params["nprobe"] == int(np.ceil(0.1 * params["nlist"]))
+
+
+def test_calibrate_raises_nprobe_until_the_target_recall():
+    vectors = _vectors(8000)
+    config = {"backend": "ivf", "params": {"nlist_factor": 1, "nprobe": 1}}
+    index = ann.build(config, vectors)
+    assert ann.measure_recall(index, config, vectors)["ann"] < 0.9
+
+    recall = ann.calibrate(index, config, vectors, target_recall=0.9)
+    assert recall["ann"] >= 0.9
+    assert ann.measure_recall(index, config, vectors) == recall
+    assert 1 < config["params"]["nprobe"] <= config["params"]["nlist"]
@@ -0,0 +1,87 @@
+"""Column layout and round-trip invariants of the chunk store."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+
+from domain.chunk_store import (
+    CODES_FILE,
+    DICTIONARY_FILE,
+    MISSING,
+    OFFSETS_FILE,
+    RAW_FILE,
+    RAW_OFFSETS_FILE,
+    TEXT_FILE,
+    ChunkStore,
+)
+
+
+def _metadata(start: int, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "chunk_id": f"src/file{row}.py:0:{row}",
+            "path": f"src/file{row}.py",
+            "url": f"https://example.com/src/file{row}.py",
+            "type": "repo",
+            "commit": f"c{row % 3}",
+        }
+        for row in range(start, start + count)
+    ]
+
+
+def _rows(store: ChunkStore) -> List[Dict[str, Any]]:
+    return [store.metadata_at(row) for row in range(len(store))]
+
+
+def test_unique_fields_are_not_dictionary_encoded(tmp_path):
+    metadata = _metadata(0, 20)
+    ChunkStore.write(tmp_path, [f"text {row}" for row in range(20)], metadata)
+
+    dictionary = json.loads((tmp_path / DICTIONARY_FILE).read_text())
+    assert dictionary["fields"] == ["type", "commit"]
+    assert dictionary["raw_fields"] == ["chunk_id", "path", "url"]
+    store = ChunkStore(tmp_path)
+    assert _rows(store) == metadata
+    assert store.text_at(7) == "text 7"
+
+
+def test_append_and_update_keep_every_row(tmp_path):
+    metadata = _metadata(0, 10)
+    ChunkStore.write(tmp_path, ["a"] * 10, metadata)
+    appended = [{**meta, "title": f"t{row}"} for row, meta in enumerate(_metadata(10, 5))]
+    ChunkStore.append(tmp_path, ["b"] * 5, appended)
+    ChunkStore.update(tmp_path, [2], [{"path": "moved.py", "type": "repo"}])
+
+    expected = metadata + appended
+    expected[2] = {"path": "moved.py", "type": "repo"}
+    store = ChunkStore(tmp_path)
+    assert _rows(store) == expected
+    for field in ("path", "title", "commit", "absent"):
+        codes, values = store.column(field, start=2)
+        decoded = [values[code] if code != MISSING else None for code in codes]
+        assert decoded == [meta.get(field) for meta in expected[2:]]
+
+
+def test_stores_without_cell_columns_still_load_and_grow(tmp_path):
+    # Older stores dictionary-encoded every field and had no cell files.
+    metadata = _metadata(0, 4)
+    fields = ["chunk_id", "path", "url", "type", "commit"]
+    values = [[meta[field] for meta in metadata] for field in fields[:3]]
+    values += [["repo"], ["c0", "c1", "c2"]]
+    codes = np.array([[row, row, row, 0, row % 3] for row in range(4)], dtype="int32")
+    (tmp_path / TEXT_FILE).write_bytes(b"xxxx")
+    np.save(tmp_path / OFFSETS_FILE, np.arange(5, dtype="uint64"))
+    np.save(tmp_path / CODES_FILE, codes)
+    (tmp_path / DICTIONARY_FILE).write_text(json.dumps({"fields": fields, "values": values}))
+    assert not (tmp_path / RAW_FILE).exists() and not (tmp_path / RAW_OFFSETS_FILE).exists()
+
+    assert _rows(ChunkStore(tmp_path)) == metadata
+    extra = [{**meta, "title": "new"} for meta in _metadata(4, 2)]
+    ChunkStore.append(tmp_path, ["y"] * 2, extra)
+    store = ChunkStore(tmp_path)
+    assert store.fields == fields
+    assert store.raw_fields == ["title"]
+    assert _rows(store) == metadata + extra
@@ -0,0 +1,114 @@
+"""Readers and writers of one index never observe a partially published generation."""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+from domain import generations
+from domain.index_store import IndexStore
+
+DIM = 8
+ROWS = 30
+
+
+def _build(store: IndexStore, generation: int) -> None:
+    rng = np.random.default_rng(generation)
+    metadata = [
+        {"chunk_id": f"f{row}.py:0:{row}", "path": f"f{row}.py", "commit": f"g{generation}"}
+        for row in range(ROWS)
+    ]
+    texts = [f"generation g{generation} row {row}" for row in range(ROWS)]
+    store.build_index("k", rng.standard_normal((ROWS, DIM)).tolist(), metadata, texts)
+
+
+def _upsert_many(base_path: str, writer: int, count: int) -> None:
+    store = IndexStore(base_path)
+    rng = np.random.default_rng(writer)
+    for row in range(count):
+        chunk_id = f"w{writer}/f{row}.py:0:{row}"
+        vector = rng.standard_normal(DIM).tolist()
+        store.upsert("k", [chunk_id], [vector], [{"path": chunk_id}], [chunk_id])
+
+
+def test_searches_never_mix_generations_during_publishes(tmp_path):
+    store = IndexStore(str(tmp_path))
+    _build(store, 0)
+    publishes = 20
+    done = threading.Event()
+    failures: List[str] = []
+
+    def write() -> None:
+        try:
+            for generation in range(1, publishes + 1):
+                _build(store, generation)
+        finally:
+            done.set()
+
+    def read(seed: int) -> None:
+        rng = np.random.default_rng(seed)
+        reader = IndexStore(str(tmp_path))
+        while not done.is_set():
+            for hits in (
+                reader.search("k", rng.standard_normal(DIM).tolist(), top_k=ROWS),
+                reader.search_lexical("k", "generation row", top_k=ROWS),
+            ):
+                commits = {hit.metadata["commit"] for hit in hits}
+                if len(hits) != ROWS or len(commits) != 1:
+                    failures.append(f"{len(hits)} hits across {sorted(commits)}")
+                elif any(hit.text.split()[1] != hit.metadata["commit"] for hit in hits):
+                    failures.append("texts and metadata from different generations")
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        readers = [pool.submit(read, seed) for seed in range(4)]
+        writer = pool.submit(write)
+        # Re-raise anything a reader or the writer raised instead of losing it with the thread.
+        for future in [writer, *readers]:
+            future.result()
+
+    assert not failures
+    hits = store.search("k", [1.0] * DIM, top_k=ROWS)
+    assert {hit.metadata["commit"] for hit in hits} == {f"g{publishes}"}
+
+
+def test_writers_in_other_processes_do_not_lose_updates(tmp_path):
+    store = IndexStore(str(tmp_path))
+    seed = {"chunk_id": "seed.py:0:0", "path": "seed.py"}
+    store.build_index("k", [[1.0] * DIM], [seed], ["seed"])
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_upsert_many, args=(str(tmp_path), writer, 10))
+        for writer in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert len(store.chunk_ids("k")) == 1 + 3 * 10
+
+
+def test_sweep_keeps_superseded_generations_for_the_grace_period(tmp_path, monkeypatch):
+    store = IndexStore(str(tmp_path))
+    index_dir = tmp_path / "k"
+    _build(store, 0)
+    first = generations.current(index_dir)
+    _build(store, 1)
+    second = generations.current(index_dir)
+
+    generations.sweep(index_dir)
+    assert first.exists() and second.exists()
+
+    monkeypatch.setattr(generations, "SWEEP_GRACE_SECONDS", 0.0)
+    with generations.lease(first) as alive:
+        assert alive
+        generations.sweep(index_dir)
+        assert first.exists()
+    assert not first.exists()
+    assert second.exists()
+    assert store.search("k", [1.0] * DIM, top_k=1)[0].metadata["commit"] == "g1"
@@ -0,0 +1,228 @@
+"""Round-trip and filtering invariants of the generational index store."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from domain import ann
+from domain.filter_index import MetadataFilter
+from domain.index_store import IndexStore, SearchResult
+
+DIM = 16
+
+Corpus = tuple[List[str], List[List[float]], List[Dict[str, Any]], List[str]]
+
+
+def _corpus(count: int, seed: int = 0, commits: int = 10) -> Corpus:
+    rng = np.random.default_rng(seed)
+    ids = [f"src/mod{row % 7}/file{row}.py:0:{row}" for row in range(count)]
+    vectors = rng.standard_normal((count, DIM)).astype("float32").tolist()
+    metadata = [
+        {
+            "chunk_id": chunk_id,
+            "path": chunk_id.split(":")[0],
+            "commit": f"c{row % commits}",
+            "type": "repo",
+        }
+        for row, chunk_id in enumerate(ids)
+    ]
+    texts = [f"chunk {row} of module mod{row % 7}" for row in range(count)]
+    return ids, vectors, metadata, texts
+
+
+def _live(store: IndexStore, key: str) -> Dict[str, tuple[str, Dict[str, Any]]]:
+    live = {}
+    with store._reading(key) as loaded:
+        for row, meta in enumerate(loaded.metadata):
+            if row not in loaded.tombstones:
+                live[meta["chunk_id"]] = (loaded.texts[row], dict(meta))
+    return live
+
+
+def _chunk_ids(hits: List[SearchResult]) -> List[str]:
+    return [hit.metadata["chunk_id"] for hit in hits]
+
+
+def _brute_force(vectors: np.ndarray, query: np.ndarray, rows: List[int], k: int) -> List[int]:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized[rows] @ (query / np.linalg.norm(query))
+    return [rows[i] for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+def test_upsert_delete_compact_round_trip(tmp_path):
+    store = IndexStore(str(tmp_path))
+    ids, vectors, metadata, texts = _corpus(40)
+    store.build_index("k", vectors, metadata, texts)
+
+    rng = np.random.default_rng(1)
+    replaced = ids[:5]
+    added = [f"src/new/file{row}.py:0:{row}" for row in range(5)]
+    new_vectors = rng.standard_normal((10, DIM)).tolist()
+    upserted = replaced + added
+    store.upsert(
+        "k",
+        upserted,
+        new_vectors,
+        [{"path": chunk_id.split(":")[0], "commit": "c-new"} for chunk_id in upserted],
+        [f"rewritten {chunk_id}" for chunk_id in upserted],
+    )
+    assert store.delete("k", ids[10:15] + ["missing"]) == 5
+
+    expected = set(ids) - set(ids[10:15]) | set(added)
+    assert set(store.chunk_ids("k")) == expected
+    live = _live(store, "k")
+    assert all(live[chunk_id][0] == f"rewritten {chunk_id}" for chunk_id in upserted)
+    assert all(live[chunk_id][1]["commit"] == "c-new" for chunk_id in upserted)
+
+    hits = store.search("k", new_vectors[0], top_k=1)
+    assert hits[0].metadata["chunk_id"] == replaced[0]
+    deleted = MetadataFilter(path_prefix="src/mod3/file10.py")
+    assert not store.search("k", new_vectors[0], top_k=50, where=deleted)
+
+    store.compact("k")
+    with store._reading("k") as loaded:
+        assert not loaded.tombstones
+        assert len(loaded.texts) == len(expected)
+    assert _live(store, "k") == live
+    assert store.search("k", new_vectors[0], top_k=1)[0].metadata["chunk_id"] == replaced[0]
+
+
+@pytest.mark.parametrize("backend", ["faiss", "hnsw"])
+def test_filtered_search_returns_full_top_k(tmp_path, backend):
+    if backend == "hnsw":
+        config = {"backend": "hnsw", "params": dict(ann.DEFAULT_HNSW_PARAMS)}
+    else:
+        config = {"backend": "faiss", "params": {}}
+    store = IndexStore(str(tmp_path))
+    ids, vectors, metadata, texts = _corpus(600, commits=50)
+    store.build_index("k", vectors, metadata, texts, config=config)
+    store.delete("k", ids[:50])
+
+    vector_array = np.asarray(vectors, dtype="float32")
+    query = np.random.default_rng(2).standard_normal(DIM).astype("float32")
+    where = MetadataFilter(commit="c7", path_prefix="src/mod1/")
+    matching = [
+        row
+        for row, meta in enumerate(metadata)
+        if row >= 50 and meta["commit"] == "c7" and meta["path"].startswith("src/mod1/")
+    ]
+    assert len(matching) > 1
+
+    for top_k in (1, len(matching) - 1, len(matching), len(matching) + 5):
+        hits = store.search("k", query.tolist(), top_k=top_k, where=where)
+        assert len(hits) == min(top_k, len(matching))
+        assert set(_chunk_ids(hits)) <= {ids[row] for row in matching}
+        if backend == "faiss":
+            truth = _brute_force(vector_array, query, matching, top_k)
+            assert _chunk_ids(hits) == [ids[row] for row in truth]
+
+
+@pytest.mark.parametrize("shards", [1, 2])
+def test_incremental_reindex_matches_full_rebuild(tmp_path, shards):
+    ids, vectors, metadata, texts = _corpus(60)
+    incremental = IndexStore(str(tmp_path / "incremental"))
+    incremental.build_index("k", vectors, metadata, texts, shards=shards)
+
+    # A new commit: some chunks change, some disappear, some are new, the rest only retag.
+    rng = np.random.default_rng(3)
+    final: Dict[str, tuple[List[float], Dict[str, Any], str]] = {
+        chunk_id: (vector, {**meta, "commit": "head"}, text)
+        for chunk_id, vector, meta, text in zip(ids, vectors, metadata, texts)
+    }
+    for chunk_id in ids[:8]:
+        vector = rng.standard_normal(DIM).tolist()
+        final[chunk_id] = (vector, final[chunk_id][1], f"edited {chunk_id}")
+    for chunk_id in ids[8:14]:
+        del final[chunk_id]
+    for row in range(6):
+        chunk_id = f"src/added/file{row}.py:0:{row}"
+        meta = {"chunk_id": chunk_id, "path": f"src/added/file{row}.py", "commit": "head"}
+        vector = rng.standard_normal(DIM).tolist()
+        final[chunk_id] = (vector, {**meta, "type": "repo"}, f"added {row}")
+
+    changed = ids[:8] + [chunk_id for chunk_id in final if chunk_id.startswith("src/added/")]
+    incremental.upsert(
+        "k",
+        changed,
+        [final[chunk_id][0] for chunk_id in changed],
+        [final[chunk_id][1] for chunk_id in changed],
+        [final[chunk_id][2] for chunk_id in changed],
+    )
+    incremental.delete("k", ids[8:14])
+    retagged = ids[14:]
+    retags = [final[chunk_id][1] for chunk_id in retagged]
+    assert incremental.update_metadata("k", retagged, retags) == len(retagged)
+
+    rebuilt = IndexStore(str(tmp_path / "rebuilt"))
+    rebuilt.build_index(
+        "k",
+        [value[0] for value in final.values()],
+        [value[1] for value in final.values()],
+        [value[2] for value in final.values()],
+        shards=shards,
+    )
+
+    assert incremental.chunk_metadata("k") == rebuilt.chunk_metadata("k")
+    where = MetadataFilter(commit="head")
+    for query in rng.standard_normal((5, DIM)).tolist():
+        expected = rebuilt.search("k", query, top_k=10, where=where)
+        actual = incremental.search("k", query, top_k=10, where=where)
+        assert _chunk_ids(actual) == _chunk_ids(expected)
+    expected = rebuilt.search_lexical("k", "edited", top_k=10)
+    actual = incremental.search_lexical("k", "edited", top_k=10)
+    assert set(_chunk_ids(actual)) == set(_chunk_ids(expected)) == set(ids[:8])
+
+
+def test_hybrid_results_keep_the_dense_cosine(tmp_path):
+    store = IndexStore(str(tmp_path))
+    ids, vectors, metadata, texts = _corpus(50)
+    texts = [f"{text} parse_config" if row < 3 else text for row, text in enumerate(texts)]
+    store.build_index("k", vectors, metadata, texts)
+    query = np.random.default_rng(4).standard_normal(DIM)
+
+    dense = store.search("k", query.tolist(), top_k=50)
+    cosines = {hit.metadata["chunk_id"]: hit.score for hit in dense}
+    hits = store.search_hybrid("k", "parse_config", query.tolist(), top_k=10)
+    for hit in hits:
+        if hit.dense_score is not None:
+            assert hit.dense_score == pytest.approx(cosines[hit.metadata["chunk_id"]])
+    assert max(hit.dense_score or 0.0 for hit in hits) < 0.9
+
+    lexical_only = store.search_hybrid("k", "parse_config", top_k=3)
+    assert [hit.score for hit in lexical_only] == [1.0, 1.0, 1.0]
+    assert all(hit.dense_score is None for hit in lexical_only)
+
+
+def test_apply_publishes_upserts_deletes_and_retags_together(tmp_path, monkeypatch):
+    store = IndexStore(str(tmp_path))
+    ids, vectors, metadata, texts = _corpus(20)
+    store.build_index("k", vectors, metadata, texts)
+    published: List[str] = []
+    publish = store._publish
+
+    def counting_publish(key: str, gen_dir: Path) -> None:
+        published.append(key)
+        publish(key, gen_dir)
+
+    monkeypatch.setattr(store, "_publish", counting_publish)
+
+    counts = store.apply(
+        "k",
+        ["src/new.py:0:0", ids[0]],
+        np.random.default_rng(5).standard_normal((2, DIM)).tolist(),
+        [{"path": "src/new.py", "commit": "head"}, {**metadata[0], "commit": "head"}],
+        ["new", "edited"],
+        deleted=[ids[1], "missing"],
+        retagged={ids[row]: {**metadata[row], "commit": "head"} for row in range(2, 20)},
+    )
+
+    assert published == ["k"]
+    assert counts == {"upserted": 2, "deleted": 1, "retagged": 18}
+    stored = store.chunk_metadata("k")
+    assert set(stored) == set(ids) - {ids[1]} | {"src/new.py:0:0"}
+    assert {meta["commit"] for meta in stored.values()} == {"head"}
+    assert len(store.search("k", vectors[5], top_k=50, where=MetadataFilter(commit="head"))) == 20
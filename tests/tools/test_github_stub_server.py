@@ -0,0 +1,102 @@
+"""Tree, blob and tarball ingestion against the GitHub stub server."""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Dict
+
+import pytest
+import requests
+
+from mcp.github.github_client import GitHubClient
+from tools.github_stub_server import make_handler
+
+FILES = {
+    "README.md": "# Demo\n",
+    "setup.py": "from setuptools import setup\n",
+    "src/app.py": "print('app')\n",
+    "src/pkg/__init__.py": "",
+    "src/pkg/core.py": "def core():\n    return 1\n",
+    "src/pkg/util.py": "def util():\n    return 2\n",
+    "docs/guide.md": "Guide\n",
+    "docs/api/index.md": "API\n",
+}
+
+
+@pytest.fixture
+def checkout(tmp_path: Path) -> str:
+    for path, text in FILES.items():
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(text)
+
+    def git(*args: str) -> None:
+        subprocess.run(["git", "-C", str(tmp_path), *args], check=True, capture_output=True)
+
+    git("init", "-q", "-b", "main")
+    git("add", "-A")
+    git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "init")
+    return str(tmp_path)
+
+
+def _stats(base_url: str) -> Dict[str, int]:
+    return requests.get(f"{base_url}/_stats", timeout=10).json()
+
+
+def test_tree_and_blobs_return_every_file(serve, checkout):
+    client = GitHubClient(base_url=serve(make_handler(checkout)))
+
+    tree = client.get_repo_tree("acme", "demo")
+
+    assert not tree["truncated"]
+    assert sorted(item["path"] for item in tree["items"]) == sorted(FILES)
+    blobs = {item["path"]: item["sha"] for item in tree["items"]}
+    assert {path: client.get_blob("acme", "demo", sha) for path, sha in blobs.items()} == FILES
+
+
+@pytest.mark.parametrize("tree_limit", [6, 2])
+def test_truncated_trees_are_listed_per_subtree(serve, checkout, tree_limit):
+    base_url = serve(make_handler(checkout, tree_limit=tree_limit))
+    client = GitHubClient(base_url=base_url)
+
+    tree = client.get_repo_tree("acme", "demo")
+
+    assert not tree["truncated"]
+    assert sorted(item["path"] for item in tree["items"]) == sorted(FILES)
+    assert _stats(base_url)["git/trees"] > 1
+
+
+def test_tarball_returns_the_requested_files(serve, checkout):
+    client = GitHubClient(base_url=serve(make_handler(checkout)))
+    tree = client.get_repo_tree("acme", "demo")
+    wanted = ["README.md", "src/pkg/core.py", "docs/api/index.md"]
+
+    files = client.get_archive("acme", "demo", tree["commit"], wanted)
+
+    assert files == {path: FILES[path] for path in wanted}
+
+
+def test_tree_ingest_makes_fewer_api_calls_than_contents_walks(serve, checkout):
+    contents_url = serve(make_handler(checkout))
+    contents_client = GitHubClient(base_url=contents_url)
+    pending = [""]
+    while pending:
+        structure = contents_client.get_repo_structure("acme", "demo", path=pending.pop())
+        for item in structure["items"]:
+            if item["type"] == "dir":
+                pending.append(item["path"])
+            else:
+                contents_client.get_file_content("acme", "demo", item["path"])
+
+    tree_url = serve(make_handler(checkout))
+    tree_client = GitHubClient(base_url=tree_url)
+    tree = tree_client.get_repo_tree("acme", "demo")
+    paths = [item["path"] for item in tree["items"]]
+    assert tree_client.get_archive("acme", "demo", tree["commit"], paths) == FILES
+
+    per_file = sum(_stats(contents_url).values())
+    tarball = _stats(tree_url)
+    # Default branch, head commit, one tree listing and one tarball, whatever the file count.
+    assert tarball == {"repo": 1, "commits": 1, "git/trees": 1, "tarball": 1}
+    assert per_file >= 3 * len(FILES)
@@ -0,0 +1,132 @@
+"""Batched embedding dispatch against the OpenAI stub server."""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, List
+
+import pytest
+import requests
+
+from agents.exploration.batching import BatchDispatcher
+from tools.openai_stub_server import _vector, make_handler
+
+DIM = 8
+
+
+class _StatusError(Exception):
+    """Non-200 reply, shaped like the OpenAI SDK's status errors."""
+
+    def __init__(self, response: requests.Response) -> None:
+        super().__init__(f"HTTP {response.status_code}")
+        self.status_code = response.status_code
+        self.response = response
+
+
+def _sender(base_url: str, sent: List[List[str]]) -> Callable[[List[str]], List[List[float]]]:
+    lock = threading.Lock()
+
+    def send(texts: List[str]) -> List[List[float]]:
+        with lock:
+            sent.append(list(texts))
+        response = requests.post(
+            f"{base_url}/v1/embeddings", json={"model": "stub", "input": texts}, timeout=10
+        )
+        if response.status_code != 200:
+            raise _StatusError(response)
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    return send
+
+
+def _count_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _texts(count: int) -> List[str]:
+    return [f"text {row} " + "x" * (row % 13 * 4) for row in range(count)]
+
+
+def test_batches_are_reassembled_in_input_order(serve):
+    base_url = serve(make_handler(DIM, fail_every=0, retry_after=0.0))
+    sent: List[List[str]] = []
+    texts = _texts(200)
+    dispatcher = BatchDispatcher(
+        _sender(base_url, sent), _count_tokens, max_tokens=10_000, max_items=7, concurrency=8
+    )
+
+    vectors = dispatcher.run(texts)
+
+    assert len(sent) == 29
+    assert vectors == [_vector(text, DIM) for text in texts]
+
+
+def test_batches_stay_within_the_token_budget(serve):
+    base_url = serve(make_handler(DIM, fail_every=0, retry_after=0.0))
+    sent: List[List[str]] = []
+    texts = _texts(60) + ["y" * 400]
+    dispatcher = BatchDispatcher(
+        _sender(base_url, sent), _count_tokens, max_tokens=40, max_items=100, concurrency=4
+    )
+
+    vectors = dispatcher.run(texts)
+
+    assert len(sent) > 1
+    assert all(sum(map(_count_tokens, batch)) <= 40 for batch in sent if len(batch) > 1)
+    # An input over the budget on its own is still sent, alone.
+    assert ["y" * 400] in sent
+    assert vectors == [_vector(text, DIM) for text in texts]
+
+
+def test_rate_limited_batches_are_retried_after_the_advertised_delay(serve):
+    base_url = serve(make_handler(DIM, fail_every=3, retry_after=0.01))
+    sent: List[List[str]] = []
+    texts = _texts(40)
+    dispatcher = BatchDispatcher(
+        _sender(base_url, sent),
+        _count_tokens,
+        max_tokens=10_000,
+        max_items=4,
+        concurrency=3,
+        max_retries=5,
+        # Without Retry-After, the backoff would exceed the test timeout.
+        backoff_seconds=60.0,
+    )
+
+    vectors = dispatcher.run(texts)
+
+    # Every third request was answered 429, so 10 batches took 14 or 15 requests.
+    assert len({tuple(batch) for batch in sent}) == 10
+    assert len(sent) in (14, 15)
+    assert vectors == [_vector(text, DIM) for text in texts]
+
+
+def test_rate_limits_surface_once_retries_are_exhausted(serve):
+    base_url = serve(make_handler(DIM, fail_every=1, retry_after=0.0))
+    sent: List[List[str]] = []
+    dispatcher = BatchDispatcher(
+        _sender(base_url, sent),
+        _count_tokens,
+        max_tokens=100,
+        max_items=10,
+        concurrency=1,
+        max_retries=2,
+    )
+
+    with pytest.raises(_StatusError):
+        dispatcher.run(["only"])
+    assert len(sent) == 3
+
+
+def test_openai_provider_embeds_through_the_stub(serve):
+    pytest.importorskip("openai")
+    from agents.exploration.embeddings import OpenAIEmbeddingProvider
+
+    base_url = serve(make_handler(DIM, fail_every=2, retry_after=0.01))
+    provider = OpenAIEmbeddingProvider("stub", "stub-model", base_url=f"{base_url}/v1")
+    first, second = _texts(50)[:25], _texts(50)[25:]
+
+    # The second request is answered 429 and retried after Retry-After.
+    assert provider.embed(first) == [_vector(text, DIM) for text in first]
+    assert provider.embed(second) == [_vector(text, DIM) for text in second]
@@ -0,0 +1,66 @@
+"""Benchmark the ONNX int8 embedding backend against the sentence-transformers provider.
+
+Usage::
+
+    python tools/benchmark_embeddings.py --texts 2000 [--corpus path/to/file.txt]
+
+Reports throughput for both providers and the cosine agreement of their vectors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+from agents.exploration.embeddings import LocalEmbeddingProvider
+from agents.exploration.onnx_embeddings import OnnxEmbeddingProvider, cosine_agreement
+from apps.api.config import CONFIG
+
+
+def _corpus(path: str | None, count: int) -> List[str]:
+    if path:
+        lines = [line.strip() for line in Path(path).read_text().splitlines() if line.strip()]
+    else:
+        words = "index chunk embedding repository commit search vector query onboarding api".split()
+        rng = np.random.default_rng(0)
+        lines = [" ".join(rng.choice(words, size=int(rng.integers(4, 200)))) for _ in range(count)]
+    return (lines * (count // max(len(lines), 1) + 1))[:count]
+
+
+def _timed(
+    embed: Callable[[List[str]], List[List[float]]], texts: List[str]
+) -> tuple[np.ndarray, float]:
+    embed(texts[:8])
+    started = time.perf_counter()
+    vectors = np.asarray(embed(texts), dtype="float32")
+    return vectors, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare local and ONNX embedding providers.")
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--corpus", default=None, help="Text file with one input per line")
+    parser.add_argument("--threads", type=int, default=CONFIG.embedding_onnx_threads)
+    args = parser.parse_args()
+
+    texts = _corpus(args.corpus, args.texts)
+    local = LocalEmbeddingProvider(CONFIG.embedding_model, CONFIG.embedding_workers)
+    onnx = OnnxEmbeddingProvider(CONFIG.embedding_model, CONFIG.embedding_onnx_dir, args.threads)
+
+    local_vectors, local_seconds = _timed(local._embed, texts)
+    onnx_vectors, onnx_seconds = _timed(onnx._embed, texts)
+    agreement = cosine_agreement(local_vectors, onnx_vectors)
+
+    print(f"model: {CONFIG.embedding_model} ({len(texts)} texts)")
+    print(f"sentence-transformers: {local_seconds:.2f}s ({len(texts) / local_seconds:.1f} texts/s)")
+    print(f"onnx int8:             {onnx_seconds:.2f}s ({len(texts) / onnx_seconds:.1f} texts/s)")
+    print(f"speedup: {local_seconds / onnx_seconds:.2f}x")
+    print(f"cosine agreement: mean {agreement['mean']} min {agreement['min']}")
+
+
+if __name__ == "__main__":
+    main()
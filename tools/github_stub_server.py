@@ -0,0 +1,197 @@
+"""Minimal stand-in for the GitHub REST API backed by a local git repository.
+
+Serve a checkout and point the API at it::
+
+    python tools/github_stub_server.py --repo /path/to/checkout --port 8090
+    GITHUB_API_URL=http://127.0.0.1:8090 ...
+
+Every ``owner/repo`` maps to the same local repository. Implements the
+contents, commits, compare, git trees/blobs and tarball endpoints used for
+ingestion. Responses carry an ETag and honor ``If-None-Match`` with ``304``;
+``GET /_stats`` returns per-endpoint request counts. ``--tree-limit`` truncates
+recursive tree listings longer than that many entries, as GitHub does past 100k.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import collections
+import hashlib
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+def _git(repo: str, *args: str) -> bytes:
+    return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True).stdout
+
+
+def make_handler(repo: str, tree_limit: int | None = None) -> type[BaseHTTPRequestHandler]:
+    stats: collections.Counter = collections.Counter()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            url = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            parts = [unquote(part) for part in url.path.strip("/").split("/")]
+            if parts == ["_stats"]:
+                with lock:
+                    self._reply(200, dict(stats))
+                return
+            if len(parts) < 3 or parts[0] not in {"repos", "raw"}:
+                self._reply(404, {"message": "Not Found"})
+                return
+            owner, name, rest = parts[1], parts[2], parts[3:]
+            endpoint = "raw" if parts[0] == "raw" else (rest[0] if rest else "repo")
+            if endpoint == "git" and len(rest) > 1:
+                endpoint = f"git/{rest[1]}"
+            with lock:
+                stats[endpoint] += 1
+            try:
+                self._route(owner, name, parts[0], rest, query)
+            except subprocess.CalledProcessError:
+                self._reply(404, {"message": "Not Found"})
+
+        def _route(self, owner: str, name: str, kind: str, rest: list, query: dict) -> None:
+            if kind == "raw":
+                ref, path = rest[0], "/".join(rest[1:])
+                self._reply_bytes(200, _git(repo, "show", f"{ref}:{path}"), "text/plain")
+            elif not rest:
+                branch = _git(repo, "rev-parse", "--abbrev-ref", "HEAD").decode().strip()
+                full_name = f"{owner}/{name}"
+                self._reply(200, {"name": name, "full_name": full_name, "default_branch": branch})
+            elif rest[0] == "commits" and len(rest) > 1:
+                sha = _git(repo, "rev-parse", f"{rest[1]}^{{commit}}").decode().strip()
+                tree = _git(repo, "rev-parse", f"{sha}^{{tree}}").decode().strip()
+                self._reply(200, {"sha": sha, "commit": {"tree": {"sha": tree}}})
+            elif rest[0] == "commits":
+                args = ["log", "-1", "--format=%H", query.get("sha", "HEAD")]
+                if query.get("path"):
+                    args += ["--", query["path"]]
+                sha = _git(repo, *args).decode().strip()
+                self._reply(200, [{"sha": sha}] if sha else [])
+            elif rest[:2] == ["git", "trees"]:
+                self._reply(200, self._tree(rest[2], query.get("recursive")))
+            elif rest[:2] == ["git", "blobs"]:
+                content = _git(repo, "cat-file", "blob", rest[2])
+                encoded = base64.b64encode(content).decode("ascii")
+                blob = {"sha": rest[2], "size": len(content), "encoding": "base64"}
+                self._reply(200, {**blob, "content": encoded})
+            elif rest[0] == "tarball":
+                ref = rest[1] if len(rest) > 1 else "HEAD"
+                sha = _git(repo, "rev-parse", ref).decode().strip()
+                prefix = f"--prefix={owner}-{name}-{sha[:7]}/"
+                archive = _git(repo, "archive", "--format=tar.gz", prefix, sha)
+                self._reply_bytes(200, archive, "application/x-gzip")
+            elif rest[0] == "compare":
+                self._reply(200, self._compare(*rest[1].split("...", 1)))
+            elif rest[0] in {"contents", "readme"}:
+                self._contents(owner, name, rest, query.get("ref", "HEAD"))
+            else:
+                self._reply(404, {"message": "Not Found"})
+
+        def _tree(self, sha: str, recursive: str | None) -> dict:
+            args = ["ls-tree", "-l", "-r", "-t", sha] if recursive else ["ls-tree", "-l", sha]
+            items = []
+            for line in _git(repo, *args).decode().splitlines():
+                meta, path = line.split("\t", 1)
+                mode, kind, object_sha, size = meta.split()
+                item = {"path": path, "mode": mode, "type": kind, "sha": object_sha}
+                if kind == "blob":
+                    item["size"] = int(size)
+                items.append(item)
+            truncated = bool(recursive) and tree_limit is not None and len(items) > tree_limit
+            if truncated:
+                items = items[:tree_limit]
+            return {"sha": sha, "tree": items, "truncated": truncated}
+
+        def _compare(self, base: str, head: str) -> dict:
+            base = _git(repo, "rev-parse", base).decode().strip()
+            head = _git(repo, "rev-parse", head).decode().strip()
+            ancestry = ["git", "-C", repo, "merge-base", "--is-ancestor", base, head]
+            ahead = subprocess.run(ancestry).returncode == 0
+            status = "identical" if base == head else ("ahead" if ahead else "diverged")
+            statuses = {
+                "A": "added", "M": "modified", "D": "removed", "R": "renamed", "C": "copied"
+            }
+            files = []
+            for line in _git(repo, "diff", "--name-status", "-M", base, head).decode().splitlines():
+                fields = line.split("\t")
+                item = {"filename": fields[-1], "status": statuses.get(fields[0][0], "changed")}
+                if len(fields) == 3:
+                    item["previous_filename"] = fields[1]
+                files.append(item)
+            return {"status": status, "files": files}
+
+        def _contents(self, owner: str, name: str, rest: list, ref: str) -> None:
+            base = f"http://{self.headers.get('Host')}"
+            path = "/".join(rest[1:]) if rest[0] == "contents" else "README.md"
+            kind = _git(repo, "cat-file", "-t", f"{ref}:{path}").decode().strip()
+
+            def entry(item_path: str, item_kind: str, sha: str) -> dict:
+                return {
+                    "type": "dir" if item_kind == "tree" else "file",
+                    "name": item_path.rsplit("/", 1)[-1],
+                    "path": item_path,
+                    "sha": sha,
+                    "html_url": f"https://github.com/{owner}/{name}/blob/{ref}/{item_path}",
+                    "download_url": f"{base}/raw/{owner}/{name}/{ref}/{item_path}"
+                    if item_kind == "blob"
+                    else None,
+                }
+
+            if kind == "blob":
+                sha = _git(repo, "rev-parse", f"{ref}:{path}").decode().strip()
+                self._reply(200, entry(path, "blob", sha))
+                return
+            listing = []
+            tree = _git(repo, "rev-parse", f"{ref}:{path}").decode().strip()
+            for item in self._tree(tree, None)["tree"]:
+                item_path = f"{path}/{item['path']}" if path else item["path"]
+                listing.append(entry(item_path, item["type"], item["sha"]))
+            self._reply(200, listing)
+
+        def _reply(self, status: int, body: object) -> None:
+            self._reply_bytes(status, json.dumps(body).encode("utf-8"), "application/json")
+
+        def _reply_bytes(self, status: int, body: bytes, content_type: str) -> None:
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                with lock:
+                    stats["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            if status == 200:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            return
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--tree-limit", type=int, default=None)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.repo, args.tree_limit))
+    print(f"GitHub stub for {args.repo} listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
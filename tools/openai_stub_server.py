@@ -0,0 +1,98 @@
+"""Minimal stand-in for the OpenAI embeddings API, for local and CI runs.
+
+Start it and point the API at it::
+
+    python tools/openai_stub_server.py --port 8089 --fail-every 5
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub EMBEDDING_BACKEND=openai ...
+
+Vectors are deterministic per input text. ``--fail-every N`` answers every Nth
+request with ``429`` and a ``Retry-After`` header to exercise retries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def _vector(text: str, dim: int) -> list[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype("float32")
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def make_handler(dim: int, fail_every: int, retry_after: float) -> type[BaseHTTPRequestHandler]:
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.rstrip("/") != "/v1/embeddings":
+                self._reply(404, {"error": {"message": "not found"}})
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            payload = json.loads(body or b"{}")
+            with lock:
+                request_number = next(counter)
+            if fail_every and request_number % fail_every == 0:
+                self._reply(
+                    429, {"error": {"message": "rate limited"}}, {"Retry-After": str(retry_after)}
+                )
+                return
+            inputs = payload.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            data = [
+                {"object": "embedding", "index": idx, "embedding": _vector(text, dim)}
+                for idx, text in enumerate(inputs)
+            ]
+            tokens = sum(len(text) // 4 + 1 for text in inputs)
+            self._reply(
+                200,
+                {
+                    "object": "list",
+                    "data": data,
+                    "model": payload.get("model", "stub"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                },
+            )
+
+        def _reply(self, status: int, body: dict, headers: dict | None = None) -> None:
+            encoded = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format: str, *args: object) -> None:
+            return
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(
+        (args.host, args.port), make_handler(args.dim, args.fail_every, args.retry_after)
+    )
+    print(f"OpenAI stub listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()